@@ -24,7 +24,12 @@ db_host = os.getenv("DB_HOST_ALEMBIC", "db")
 db_port = os.getenv("DB_PORT_ALEMBIC", "3306")
 db_name = os.getenv("DB_NAME_ALEMBIC", "tinnova_db") # ou o nome do DB que alembic deve usar
 
-config.set_main_option("sqlalchemy.url", f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}")
+# DATABASE_URL (a mesma da aplicação, ver app/database.py) substitui a URL inteira,
+# permitindo migrar também um banco SQLite
+config.set_main_option(
+    "sqlalchemy.url",
+    os.getenv("DATABASE_URL") or f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -36,6 +41,8 @@ import sys
 import os
 sys.path.append(os.getcwd())
 from app.models.veiculo import Base
+import app.models.estatistica  # registra a tabela de estatísticas no metadata
+import app.models.importacao  # registra a tabela de checkpoints de importação no metadata
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
@@ -84,7 +91,9 @@ def run_migrations_online() -> None:
 
     # Fallback para a URL do ini se as variáveis de ambiente não estiverem definidas
     # Isso é útil para rodar migrações fora do Docker se necessário
-    if not all([db_user, db_password, db_host, db_port, db_name]):
+    if os.getenv("DATABASE_URL"):
+        url = os.getenv("DATABASE_URL")
+    elif not all([db_user, db_password, db_host, db_port, db_name]):
         print("WARNING: Variáveis de ambiente do banco de dados não definidas. Usando URL do alembic.ini")
         # Obtém a URL do alembic.ini como fallback
         url = config.get_main_option("sqlalchemy.url")
@@ -101,13 +110,16 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # O SQLite não altera colunas/constraints com ALTER TABLE: o modo "batch" recria a tabela
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
         )
 
         try:
-            # Adiciona a configuração do storage engine para MySQL
-            context.execute("SET default_storage_engine=InnoDB")
+            if connection.dialect.name == "mysql":
+                # Adiciona a configuração do storage engine para MySQL
+                context.execute("SET default_storage_engine=InnoDB")
             with context.begin_transaction():
                 context.run_migrations()
         finally:
@@ -0,0 +1,87 @@
+"""create marcas table
+
+Revision ID: 4e8b1d6a3c52
+Revises: 9c4e7a2b1f63
+Create Date: 2026-10-18 19:42:37.105214
+
+"""
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8b1d6a3c52'
+down_revision: Union[str, None] = '9c4e7a2b1f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cópia do catálogo e da normalização de app/src/marcas.py no momento desta revisão
+MARCAS = [
+    (1, "Chevrolet"), (2, "Ford"), (3, "Volkswagen"), (4, "Fiat"), (5, "Toyota"),
+    (6, "Honda"), (7, "Hyundai"), (8, "Nissan"), (9, "Renault"), (10, "Peugeot"),
+    (11, "Citroën"), (12, "Jeep"), (13, "Kia"), (14, "BMW"), (15, "Mercedes-Benz"),
+    (16, "Audi"), (17, "Mitsubishi"), (18, "Chery"), (19, "Subaru"), (20, "Volvo"),
+]
+
+
+def chave_marca(texto: str) -> str:
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return re.sub(r"[\W_]+", "", sem_acentos.casefold())
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    marcas = op.create_table(
+        'marcas',
+        sa.Column('id', sa.SmallInteger(), autoincrement=False, nullable=False),
+        sa.Column('nome', sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('nome'),
+    )
+    op.bulk_insert(marcas, [{"id": marca_id, "nome": nome} for marca_id, nome in MARCAS])
+
+    op.add_column('veiculos', sa.Column('marca_id', sa.SmallInteger(), nullable=True))
+    # O SQLite só adiciona a FK recriando a tabela, o que apagaria os gatilhos da busca
+    # textual (ce7e65df35c0): lá, a coluna fica sem a constraint
+    if dialect != 'sqlite':
+        op.create_foreign_key('fk_veiculos_marca_id', 'veiculos', 'marcas', ['marca_id'], ['id'])
+    op.create_index('ix_veiculos_marca_id', 'veiculos', ['marca_id'], unique=False)
+
+    # Backfill: um UPDATE por grafia distinta (poucas), que também grava o nome canônico;
+    # ix_veiculos_marca_ano (removido em seguida) localiza as linhas de cada grafia
+    por_chave = {chave_marca(nome): (marca_id, nome) for marca_id, nome in MARCAS}
+    conn = op.get_bind()
+    grafias = conn.execute(sa.text("SELECT DISTINCT marca FROM veiculos WHERE marca IS NOT NULL")).scalars().all()
+    for grafia in grafias:
+        encontrada = por_chave.get(chave_marca(grafia))
+        if encontrada is not None:
+            conn.execute(
+                sa.text("UPDATE veiculos SET marca_id = :marca_id, marca = :nome WHERE marca = :grafia"),
+                {"marca_id": encontrada[0], "nome": encontrada[1], "grafia": grafia},
+            )
+
+    # Contadores por marca passam a ser só das marcas do catálogo, pelo nome canônico
+    op.execute("DELETE FROM veiculos_estatisticas WHERE tipo = 'marca'")
+    op.execute(
+        "INSERT INTO veiculos_estatisticas (tipo, chave, quantidade) "
+        "SELECT 'marca', m.nome, c.quantidade FROM marcas m JOIN ("
+        "SELECT marca_id, COUNT(*) AS quantidade FROM veiculos WHERE marca_id IS NOT NULL GROUP BY marca_id"
+        ") c ON c.marca_id = m.id"
+    )
+
+    op.drop_index('ix_veiculos_marca_ano', table_name='veiculos')
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    op.create_index('ix_veiculos_marca_ano', 'veiculos', ['marca', 'ano'], unique=False)
+    if dialect != 'sqlite':
+        op.drop_constraint('fk_veiculos_marca_id', 'veiculos', type_='foreignkey')
+    op.drop_index('ix_veiculos_marca_id', table_name='veiculos')
+    op.drop_column('veiculos', 'marca_id')
+    op.drop_table('marcas')
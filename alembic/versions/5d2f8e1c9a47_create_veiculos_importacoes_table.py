@@ -0,0 +1,37 @@
+"""create veiculos_importacoes table
+
+Revision ID: 5d2f8e1c9a47
+Revises: ce7e65df35c0
+Create Date: 2026-10-18 14:21:07.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8e1c9a47'
+down_revision: Union[str, None] = 'ce7e65df35c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('veiculos_importacoes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('arquivo', sa.String(length=255), nullable=False),
+    sa.Column('formato', sa.String(length=10), nullable=False),
+    sa.Column('registros_processados', sa.Integer(), nullable=False),
+    sa.Column('inseridos', sa.Integer(), nullable=False),
+    sa.Column('rejeitados', sa.Integer(), nullable=False),
+    sa.Column('concluida', sa.Boolean(), nullable=False),
+    sa.Column('created', sa.DateTime(), nullable=True),
+    sa.Column('updated', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('veiculos_importacoes')
@@ -0,0 +1,31 @@
+"""add ix_veiculos_marca_id_ano
+
+Revision ID: 7a1c5e9d2b84
+Revises: 4e8b1d6a3c52
+Create Date: 2026-10-18 21:14:09.532871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1c5e9d2b84'
+down_revision: Union[str, None] = '4e8b1d6a3c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 4e8b1d6a3c52 trocou ix_veiculos_marca_ano (marca, ano) por ix_veiculos_marca_id, que não
+# atende ao filtro por marca e ano juntos. O índice composto volta, agora sobre `marca_id`;
+# ix_veiculos_marca_id continua, porque no composto o filtro só por marca sai na ordem do
+# ano, e a listagem por marca precisa da ordem do ID (ver tests/test_planos_consulta.py).
+
+
+def upgrade() -> None:
+    op.create_index('ix_veiculos_marca_id_ano', 'veiculos', ['marca_id', 'ano'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_veiculos_marca_id_ano', table_name='veiculos')
@@ -0,0 +1,39 @@
+"""indices compostos veiculos
+
+Revision ID: 9c4e7a2b1f63
+Revises: 5d2f8e1c9a47
+Create Date: 2026-10-18 16:05:12.418730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e7a2b1f63'
+down_revision: Union[str, None] = '5d2f8e1c9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Índices guiados pelas consultas da aplicação (ver tests/test_planos_consulta.py):
+# - ix_veiculos_id duplicava a chave primária;
+# - ix_veiculos_marca é prefixo de ix_veiculos_marca_ano, que também cobre GROUP BY marca;
+# - ix_veiculos_created atende a `created >= agora - 7 dias` (/veiculos/recentes/).
+# `vendido = false` (contagem) já é coberto por ix_veiculos_vendido_id, e GROUP BY ano / 10
+# por ix_veiculos_ano.
+
+
+def upgrade() -> None:
+    op.create_index('ix_veiculos_marca_ano', 'veiculos', ['marca', 'ano'], unique=False)
+    op.create_index('ix_veiculos_created', 'veiculos', ['created'], unique=False)
+    op.drop_index('ix_veiculos_marca', table_name='veiculos')
+    op.drop_index('ix_veiculos_id', table_name='veiculos')
+
+
+def downgrade() -> None:
+    op.create_index('ix_veiculos_id', 'veiculos', ['id'], unique=False)
+    op.create_index('ix_veiculos_marca', 'veiculos', ['marca'], unique=False)
+    op.drop_index('ix_veiculos_created', table_name='veiculos')
+    op.drop_index('ix_veiculos_marca_ano', table_name='veiculos')
@@ -0,0 +1,55 @@
+"""create veiculos_estatisticas table
+
+Revision ID: b3a68489ef7e
+Revises: 76d45acbdb0a
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3a68489ef7e'
+down_revision: Union[str, None] = '76d45acbdb0a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    estatisticas = op.create_table('veiculos_estatisticas',
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('chave', sa.String(length=255), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tipo', 'chave')
+    )
+
+    # Carga inicial dos contadores a partir dos veículos existentes
+    veiculos = sa.table('veiculos',
+        sa.column('id', sa.Integer()),
+        sa.column('marca', sa.String()),
+        sa.column('ano', sa.Integer()),
+        sa.column('vendido', sa.Boolean()),
+        sa.column('created', sa.DateTime()),
+    )
+    decada = (veiculos.c.ano // 10) * 10
+    dia = sa.func.date(veiculos.c.created)
+    contagem = sa.func.count(veiculos.c.id)
+    colunas = ['tipo', 'chave', 'quantidade']
+    for consulta in (
+        sa.select(sa.literal('nao_vendidos'), sa.literal(''), contagem)
+            .where(veiculos.c.vendido == sa.false()),
+        sa.select(sa.literal('decada'), sa.cast(decada, sa.String), contagem)
+            .where(veiculos.c.ano.is_not(None)).group_by(decada),
+        sa.select(sa.literal('marca'), veiculos.c.marca, contagem)
+            .where(veiculos.c.marca.is_not(None)).group_by(veiculos.c.marca),
+        sa.select(sa.literal('dia'), sa.cast(dia, sa.String), contagem)
+            .where(veiculos.c.created.is_not(None)).group_by(dia),
+    ):
+        op.execute(sa.insert(estatisticas).from_select(colunas, consulta))
+
+
+def downgrade() -> None:
+    op.drop_table('veiculos_estatisticas')
@@ -0,0 +1,41 @@
+"""recusa marcas fora do catalogo
+
+Revision ID: b6e2f0c4d913
+Revises: 7a1c5e9d2b84
+Create Date: 2026-10-18 23:02:51.418306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2f0c4d913'
+down_revision: Union[str, None] = '7a1c5e9d2b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# O backfill de 4e8b1d6a3c52 deixa sem `marca_id` os veículos cuja marca não está no
+# catálogo, e o filtro por marca (só por `marca_id`) não os encontra mais. Esta revisão
+# não altera o esquema: ela falha enquanto houver veículos assim, listando as marcas.
+# Corrija-os com `python -m scripts.normalizar_marcas` (preenche o `marca_id` das grafias
+# do catálogo e lista as demais, que precisam ser trocadas ou removidas) e rode de novo.
+
+
+def upgrade() -> None:
+    restantes = op.get_bind().execute(sa.text(
+        "SELECT marca, COUNT(*) FROM veiculos WHERE marca_id IS NULL AND marca IS NOT NULL "
+        "GROUP BY marca ORDER BY marca"
+    )).all()
+    if restantes:
+        marcas = ", ".join(f"{marca!r} ({quantidade})" for marca, quantidade in restantes)
+        raise RuntimeError(
+            f"Veículos com marca fora do catálogo: {marcas}. "
+            "Rode `python -m scripts.normalizar_marcas`, corrija ou remova os que restarem e repita a migração."
+        )
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,62 @@
+"""add busca textual veiculos
+
+Revision ID: ce7e65df35c0
+Revises: 180be3572c24
+Create Date: 2026-10-18 11:58:44.918203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ce7e65df35c0'
+down_revision: Union[str, None] = '180be3572c24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cópia dos DDLs de app/models/busca.py no momento desta revisão
+FTS_SQLITE = [
+    """CREATE VIRTUAL TABLE veiculos_busca USING fts5(
+        veiculo, marca, descricao,
+        content='veiculos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER veiculos_busca_ai AFTER INSERT ON veiculos BEGIN
+        INSERT INTO veiculos_busca(rowid, veiculo, marca, descricao)
+        VALUES (new.id, new.veiculo, new.marca, new.descricao);
+    END""",
+    """CREATE TRIGGER veiculos_busca_ad AFTER DELETE ON veiculos BEGIN
+        INSERT INTO veiculos_busca(veiculos_busca, rowid, veiculo, marca, descricao)
+        VALUES ('delete', old.id, old.veiculo, old.marca, old.descricao);
+    END""",
+    """CREATE TRIGGER veiculos_busca_au AFTER UPDATE ON veiculos BEGIN
+        INSERT INTO veiculos_busca(veiculos_busca, rowid, veiculo, marca, descricao)
+        VALUES ('delete', old.id, old.veiculo, old.marca, old.descricao);
+        INSERT INTO veiculos_busca(rowid, veiculo, marca, descricao)
+        VALUES (new.id, new.veiculo, new.marca, new.descricao);
+    END""",
+    # Indexa as linhas já existentes
+    "INSERT INTO veiculos_busca(veiculos_busca) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.create_index('ft_veiculos_busca', 'veiculos', ['veiculo', 'marca', 'descricao'], unique=False, mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        for ddl in FTS_SQLITE:
+            op.execute(ddl)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ft_veiculos_busca', table_name='veiculos')
+    elif dialect == 'sqlite':
+        for trigger in ('veiculos_busca_ai', 'veiculos_busca_ad', 'veiculos_busca_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS veiculos_busca")
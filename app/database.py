@@ -1,23 +1,122 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+# Depois do load_dotenv: app.pool lê a configuração do ambiente ao ser importado
+from app.pool import instrumentar_pool, opcoes_pool
+from app.replicas import RoteadorReplicas, SessaoRoteada, urls_replicas
+
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "3306")
 DB_USER = os.getenv("DB_USER", "tinnova")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "tinnova123")
 DB_NAME = os.getenv("DB_NAME", "tinnova_db")
 
-DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# DATABASE_URL substitui a URL inteira (ex.: sqlite:///./tinnova.db para rodar sem MySQL,
+# em benchmarks ou em uma instalação de um só nó); sem ela, a URL do MySQL é montada
+# com as variáveis DB_*. ASYNC_DATABASE_URL, se não definida, usa o driver assíncrono
+# equivalente (aiomysql/aiosqlite).
+DATABASE_URL = os.getenv("DATABASE_URL") or (
+    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+DRIVERS_ASSINCRONOS = {
+    "mysql+mysqlconnector": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Ajustes aplicados a cada conexão SQLite:
+# - WAL: leituras não bloqueiam a escrita (e vice-versa), essencial com vários workers;
+# - synchronous=NORMAL: seguro com WAL (fsync só nos checkpoints);
+# - busy_timeout: espera o lock de escrita em vez de falhar com "database is locked";
+# - cache de páginas de 64 MiB, temporários em memória e leitura por mmap (256 MiB).
+PRAGMAS_SQLITE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "foreign_keys": "ON",
+    "cache_size": -65536,
+    "temp_store": "MEMORY",
+    "mmap_size": 268435456,
+}
+
+def url_assincrona(url: str) -> str:
+    """URL com o driver assíncrono equivalente ao da URL síncrona (ex.: sqlite -> sqlite+aiosqlite)."""
+    driver, separador, resto = url.partition("://")
+    return DRIVERS_ASSINCRONOS.get(driver, driver) + separador + resto
+
+def argumentos_conexao(url: str) -> dict:
+    """`connect_args` por banco: o SQLite precisa aceitar conexões usadas por outras threads do pool."""
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+def configurar_sqlite(engine: Engine) -> None:
+    """
+    Aplica `PRAGMAS_SQLITE` a cada nova conexão do engine (para um AsyncEngine, passe
+    `async_engine.sync_engine`). Não faz nada em outros bancos.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, valor in PRAGMAS_SQLITE.items():
+            cursor.execute(f"PRAGMA {pragma}={valor}")
+        cursor.close()
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or url_assincrona(DATABASE_URL)
+
+# Réplicas de leitura (URLs síncronas separadas por vírgula; as assíncronas são derivadas).
+# Sem réplicas, todas as sessões usam só o primário. Ver app/replicas.py.
+DATABASE_REPLICA_URLS = urls_replicas(os.getenv("DATABASE_REPLICA_URLS"))
 
-engine = create_engine(
-    DATABASE_URL, pool_pre_ping=True
+# Tamanho, timeout, recycle e validação do pool vêm do ambiente (ver app/pool.py);
+# as métricas de uso de cada pool ficam em GET /api/v1/internal/pool.
+engine = create_engine(DATABASE_URL, connect_args=argumentos_conexao(DATABASE_URL), **opcoes_pool())
+configurar_sqlite(engine)
+metricas_pool = instrumentar_pool(engine)
+
+replica_engines = [
+    create_engine(url, connect_args=argumentos_conexao(url), **opcoes_pool()) for url in DATABASE_REPLICA_URLS
+]
+for replica_engine in replica_engines:
+    configurar_sqlite(replica_engine)
+    instrumentar_pool(replica_engine)
+roteador = RoteadorReplicas(engine, replica_engines)
+
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine, class_=SessaoRoteada, roteador=roteador
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, connect_args=argumentos_conexao(ASYNC_DATABASE_URL), **opcoes_pool(assincrono=True)
+)
+configurar_sqlite(async_engine.sync_engine)
+metricas_pool_async = instrumentar_pool(async_engine.sync_engine)
+
+async_replica_engines = [
+    create_async_engine(url_assincrona(url), connect_args=argumentos_conexao(url), **opcoes_pool(assincrono=True))
+    for url in DATABASE_REPLICA_URLS
+]
+for replica_engine in async_replica_engines:
+    configurar_sqlite(replica_engine.sync_engine)
+    instrumentar_pool(replica_engine.sync_engine)
+roteador_async = RoteadorReplicas(async_engine.sync_engine, [e.sync_engine for e in async_replica_engines])
+
+# expire_on_commit=False evita recarregamentos implícitos (I/O fora de um await)
+# ao acessar atributos de objetos depois do commit.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False,
+    sync_session_class=SessaoRoteada, roteador=roteador_async
+)
 
 def get_db():
     db = SessionLocal()
@@ -26,4 +125,15 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """
+    Fábrica de sessões para respostas em streaming. A sessão de `get_async_db` é fechada
+    antes do envio do corpo da resposta, então o gerador do corpo abre a sua própria.
+    """
+    return AsyncSessionLocal
+
 Base = declarative_base()
@@ -0,0 +1,166 @@
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Instrumentação dos comandos SQL executados pela aplicação.
+#
+# Os eventos before/after_cursor_execute são registrados na classe Engine, valendo para
+# todos os engines (síncronos e o sync_engine dos assíncronos). Cada comando tem a sua
+# duração medida e a sua "impressão digital" (o SQL normalizado, sem valores literais)
+# calculada, e é atribuído à requisição em andamento pelo contexto da requisição
+# (ContextVar definida pelo `MiddlewareConsultasSQL`; a sessão assíncrona executa os
+# comandos em greenlets que herdam esse contexto, e rotas síncronas no threadpool também).
+#
+# - Comandos acima de TINNOVA_SQL_LENTA_MS (padrão 200 ms) são registrados no log
+#   "app.sql" como consulta lenta, com a rota que os executou.
+# - Uma requisição que repete a mesma impressão digital mais de TINNOVA_SQL_REPETICOES_N1
+#   vezes (padrão 10) gera um aviso de possível N+1.
+# - Com TINNOVA_SQL_CABECALHOS=true, as respostas trazem X-Query-Count e X-DB-Time (ms).
+
+LIMITE_CONSULTA_LENTA = float(os.environ.get("TINNOVA_SQL_LENTA_MS", "200")) / 1000
+LIMITE_REPETICOES_N1 = int(os.environ.get("TINNOVA_SQL_REPETICOES_N1", "10"))
+CABECALHOS_SQL = os.environ.get("TINNOVA_SQL_CABECALHOS", "false").lower() in ("1", "true", "sim")
+
+logger = logging.getLogger("app.sql")
+
+class ConsultasExecutadas:
+    """Comandos SQL executados em uma requisição (ou em um bloco `contar_consultas`)."""
+
+    def __init__(self, origem: str = ""):
+        self.origem = origem
+        self.total = 0
+        self.tempo_total = 0.0
+        self.por_impressao: Dict[str, int] = {}
+
+    def registrar(self, impressao: str, segundos: float) -> None:
+        self.total += 1
+        self.tempo_total += segundos
+        self.por_impressao[impressao] = self.por_impressao.get(impressao, 0) + 1
+
+    def repetidas(self, minimo: int) -> Dict[str, int]:
+        """Impressões digitais executadas mais de `minimo` vezes."""
+        return {impressao: total for impressao, total in self.por_impressao.items() if total > minimo}
+
+    def resumo(self) -> str:
+        linhas = [f"{self.total} comandos SQL em {self.tempo_total * 1000:.1f} ms"]
+        linhas += [f"  {total}x {impressao}" for impressao, total in
+                   sorted(self.por_impressao.items(), key=lambda item: -item[1])]
+        return "\n".join(linhas)
+
+consultas_da_requisicao: ContextVar[Optional[ConsultasExecutadas]] = ContextVar("consultas_da_requisicao", default=None)
+
+# Contadores abertos por `contar_consultas`, que recebem todos os comandos de qualquer thread
+_contadores_globais: List[ConsultasExecutadas] = []
+_lock_contadores = threading.Lock()
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_PARAMETROS = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_ESPACOS = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def impressao_digital(sql: str) -> str:
+    """
+    SQL normalizado para agrupar comandos iguais com valores diferentes: literais e
+    marcadores de parâmetro viram "?", listas "IN (?, ?, ...)" viram "(?...)" e os
+    espaços são compactados. Os comandos gerados pelo SQLAlchemy se repetem, daí o cache.
+    """
+    normalizado = _PARAMETROS.sub("?", _LITERAIS.sub("?", sql))
+    normalizado = _LISTAS.sub("(?...)", normalizado)
+    return _ESPACOS.sub(" ", normalizado).strip()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_do_comando(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_comandos", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_do_comando(conn, cursor, statement, parameters, context, executemany):
+    segundos = time.perf_counter() - conn.info["inicio_comandos"].pop()
+    consultas = consultas_da_requisicao.get()
+    if consultas is None and not _contadores_globais and segundos < LIMITE_CONSULTA_LENTA:
+        return
+    impressao = impressao_digital(statement)
+    if consultas is not None:
+        consultas.registrar(impressao, segundos)
+    if _contadores_globais:
+        with _lock_contadores:
+            for contador in _contadores_globais:
+                contador.registrar(impressao, segundos)
+    if segundos >= LIMITE_CONSULTA_LENTA:
+        logger.warning(
+            "Consulta lenta (%.1f ms) em %s: %s",
+            segundos * 1000, consultas.origem if consultas else "-", impressao
+        )
+
+@event.listens_for(Engine, "handle_error")
+def _erro_no_comando(contexto_excecao):
+    # O after_cursor_execute não é chamado quando o comando falha
+    conn = contexto_excecao.connection
+    if conn is not None and conn.info.get("inicio_comandos"):
+        conn.info["inicio_comandos"].pop()
+
+@contextmanager
+def contar_consultas() -> Iterator[ConsultasExecutadas]:
+    """
+    Conta todos os comandos SQL executados enquanto o bloco estiver aberto, em qualquer
+    thread ou requisição. Usado pelos testes e benchmarks para limitar o número de
+    consultas por endpoint.
+    """
+    contador = ConsultasExecutadas("contar_consultas")
+    with _lock_contadores:
+        _contadores_globais.append(contador)
+    try:
+        yield contador
+    finally:
+        with _lock_contadores:
+            _contadores_globais.remove(contador)
+
+class MiddlewareConsultasSQL:
+    """
+    Middleware ASGI que abre um `ConsultasExecutadas` por requisição, avisa sobre
+    possíveis N+1 ao final e, com `cabecalhos` (TINNOVA_SQL_CABECALHOS), adiciona
+    X-Query-Count e X-DB-Time às respostas. Em respostas em streaming, os cabeçalhos
+    refletem só os comandos executados até o início do envio.
+    """
+
+    def __init__(self, app, cabecalhos: Optional[bool] = None):
+        self.app = app
+        self.cabecalhos = cabecalhos
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consultas = ConsultasExecutadas(f"{scope['method']} {scope['path']}")
+        token = consultas_da_requisicao.set(consultas)
+
+        enviar = send
+        if CABECALHOS_SQL if self.cabecalhos is None else self.cabecalhos:
+            async def enviar(mensagem):
+                if mensagem["type"] == "http.response.start":
+                    mensagem["headers"] = list(mensagem.get("headers", [])) + [
+                        (b"x-query-count", str(consultas.total).encode()),
+                        (b"x-db-time", f"{consultas.tempo_total * 1000:.2f}".encode()),
+                    ]
+                await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            consultas_da_requisicao.reset(token)
+            repetidas = consultas.repetidas(LIMITE_REPETICOES_N1)
+            if repetidas:
+                logger.warning(
+                    "Possível N+1 em %s: %s",
+                    consultas.origem, "; ".join(f"{total}x {impressao}" for impressao, total in repetidas.items())
+                )
@@ -1,14 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
 
-from app.routes import veiculo, web as web_routes
+from app.routes import interno, veiculo, web as web_routes
 from app.database import engine, Base
+from app.instrumentacao_sql import MiddlewareConsultasSQL
+from app.metricas import METRICAS_HABILITADAS, MiddlewareMetricas, registro_metricas
+from app.src.estatisticas import verificar_dialeto
 
 # Base.metadata.create_all(bind=engine) # Não usar em produção
 
+# As escritas mantêm os contadores de estatísticas com UPSERT específico de cada banco
+verificar_dialeto(engine.dialect.name)
+
 FRONTEND_PREFIX = "/ui"
 
 app = FastAPI(
@@ -25,9 +31,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "X-Query-Count", "X-DB-Time"],
 )
+# Contagem, duração e log de consultas lentas dos comandos SQL de cada requisição
+# (ver app/instrumentacao_sql.py)
+app.add_middleware(MiddlewareConsultasSQL)
+if METRICAS_HABILITADAS:
+    # Latência, tamanhos e status por rota, expostos em GET /metrics (ver app/metricas.py)
+    app.add_middleware(MiddlewareMetricas)
 
 app.include_router(veiculo.router, prefix="/api/v1")
+app.include_router(interno.router, prefix="/api/v1")
 # Inclui o router da interface web HTMX
 app.include_router(web_routes.web_router, prefix=FRONTEND_PREFIX, tags=["Interface Web"])
 
@@ -74,3 +88,10 @@ async def root():
         "api_redoc": app.redoc_url,
         "frontend_ui": FRONTEND_PREFIX
     }
+
+@app.get("/metrics", include_in_schema=False)
+async def metricas():
+    """
+    Métricas HTTP do processo no formato texto do Prometheus.
+    """
+    return PlainTextResponse(registro_metricas.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,184 @@
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Métricas HTTP da aplicação no formato texto do Prometheus (GET /metrics).
+#
+# O middleware registra, por método e template de rota (ex.: /api/v1/veiculos/{veiculo_id},
+# nunca o caminho com o ID, para manter o número de séries limitado):
+# - histograma de latência, em segundos;
+# - histogramas dos tamanhos do corpo da requisição e da resposta, em bytes;
+# - total de requisições por código de status;
+# e o número de requisições em andamento.
+#
+# Os valores são por processo: com vários workers do uvicorn, cada um expõe os seus e o
+# Prometheus soma as séries. Desative com TINNOVA_METRICAS=false.
+
+METRICAS_HABILITADAS = os.environ.get("TINNOVA_METRICAS", "true").lower() in ("1", "true", "sim")
+
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_TAMANHO = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Rótulo das requisições que não casaram com nenhuma rota (404 de caminhos arbitrários)
+ROTA_NAO_ENCONTRADA = "<sem rota>"
+
+class Histograma:
+    """
+    Histograma com limites fixos. Guarda a contagem por faixa (não cumulativa) e a soma;
+    as contagens cumulativas do formato Prometheus são montadas só na exportação.
+    """
+
+    __slots__ = ("limites", "contagens", "soma")
+
+    def __init__(self, limites: Sequence[float]):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+
+    def cumulativos(self) -> List[Tuple[str, int]]:
+        total, linhas = 0, []
+        for limite, contagem in zip(self.limites, self.contagens):
+            total += contagem
+            linhas.append((_formatar_numero(limite), total))
+        linhas.append(("+Inf", total + self.contagens[-1]))
+        return linhas
+
+class SeriesRota:
+    """Histogramas de latência e tamanhos de uma combinação método + rota."""
+
+    __slots__ = ("latencia", "tamanho_requisicao", "tamanho_resposta")
+
+    def __init__(self):
+        self.latencia = Histograma(BUCKETS_LATENCIA)
+        self.tamanho_requisicao = Histograma(BUCKETS_TAMANHO)
+        self.tamanho_resposta = Histograma(BUCKETS_TAMANHO)
+
+class RegistroMetricas:
+    """
+    Armazena as métricas HTTP do processo. É atualizado apenas no event loop (pelo
+    middleware), por isso não precisa de lock.
+    """
+
+    def __init__(self):
+        self.series: Dict[Tuple[str, str], SeriesRota] = {}
+        self.requisicoes: Dict[Tuple[str, str, str], int] = {}
+        self.em_andamento = 0
+
+    def registrar(self, metodo: str, rota: str, status: int, segundos: float,
+                  bytes_requisicao: int, bytes_resposta: int) -> None:
+        series = self.series.get((metodo, rota))
+        if series is None:
+            series = self.series[(metodo, rota)] = SeriesRota()
+        series.latencia.observar(segundos)
+        series.tamanho_requisicao.observar(bytes_requisicao)
+        series.tamanho_resposta.observar(bytes_resposta)
+        chave = (metodo, rota, str(status))
+        self.requisicoes[chave] = self.requisicoes.get(chave, 0) + 1
+
+    def limpar(self) -> None:
+        self.series.clear()
+        self.requisicoes.clear()
+
+    def exportar(self) -> str:
+        """Métricas no formato texto de exposição do Prometheus (versão 0.0.4)."""
+        linhas = [
+            "# HELP tinnova_http_requests_total Total de requisições HTTP por método, rota e status.",
+            "# TYPE tinnova_http_requests_total counter",
+        ]
+        for (metodo, rota, status), total in sorted(self.requisicoes.items()):
+            linhas.append(f'tinnova_http_requests_total{{method="{metodo}",route="{_escapar(rota)}",status="{status}"}} {total}')
+        linhas += [
+            "# HELP tinnova_http_requests_in_progress Requisições HTTP em andamento.",
+            "# TYPE tinnova_http_requests_in_progress gauge",
+            f"tinnova_http_requests_in_progress {self.em_andamento}",
+        ]
+        for nome, atributo, descricao in (
+            ("tinnova_http_request_duration_seconds", "latencia", "Latência das requisições HTTP, em segundos."),
+            ("tinnova_http_request_size_bytes", "tamanho_requisicao", "Tamanho do corpo das requisições HTTP, em bytes."),
+            ("tinnova_http_response_size_bytes", "tamanho_resposta", "Tamanho do corpo das respostas HTTP, em bytes."),
+        ):
+            linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} histogram"]
+            for (metodo, rota), series in sorted(self.series.items()):
+                histograma = getattr(series, atributo)
+                rotulos = f'method="{metodo}",route="{_escapar(rota)}"'
+                for limite, total in histograma.cumulativos():
+                    linhas.append(f'{nome}_bucket{{{rotulos},le="{limite}"}} {total}')
+                linhas.append(f"{nome}_sum{{{rotulos}}} {_formatar_numero(histograma.soma)}")
+                linhas.append(f"{nome}_count{{{rotulos}}} {sum(histograma.contagens)}")
+        return "\n".join(linhas) + "\n"
+
+def _formatar_numero(valor: float) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+registro_metricas = RegistroMetricas()
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI (sem BaseHTTPMiddleware, que custa uma task e uma fila por requisição
+    e bufferiza respostas em streaming) que alimenta o `RegistroMetricas`.
+
+    O template da rota só é conhecido depois do roteamento: o APIRoute do FastAPI grava a
+    rota em `scope["route"]`, que é lida quando a resposta termina. O tamanho da
+    requisição vem do Content-Length; sem ele (chunked), os pedaços do corpo são somados.
+    """
+
+    def __init__(self, app, registro: RegistroMetricas = registro_metricas):
+        self.app = app
+        self.registro = registro
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registro = self.registro
+        status = 500
+        bytes_resposta = 0
+        bytes_requisicao = 0
+        content_length = None
+        for nome, valor in scope["headers"]:
+            if nome == b"content-length":
+                content_length = int(valor) if valor.isdigit() else 0
+                break
+
+        async def send_medido(mensagem):
+            nonlocal status, bytes_resposta
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            elif mensagem["type"] == "http.response.body":
+                bytes_resposta += len(mensagem.get("body", b""))
+            await send(mensagem)
+
+        receive_medido = receive
+        if content_length is None:
+            async def receive_medido():
+                nonlocal bytes_requisicao
+                mensagem = await receive()
+                if mensagem["type"] == "http.request":
+                    bytes_requisicao += len(mensagem.get("body", b""))
+                return mensagem
+
+        registro.em_andamento += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive_medido, send_medido)
+        finally:
+            segundos = time.perf_counter() - inicio
+            registro.em_andamento -= 1
+            rota = scope.get("route")
+            registro.registrar(
+                scope["method"],
+                getattr(rota, "path_format", None) or getattr(rota, "path", None) or ROTA_NAO_ENCONTRADA,
+                status,
+                segundos,
+                content_length if content_length is not None else bytes_requisicao,
+                bytes_resposta,
+            )
@@ -0,0 +1,46 @@
+from sqlalchemy import DDL, event
+
+from app.models.veiculo import Veiculo
+
+# Índices de busca textual sobre (veiculo, marca, descricao), criados junto com a
+# tabela `veiculos` pelo metadata.create_all. Em bancos gerenciados pelo Alembic,
+# a migração correspondente cria os mesmos objetos.
+#
+# - MySQL: índice FULLTEXT, consultado com MATCH ... AGAINST em modo booleano.
+# - SQLite: tabela virtual FTS5 com conteúdo externo (`veiculos`), mantida por triggers.
+
+TABELA_BUSCA_SQLITE = "veiculos_busca"
+
+DDL_FULLTEXT_MYSQL = (
+    "ALTER TABLE veiculos ADD FULLTEXT INDEX ft_veiculos_busca (veiculo, marca, descricao)"
+)
+
+DDL_FTS_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA_SQLITE} USING fts5(
+        veiculo, marca, descricao,
+        content='veiculos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS veiculos_busca_ai AFTER INSERT ON veiculos BEGIN
+        INSERT INTO {TABELA_BUSCA_SQLITE}(rowid, veiculo, marca, descricao)
+        VALUES (new.id, new.veiculo, new.marca, new.descricao);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS veiculos_busca_ad AFTER DELETE ON veiculos BEGIN
+        INSERT INTO {TABELA_BUSCA_SQLITE}({TABELA_BUSCA_SQLITE}, rowid, veiculo, marca, descricao)
+        VALUES ('delete', old.id, old.veiculo, old.marca, old.descricao);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS veiculos_busca_au AFTER UPDATE ON veiculos BEGIN
+        INSERT INTO {TABELA_BUSCA_SQLITE}({TABELA_BUSCA_SQLITE}, rowid, veiculo, marca, descricao)
+        VALUES ('delete', old.id, old.veiculo, old.marca, old.descricao);
+        INSERT INTO {TABELA_BUSCA_SQLITE}(rowid, veiculo, marca, descricao)
+        VALUES (new.id, new.veiculo, new.marca, new.descricao);
+    END""",
+]
+
+event.listen(Veiculo.__table__, "after_create", DDL(DDL_FULLTEXT_MYSQL).execute_if(dialect="mysql"))
+for ddl in DDL_FTS_SQLITE:
+    event.listen(Veiculo.__table__, "after_create", DDL(ddl).execute_if(dialect="sqlite"))
+event.listen(
+    Veiculo.__table__, "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {TABELA_BUSCA_SQLITE}").execute_if(dialect="sqlite")
+)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String
+
+from app.models.veiculo import Base
+
+class EstatisticaVeiculo(Base):
+    """
+    Contadores das estatísticas de veículos, mantidos incrementalmente a cada escrita.
+
+    Cada linha é um contador identificado por (tipo, chave):
+    - ("nao_vendidos", ""): total de veículos não vendidos;
+    - ("decada", "1990"): veículos fabricados na década;
+    - ("marca", "Ford"): veículos da marca;
+    - ("dia", "2025-05-28"): veículos cadastrados no dia (UTC);
+    - ("versao", ""): número de escritas, usado como versão dos dados (ETag das listagens).
+    """
+    __tablename__ = "veiculos_estatisticas"
+
+    tipo = Column(String(20), primary_key=True)
+    chave = Column(String(255), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
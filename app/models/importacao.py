@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from datetime import datetime, UTC
+
+from app.models.veiculo import Base
+
+class ImportacaoVeiculos(Base):
+    """
+    Checkpoint de uma importação de veículos a partir de arquivo (CSV ou NDJSON).
+
+    `registros_processados` é atualizado na mesma transação que grava cada lote de
+    veículos, então uma importação interrompida pode ser retomada exatamente do
+    primeiro registro não gravado.
+    """
+    __tablename__ = "veiculos_importacoes"
+
+    id = Column(Integer, primary_key=True)
+    arquivo = Column(String(255), nullable=False)
+    formato = Column(String(10), nullable=False)
+    registros_processados = Column(Integer, nullable=False, default=0)
+    inseridos = Column(Integer, nullable=False, default=0)
+    rejeitados = Column(Integer, nullable=False, default=0)
+    concluida = Column(Boolean, nullable=False, default=False)
+    created = Column(DateTime, default=lambda: datetime.now(UTC))
+    updated = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
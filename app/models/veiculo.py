@@ -1,17 +1,56 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, DateTime, ForeignKey, Index, event
+from sqlalchemy.orm import declarative_base, validates
 from datetime import datetime, UTC
 
+from app.src.marcas import MARCAS, colunas_marca
+
 Base = declarative_base()
 
+class Marca(Base):
+    """Dimensão das marcas (catálogo fixo de app/src/marcas.py), referenciada por veiculos.marca_id."""
+    __tablename__ = "marcas"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    nome = Column(String(64), nullable=False, unique=True)
+
+@event.listens_for(Marca.__table__, "after_create")
+def _popular_marcas(target, connection, **kw):
+    # Tabelas criadas pelo metadata (testes, benchmarks); em produção, pela migração
+    connection.execute(target.insert(), [{"id": marca_id, "nome": nome} for marca_id, nome in MARCAS])
+
 class Veiculo(Base):
     __tablename__ = "veiculos"
+    __table_args__ = (
+        # Atende ao filtro `vendido` com ordenação/cursor por ID (ex.: /veiculos/nao-vendidos/)
+        # e cobre a contagem de não vendidos
+        Index("ix_veiculos_vendido_id", "vendido", "id"),
+        # Veículos recentes (created >= agora - 7 dias) e buckets diários das estatísticas
+        Index("ix_veiculos_created", "created"),
+        # Filtro por marca e ano juntos, já na ordem do ID (a chave primária completa o índice)
+        Index("ix_veiculos_marca_id_ano", "marca_id", "ano"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Sem índice extra em `id`: a chave primária já é indexada
+    id = Column(Integer, primary_key=True)
     veiculo = Column(String(255), index=True)
-    marca = Column(String(255), index=True)
+    # Nome canônico da marca, mantido na linha para a busca textual e para as respostas
+    # sem JOIN; filtros e agrupamentos usam `marca_id`
+    marca = Column(String(255))
+    # ix_veiculos_marca_id: filtro só por marca já na ordem do ID (em ix_veiculos_marca_id_ano
+    # a ordem seria por ano) e GROUP BY marca só no índice, com 2 bytes por linha
+    marca_id = Column(SmallInteger, ForeignKey("marcas.id", name="fk_veiculos_marca_id"), nullable=True, index=True)
+    # ix_veiculos_ano: filtro por ano com ordenação por ID e GROUP BY década (ano / 10)
     ano = Column(Integer, index=True)
-    descricao = Column(String(255), nullable=True)
+    descricao = Column(String(255), nullable=True, index=True)
     vendido = Column(Boolean, default=False)
-    created = Column(DateTime, default=datetime.now(UTC))
-    updated = Column(DateTime, default=datetime.now(UTC), onupdate=datetime.now(UTC))
+    # Defaults como callables: avaliados a cada INSERT/UPDATE, e não uma única vez na importação
+    created = Column(DateTime, default=lambda: datetime.now(UTC))
+    updated = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+
+    @validates("marca")
+    def _normalizar_marca(self, chave, marca):
+        # Toda atribuição de `marca` pelo ORM grava o nome canônico e o `marca_id`;
+        # as escritas em lote (Core) usam `colunas_marca` diretamente
+        colunas = colunas_marca(marca)
+        self.marca_id = colunas["marca_id"]
+        return colunas["marca"]
@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Configuração e instrumentação do pool de conexões dos engines de app.database.
+#
+# Os parâmetros vêm do ambiente e valem por processo: com N workers do uvicorn, o banco
+# recebe até N * (POOL_SIZE + MAX_OVERFLOW) conexões de cada engine.
+#
+# A validação das conexões pode ser feita de três formas (TINNOVA_DB_POOL_VALIDACAO):
+# - "pre_ping" (padrão): um ping a cada checkout, que custa uma ida ao banco por requisição;
+# - "periodica": ping no checkout apenas se a conexão não foi usada/validada há mais de
+#   TINNOVA_DB_POOL_VALIDACAO_INTERVALO segundos (conexões quentes saem sem ida extra);
+# - "nenhuma": confia em POOL_RECYCLE para descartar conexões antes do wait_timeout do MySQL.
+
+POOL_SIZE = int(os.environ.get("TINNOVA_DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.environ.get("TINNOVA_DB_POOL_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.environ.get("TINNOVA_DB_POOL_TIMEOUT", "30"))
+# Abaixo do wait_timeout padrão do MySQL (8 h), para não entregar conexões já fechadas pelo servidor
+POOL_RECYCLE = int(os.environ.get("TINNOVA_DB_POOL_RECYCLE", "3600"))
+# LIFO reutiliza sempre as conexões mais recentes; as ociosas expiram pelo recycle
+POOL_LIFO = os.environ.get("TINNOVA_DB_POOL_LIFO", "false").lower() in ("1", "true", "sim")
+POOL_VALIDACAO = os.environ.get("TINNOVA_DB_POOL_VALIDACAO", "pre_ping")
+POOL_VALIDACAO_INTERVALO = float(os.environ.get("TINNOVA_DB_POOL_VALIDACAO_INTERVALO", "30"))
+
+MODOS_VALIDACAO = ("pre_ping", "periodica", "nenhuma")
+
+# Esperas acima deste limite contam como checkout que aguardou uma conexão livre
+LIMITE_ESPERA_SEGUNDOS = 0.001
+
+class MetricasPool:
+    """
+    Contadores de uso de um pool de conexões, alimentados pelos eventos do pool e pela
+    medição do tempo de checkout (`_ComMedicaoDeEspera`). Seguro entre threads.
+    """
+
+    def __init__(self, configuracao: Dict[str, Any]):
+        self.configuracao = configuracao
+        self._lock = threading.Lock()
+        self.conexoes_abertas = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checkouts_em_overflow = 0
+        self.pico_em_uso = 0
+        self.aguardando = 0
+        self.checkouts_com_espera = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.timeouts = 0
+        self.invalidacoes = 0
+        self.validacoes = 0
+        self.validacoes_falhas = 0
+
+    def inicio_espera(self) -> None:
+        with self._lock:
+            self.aguardando += 1
+
+    def fim_espera(self, segundos: float, timeout: bool = False) -> None:
+        with self._lock:
+            self.aguardando -= 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            if segundos > LIMITE_ESPERA_SEGUNDOS:
+                self.checkouts_com_espera += 1
+            if timeout:
+                self.timeouts += 1
+
+    def registrar_checkout(self, em_uso: int, tamanho: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.pico_em_uso = max(self.pico_em_uso, em_uso)
+            if em_uso > tamanho:
+                self.checkouts_em_overflow += 1
+
+    def incrementar(self, contador: str) -> None:
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def como_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "conexoes_abertas": self.conexoes_abertas,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checkouts_em_overflow": self.checkouts_em_overflow,
+                "pico_em_uso": self.pico_em_uso,
+                "aguardando": self.aguardando,
+                "checkouts_com_espera": self.checkouts_com_espera,
+                "espera_media_ms": round(self.espera_total / self.checkouts * 1000, 3) if self.checkouts else None,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+                "timeouts": self.timeouts,
+                "invalidacoes": self.invalidacoes,
+                "validacoes": self.validacoes,
+                "validacoes_falhas": self.validacoes_falhas,
+            }
+
+class _ComMedicaoDeEspera:
+    """
+    Mede o tempo de cada checkout (espera por uma conexão livre, abertura de conexões
+    novas e validação) e conta os timeouts. As métricas são atribuídas depois da criação
+    do engine (`instrumentar_pool`) e passadas adiante quando o pool é recriado.
+    """
+
+    metricas: MetricasPool = None
+
+    def connect(self):
+        if self.metricas is None:
+            return super().connect()
+        self.metricas.inicio_espera()
+        inicio = time.perf_counter()
+        try:
+            conexao = super().connect()
+        except exc.TimeoutError:
+            self.metricas.fim_espera(time.perf_counter() - inicio, timeout=True)
+            raise
+        except Exception:
+            self.metricas.fim_espera(time.perf_counter() - inicio)
+            raise
+        self.metricas.fim_espera(time.perf_counter() - inicio)
+        return conexao
+
+    def recreate(self):
+        novo = super().recreate()
+        novo.metricas = self.metricas
+        return novo
+
+class PoolInstrumentado(_ComMedicaoDeEspera, QueuePool):
+    pass
+
+class PoolAssincronoInstrumentado(_ComMedicaoDeEspera, AsyncAdaptedQueuePool):
+    pass
+
+def opcoes_pool(assincrono: bool = False, **sobrescritas) -> Dict[str, Any]:
+    """
+    Argumentos de `create_engine`/`create_async_engine` para o pool, a partir da
+    configuração do ambiente (valores em `sobrescritas` têm precedência).
+    """
+    opcoes = {
+        "poolclass": PoolAssincronoInstrumentado if assincrono else PoolInstrumentado,
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_use_lifo": POOL_LIFO,
+        "pool_pre_ping": POOL_VALIDACAO == "pre_ping",
+    }
+    opcoes.update(sobrescritas)
+    return opcoes
+
+def instrumentar_pool(
+    engine: Engine,
+    validacao: str = POOL_VALIDACAO,
+    intervalo_validacao: float = POOL_VALIDACAO_INTERVALO
+) -> MetricasPool:
+    """
+    Registra os eventos de métricas no pool do engine (para um AsyncEngine, passe
+    `async_engine.sync_engine`) e, com `validacao="periodica"`, o ping das conexões
+    ociosas há mais de `intervalo_validacao` segundos. Retorna as métricas do pool.
+    """
+    if validacao not in MODOS_VALIDACAO:
+        raise ValueError(f"Validação de pool inválida: {validacao}. Use um de: {', '.join(MODOS_VALIDACAO)}")
+    pool = engine.pool
+    metricas = MetricasPool({
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "timeout_segundos": pool.timeout(),
+        "recycle_segundos": pool._recycle,
+        "lifo": pool._pool.use_lifo,
+        "validacao": validacao,
+        "intervalo_validacao_segundos": intervalo_validacao if validacao == "periodica" else None,
+    })
+    pool.metricas = metricas
+
+    @event.listens_for(pool, "connect")
+    def _ao_conectar(dbapi_connection, connection_record):
+        metricas.incrementar("conexoes_abertas")
+        connection_record.info["validada_em"] = time.monotonic()
+
+    @event.listens_for(pool, "checkout")
+    def _ao_retirar(dbapi_connection, connection_record, connection_proxy):
+        if validacao == "periodica":
+            agora = time.monotonic()
+            if agora - connection_record.info.get("validada_em", 0) > intervalo_validacao:
+                metricas.incrementar("validacoes")
+                try:
+                    engine.dialect.do_ping(dbapi_connection)
+                except Exception:
+                    metricas.incrementar("validacoes_falhas")
+                    # O pool descarta a conexão e tenta o checkout com uma nova
+                    raise exc.DisconnectionError()
+                connection_record.info["validada_em"] = agora
+        metricas.registrar_checkout(engine.pool.checkedout(), engine.pool.size())
+
+    @event.listens_for(pool, "checkin")
+    def _ao_devolver(dbapi_connection, connection_record):
+        metricas.incrementar("checkins")
+        # Uma conexão que acabou de ser usada sem erro está viva
+        if connection_record is not None:
+            connection_record.info["validada_em"] = time.monotonic()
+
+    @event.listens_for(pool, "invalidate")
+    def _ao_invalidar(dbapi_connection, connection_record, exception):
+        metricas.incrementar("invalidacoes")
+
+    return metricas
+
+def estado_pool(engine: Engine) -> Dict[str, Any]:
+    """
+    Configuração, estado atual (conexões em uso, ociosas e em overflow) e contadores
+    do pool de um engine instrumentado por `instrumentar_pool`.
+    """
+    pool = engine.pool
+    metricas = getattr(pool, "metricas", None)
+    return {
+        "configuracao": metricas.configuracao if metricas else None,
+        "estado": {
+            "em_uso": pool.checkedout(),
+            "ociosas": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        },
+        "metricas": metricas.como_dict() if metricas else None,
+    }
@@ -0,0 +1,165 @@
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import CompoundSelect, Select, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Roteamento das leituras para réplicas do banco.
+#
+# As sessões da aplicação são `SessaoRoteada`: cada comando é enviado ao primário ou a uma
+# réplica conforme o tipo. Vão para o primário:
+# - escritas (INSERT/UPDATE/DELETE, flush do ORM), SELECT ... FOR UPDATE e SQL textual;
+# - qualquer comando de uma sessão que já escreveu (ler o que acabou de gravar, como o
+#   refresh depois do create) ou que foi marcada com `usar_primario` (fluxos de escrita
+#   que leem antes de gravar, como o update);
+# - as leituras de sessões abertas até TINNOVA_DB_REPLICA_ATRASO_MAXIMO segundos (padrão 1)
+#   depois da última escrita do processo, para que uma requisição logo após um POST/PUT
+#   não leia uma réplica atrasada (nem repopule o cache com dados antigos).
+#
+# As demais leituras vão para uma réplica escolhida em rodízio entre as saudáveis, fixada
+# na sessão (uma requisição lê sempre da mesma réplica: a versão dos dados e a página de
+# uma listagem são consistentes entre si). Uma réplica cuja conexão falha fica fora do
+# rodízio por TINNOVA_DB_REPLICA_QUARENTENA segundos (padrão 30); sem réplicas saudáveis,
+# as leituras vão para o primário. As réplicas são configuradas em DATABASE_REPLICA_URLS
+# (URLs separadas por vírgula; ver app/database.py).
+
+ATRASO_MAXIMO_REPLICA = float(os.environ.get("TINNOVA_DB_REPLICA_ATRASO_MAXIMO", "1"))
+QUARENTENA_REPLICA = float(os.environ.get("TINNOVA_DB_REPLICA_QUARENTENA", "30"))
+
+# Chaves em `Session.info`
+_PRIMARIO = "roteamento_primario"
+_REPLICA = "roteamento_replica"
+
+def urls_replicas(valor: Optional[str]) -> List[str]:
+    """URLs das réplicas a partir de uma lista separada por vírgulas (vazia se não houver)."""
+    return [url.strip() for url in (valor or "").split(",") if url.strip()]
+
+class Replica:
+    """Engine de uma réplica e o seu estado no rodízio."""
+
+    __slots__ = ("engine", "fora_ate", "leituras", "falhas")
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.fora_ate = 0.0
+        self.leituras = 0
+        self.falhas = 0
+
+    def saudavel(self, agora: float) -> bool:
+        return agora >= self.fora_ate
+
+class RoteadorReplicas:
+    """
+    Escolhe o engine das leituras: o primário ou uma das réplicas saudáveis, em rodízio.
+    Falhas de conexão de uma réplica (detectadas pelo evento handle_error do engine) a
+    tiram do rodízio pelo tempo de quarentena; passado esse tempo, ela volta a receber
+    leituras e, se falhar de novo, volta para a quarentena.
+    """
+
+    def __init__(
+        self,
+        primario: Engine,
+        replicas: Sequence[Engine] = (),
+        quarentena: float = QUARENTENA_REPLICA,
+        atraso_maximo: float = ATRASO_MAXIMO_REPLICA,
+    ):
+        self.primario = primario
+        self.replicas = [Replica(engine) for engine in replicas]
+        self.quarentena = quarentena
+        self.atraso_maximo = atraso_maximo
+        self.ultima_escrita = float("-inf")
+        self.leituras_primario = 0
+        self._rodizio = itertools.count()
+        self._lock = threading.Lock()
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._erro_na_replica(replica))
+
+    def _erro_na_replica(self, replica: Replica):
+        def marcar(contexto_excecao):
+            # Conexão recusada/perdida: sem conexão aberta (falha no connect) ou desconexão
+            if contexto_excecao.connection is None or contexto_excecao.is_disconnect:
+                self.marcar_falha(replica.engine)
+        return marcar
+
+    def marcar_falha(self, engine: Engine) -> None:
+        """Tira a réplica de `engine` do rodízio pelo tempo de quarentena."""
+        for replica in self.replicas:
+            if replica.engine is engine:
+                with self._lock:
+                    replica.falhas += 1
+                    replica.fora_ate = time.monotonic() + self.quarentena
+
+    def registrar_escrita(self) -> None:
+        self.ultima_escrita = time.monotonic()
+
+    def escolher(self) -> Engine:
+        """Engine para as leituras de uma nova sessão."""
+        agora = time.monotonic()
+        if self.replicas and agora - self.ultima_escrita >= self.atraso_maximo:
+            inicio = next(self._rodizio)
+            for deslocamento in range(len(self.replicas)):
+                replica = self.replicas[(inicio + deslocamento) % len(self.replicas)]
+                if replica.saudavel(agora):
+                    replica.leituras += 1
+                    return replica.engine
+        self.leituras_primario += 1
+        return self.primario
+
+    def estado(self) -> Dict[str, Any]:
+        agora = time.monotonic()
+        return {
+            "leituras_primario": self.leituras_primario,
+            "replicas": [
+                {
+                    "url": replica.engine.url.render_as_string(hide_password=True),
+                    "saudavel": replica.saudavel(agora),
+                    "volta_em_segundos": round(max(replica.fora_ate - agora, 0.0), 1),
+                    "leituras": replica.leituras,
+                    "falhas": replica.falhas,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+def _somente_leitura(clause) -> bool:
+    return isinstance(clause, (Select, CompoundSelect)) and getattr(clause, "_for_update_arg", None) is None
+
+class SessaoRoteada(Session):
+    """
+    Session que envia as leituras para as réplicas de `roteador` (ver o início do módulo).
+    Para a AsyncSession, é usada como `sync_session_class`. Sem `roteador`, se comporta
+    como uma Session comum.
+    """
+
+    def __init__(self, *args, roteador: Optional[RoteadorReplicas] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.roteador = roteador
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        roteador = self.roteador
+        if roteador is None:
+            return super().get_bind(mapper, clause, **kwargs)
+        if self._flushing or (clause is not None and not _somente_leitura(clause)):
+            self.info[_PRIMARIO] = True
+            roteador.registrar_escrita()
+            return roteador.primario
+        # clause None: pedido de conexão sem comando (Session.connection(), nome do dialeto)
+        if clause is None or self.info.get(_PRIMARIO):
+            return roteador.primario
+        engine = self.info.get(_REPLICA)
+        if engine is None:
+            engine = self.info[_REPLICA] = roteador.escolher()
+        return engine
+
+def usar_primario(db) -> None:
+    """
+    Envia todos os comandos seguintes da sessão (Session ou AsyncSession) ao primário.
+    Chamada no início dos fluxos de escrita, cujas leituras precisam ver o estado atual.
+    """
+    sessao = db.sync_session if isinstance(db, AsyncSession) else db
+    sessao.info[_PRIMARIO] = True
@@ -0,0 +1,72 @@
+import hashlib
+import json
+from datetime import datetime, UTC
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+# Suporte a GET condicional (ETag / Last-Modified) nas rotas de leitura da API.
+# Com `Cache-Control: no-cache` o cliente guarda a resposta, mas sempre revalida; se
+# nada mudou, a rota responde 304 sem montar nem serializar o corpo.
+
+def calcular_etag(*partes: Any, fraca: bool = False) -> str:
+    """ETag a partir de valores que identificam a versão da representação."""
+    resumo = hashlib.sha1(json.dumps(partes, default=str, sort_keys=True).encode()).hexdigest()[:20]
+    return f'W/"{resumo}"' if fraca else f'"{resumo}"'
+
+def formatar_data_http(momento: datetime) -> str:
+    """Data no formato HTTP (RFC 9110). Datas sem fuso são tratadas como UTC."""
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=UTC)
+    return format_datetime(momento.astimezone(UTC), usegmt=True)
+
+def cabecalhos_cache(etag: str, ultima_modificacao: Optional[datetime] = None) -> Dict[str, str]:
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache"}
+    if ultima_modificacao is not None:
+        cabecalhos["Last-Modified"] = formatar_data_http(ultima_modificacao)
+    return cabecalhos
+
+def _sem_prefixo_fraco(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+def etag_corresponde(request: Request, etag: str) -> bool:
+    """Comparação fraca entre o If-None-Match da requisição e a ETag atual."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    atual = _sem_prefixo_fraco(etag)
+    return any(_sem_prefixo_fraco(candidata.strip()) == atual for candidata in if_none_match.split(","))
+
+def nao_modificado_desde(request: Request, ultima_modificacao: Optional[datetime]) -> bool:
+    """
+    Avalia If-Modified-Since, que só é considerado quando a requisição não traz If-None-Match.
+    A comparação é feita em segundos inteiros, a resolução das datas HTTP.
+    """
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or ultima_modificacao is None or "if-none-match" in request.headers:
+        return False
+    try:
+        desde = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if desde.tzinfo is None:
+        desde = desde.replace(tzinfo=UTC)
+    if ultima_modificacao.tzinfo is None:
+        ultima_modificacao = ultima_modificacao.replace(tzinfo=UTC)
+    return ultima_modificacao.replace(microsecond=0) <= desde
+
+def responder_se_nao_modificado(
+    request: Request,
+    etag: str,
+    ultima_modificacao: Optional[datetime] = None
+) -> Optional[Response]:
+    """
+    Retorna uma resposta 304 (só com os cabeçalhos de validação) se a representação que
+    o cliente já tem continua atual, ou None para que a rota monte a resposta completa.
+    """
+    if etag_corresponde(request, etag) or nao_modificado_desde(request, ultima_modificacao):
+        return Response(status_code=304, headers=cabecalhos_cache(etag, ultima_modificacao))
+    return None
@@ -0,0 +1,113 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+
+from app.database import async_engine, engine, roteador, roteador_async
+from app.pool import estado_pool
+from app.routes.veiculo import get_veiculo_service
+from app.services.cache import CacheBackend, get_cache_fragmentos, get_cache_veiculos, versao_veiculos
+from app.services.eventos import HubEventos, get_hub_eventos
+from app.services.veiculo_async import AsyncVeiculoService
+
+# Rotas internas de operação (métricas), fora da API pública de veículos.
+# Em produção, restrinja o acesso a /api/v1/internal no proxy reverso.
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["interno"],
+)
+
+@router.get("/cache", response_model=Dict[str, Any],
+    summary="Métricas do cache de veículos",
+    response_description="Contadores de uso do cache"
+)
+async def metricas_cache(cache: CacheBackend = Depends(get_cache_veiculos)):
+    """
+    **Métricas do Cache de Veículos**
+
+    Retorna os contadores do cache de leitura de `GET /veiculos/{id}`: itens em cache,
+    acertos, falhas, taxa de acerto, remoções por limite de tamanho (LRU), expirações (TTL)
+    e invalidações por escrita. Os contadores são por processo.
+    """
+    return cache.metricas()
+
+
+@router.get("/cache/fragmentos", response_model=Dict[str, Any],
+    summary="Métricas do cache de fragmentos da interface web",
+    response_description="Contadores de uso do cache de fragmentos"
+)
+async def metricas_cache_fragmentos(
+    cache: CacheBackend = Depends(get_cache_fragmentos),
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
+):
+    """
+    **Métricas do Cache de Fragmentos**
+
+    Retorna os contadores do cache de fragmentos HTML renderizados (lista e estatísticas
+    da interface web) e as versões dos dados:
+
+    - `versao_dados`: a versão no banco, incrementada na transação de cada escrita e
+      compartilhada entre os workers; é a que entra nas chaves do cache de fragmentos.
+    - `versao_local`: o contador do processo (`versao_veiculos`), incrementado pelas
+      escritas atendidas por este worker; usado pelo cache de facetas da API e pelos
+      fragmentos no modo `http`.
+    """
+    return {
+        **cache.metricas(),
+        "versao_dados": await service.obter_versao_dados(),
+        "versao_local": versao_veiculos.valor,
+    }
+
+
+@router.get("/pool", response_model=Dict[str, Any],
+    summary="Métricas dos pools de conexões com o banco",
+    response_description="Configuração, estado e contadores de cada pool"
+)
+async def metricas_pool():
+    """
+    **Métricas dos Pools de Conexões**
+
+    Para o engine assíncrono (rotas da API e interface web) e o síncrono (scripts),
+    retorna a configuração do pool (tamanho, overflow, timeout, recycle, LIFO e modo de
+    validação), o estado atual (conexões em uso, ociosas e em overflow) e os contadores
+    desde o início do processo: conexões abertas, checkouts, checkouts em overflow, pico
+    de conexões em uso, requisições aguardando uma conexão, tempo de espera no checkout,
+    timeouts, invalidações e validações periódicas. Os valores são por processo (worker).
+    """
+    return {
+        "assincrono": estado_pool(async_engine.sync_engine),
+        "sincrono": estado_pool(engine),
+    }
+
+
+@router.get("/replicas", response_model=Dict[str, Any],
+    summary="Estado do roteamento de leituras para as réplicas",
+    response_description="Leituras e saúde de cada réplica"
+)
+async def estado_replicas():
+    """
+    **Roteamento para Réplicas**
+
+    Para as sessões assíncronas (rotas da API e interface web) e síncronas (importação e
+    scripts), retorna quantas sessões leram do primário e, por réplica (de
+    `DATABASE_REPLICA_URLS`), se está no rodízio, quanto falta para sair da quarentena,
+    quantas sessões leram dela e quantas falhas de conexão teve. Os valores são por processo.
+    """
+    return {
+        "assincrono": roteador_async.estado(),
+        "sincrono": roteador.estado(),
+    }
+
+
+@router.get("/eventos", response_model=Dict[str, Any],
+    summary="Métricas do hub de eventos (SSE)",
+    response_description="Conexões abertas e eventos publicados"
+)
+async def metricas_eventos(hub: HubEventos = Depends(get_hub_eventos)):
+    """
+    **Métricas do Hub de Eventos**
+
+    Retorna o número de conexões SSE abertas (`/api/v1/veiculos/stream` e `/ui/stream`), os
+    eventos publicados pelas escritas e os descartados por conexões que não acompanharam o
+    ritmo (que recebem um evento `recarregar`). Os valores são por processo.
+    """
+    return hub.metricas()
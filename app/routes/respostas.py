@@ -0,0 +1,54 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from app.schemas.veiculo import Veiculo
+
+# Respostas JSON das rotas de veículos montadas direto em bytes.
+#
+# O serviço já entrega schemas `Veiculo` validados (model_validate das linhas do ORM).
+# Retornando esses objetos, o FastAPI validaria tudo de novo contra o `response_model`,
+# converteria com `jsonable_encoder` e só então chamaria `json.dumps`. Com um Response
+# pronto, o FastAPI não reprocessa o conteúdo, e o `TypeAdapter` serializa a lista
+# inteira em uma passada no pydantic-core. O `response_model` continua declarado nas
+# rotas e segue valendo para o esquema OpenAPI.
+
+ADAPTADOR_VEICULO = TypeAdapter(Veiculo)
+ADAPTADOR_LISTA_VEICULOS = TypeAdapter(List[Veiculo])
+
+def resposta_json(
+    conteudo: bytes,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    return Response(content=conteudo, status_code=status_code, headers=headers, media_type="application/json")
+
+def resposta_veiculo(
+    veiculo: Veiculo,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """Resposta com um veículo já validado, serializado uma única vez."""
+    return resposta_json(ADAPTADOR_VEICULO.dump_json(veiculo), status_code, headers)
+
+def resposta_lista_veiculos(
+    veiculos: List[Veiculo],
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """Resposta com uma lista de veículos já validados, serializada em uma única passada."""
+    return resposta_json(ADAPTADOR_LISTA_VEICULOS.dump_json(veiculos), headers=headers)
+
+def resposta_listagem(
+    veiculos: List[Any],
+    campos: Optional[Sequence[str]] = None,
+    headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """
+    Resposta de uma listagem: veículos completos ou, com `campos` (fields=), os
+    dicionários parciais lidos do banco, serializados direto pelo pydantic-core.
+    """
+    if campos:
+        return resposta_json(to_json(veiculos), headers=headers)
+    return resposta_lista_veiculos(veiculos, headers)
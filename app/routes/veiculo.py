@@ -1,14 +1,30 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+from datetime import datetime, UTC
+from typing import Any, List, Literal, Optional
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.services.veiculo import VeiculoService
+from app.database import get_db, get_async_db, get_async_sessionmaker
+from app.services.cache import CacheBackend, get_cache_facetas, get_cache_veiculos
+from app.routes.condicional import calcular_etag, cabecalhos_cache, responder_se_nao_modificado
+from app.routes.respostas import resposta_listagem, resposta_veiculo
+from app.services.veiculo_async import AsyncVeiculoService
+from app.services.eventos import HubEventos, evento_json, get_hub_eventos, transmitir_eventos
 from app.schemas.veiculo import (
     VeiculoCreate,
     VeiculoUpdate,
-    Veiculo
+    VeiculoUpdateLote,
+    Veiculo,
+    Facetas,
+    ResultadoLote,
+    Importacao,
+    ResultadoImportacao
 )
+from app.services.veiculo import TAMANHO_BLOCO_PADRAO, normalizar_campos
+from app.services.exportacao import TIPOS_EXPORTACAO, exportar_veiculos
+from app.services import importacao as servico_importacao
 
 router = APIRouter(
     prefix="/veiculos",
@@ -16,19 +32,23 @@ router = APIRouter(
     responses={404: {"description": "Veículo não encontrado"}},
 )
 
-def get_veiculo_service(db: Session = Depends(get_db)) -> VeiculoService:
+def get_veiculo_service(
+    db: AsyncSession = Depends(get_async_db),
+    cache: CacheBackend = Depends(get_cache_veiculos),
+    cache_facetas: CacheBackend = Depends(get_cache_facetas)
+) -> AsyncVeiculoService:
     """
     Dependency injection para o serviço de veículos.
     """
-    return VeiculoService(db)
+    return AsyncVeiculoService(db, cache, cache_facetas)
 
 @router.post("/", response_model=Veiculo, status_code=201,
     summary="Cria um novo veículo",
     response_description="O veículo recém-criado"
 )
-def criar_veiculo(
+async def criar_veiculo(
     veiculo: VeiculoCreate,
-    service: VeiculoService = Depends(get_veiculo_service)
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
 ):
     """
     **Criação de Novo Veículo**
@@ -47,80 +67,415 @@ def criar_veiculo(
     - `400 Bad Request`: Se o ano ou a marca forem inválidos.
     - `422 Unprocessable Entity`: Se o corpo da requisição não seguir o schema esperado.
     """
-    return service.criar_veiculo(veiculo)
+    return resposta_veiculo(await service.criar_veiculo(veiculo), status_code=201)
+
+# --- Operações em lote ---
+
+TIPOS_NDJSON = ("application/x-ndjson", "application/ndjson")
+MAX_ITENS_LOTE = 50_000
+
+def corpo_lote(schema_item: dict) -> dict:
+    """Documentação OpenAPI do corpo das rotas em lote (array JSON ou NDJSON)."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": schema_item}},
+                "application/x-ndjson": {"schema": {"type": "string", "description": "Um item JSON por linha"}},
+            },
+        }
+    }
+
+async def ler_itens_lote(request: Request) -> List[Any]:
+    """
+    Lê o corpo de uma requisição em lote: um array JSON ou, com Content-Type
+    `application/x-ndjson`, um item JSON por linha. A validação de cada item fica
+    com o serviço, para que os erros sejam reportados por item.
+    """
+    corpo = await request.body()
+    tipo = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if tipo in TIPOS_NDJSON:
+        itens = []
+        for numero, linha in enumerate(corpo.splitlines(), start=1):
+            if not linha.strip():
+                continue
+            try:
+                itens.append(json.loads(linha))
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"JSON inválido na linha {numero} do NDJSON"
+                )
+    else:
+        try:
+            itens = json.loads(corpo)
+        except ValueError:
+            itens = None
+        if not isinstance(itens, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O corpo deve ser um array JSON ou NDJSON (um item por linha)"
+            )
+    if len(itens) > MAX_ITENS_LOTE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"O lote excede o limite de {MAX_ITENS_LOTE} itens"
+        )
+    return itens
+
+@router.post("/bulk", response_model=ResultadoLote,
+    summary="Cria vários veículos em uma única transação",
+    response_description="Resumo do lote com os erros por item",
+    openapi_extra=corpo_lote(VeiculoCreate.model_json_schema())
+)
+async def criar_veiculos_lote(
+    itens: List[Any] = Depends(ler_itens_lote),
+    chunk_size: int = Query(TAMANHO_BLOCO_PADRAO, ge=1, le=10_000, description="Linhas por comando enviado ao banco"),
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
+):
+    """
+    **Criação de Veículos em Lote**
+
+    Recebe um array JSON (ou NDJSON, com `Content-Type: application/x-ndjson`) de veículos
+    no mesmo formato de `POST /veiculos/`. Cada item é validado individualmente (schema,
+    ano e marca); os válidos são gravados em uma única transação, com inserções agrupadas
+    em blocos de `chunk_size` linhas.
+
+    **Respostas:**
+    - `200 OK`: Retorna `total`, `processados` e a lista `erros` (posição do item no lote e motivo).
+    - `400 Bad Request`: Se o corpo não for um array JSON ou NDJSON válido.
+    - `413 Request Entity Too Large`: Se o lote tiver mais itens que o limite.
+    """
+    return await service.criar_veiculos_lote(itens, chunk_size)
+
+@router.put("/bulk", response_model=ResultadoLote,
+    summary="Atualiza vários veículos em uma única transação",
+    response_description="Resumo do lote com os erros por item",
+    openapi_extra=corpo_lote(VeiculoUpdateLote.model_json_schema())
+)
+async def atualizar_veiculos_lote(
+    itens: List[Any] = Depends(ler_itens_lote),
+    chunk_size: int = Query(TAMANHO_BLOCO_PADRAO, ge=1, le=10_000, description="Linhas por comando enviado ao banco"),
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
+):
+    """
+    **Atualização de Veículos em Lote**
+
+    Cada item traz o `id` do veículo e os campos a alterar, como em `PUT /veiculos/{id}`.
+    Itens inválidos, IDs repetidos e veículos inexistentes são reportados em `erros`;
+    os demais são atualizados em uma única transação.
+
+    **Respostas:**
+    - `200 OK`: Retorna `total`, `processados` e a lista `erros`.
+    - `400 Bad Request`: Se o corpo não for um array JSON ou NDJSON válido.
+    - `413 Request Entity Too Large`: Se o lote tiver mais itens que o limite.
+    """
+    return await service.atualizar_veiculos_lote(itens, chunk_size)
+
+@router.delete("/bulk", response_model=ResultadoLote,
+    summary="Remove vários veículos em uma única transação",
+    response_description="Resumo do lote com os erros por item",
+    openapi_extra=corpo_lote({"type": "integer"})
+)
+async def remover_veiculos_lote(
+    itens: List[Any] = Depends(ler_itens_lote),
+    chunk_size: int = Query(TAMANHO_BLOCO_PADRAO, ge=1, le=10_000, description="Linhas por comando enviado ao banco"),
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
+):
+    """
+    **Remoção de Veículos em Lote**
+
+    Recebe um array com os IDs dos veículos a remover. IDs inválidos, repetidos ou
+    inexistentes são reportados em `erros`; os demais são removidos em uma única transação.
+
+    **Respostas:**
+    - `200 OK`: Retorna `total`, `processados` e a lista `erros`.
+    - `400 Bad Request`: Se o corpo não for um array JSON ou NDJSON válido.
+    - `413 Request Entity Too Large`: Se o lote tiver mais itens que o limite.
+    """
+    return await service.remover_veiculos_lote(itens, chunk_size)
+
+@router.get("/export",
+    summary="Exporta os veículos em NDJSON ou CSV",
+    response_description="Arquivo com os veículos, enviado em streaming",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}}
+)
+async def exportar(
+    formato: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Formato do arquivo"),
+    marca: Optional[str] = Query(None, description="Filtrar por marca (busca parcial e case-insensitive)"),
+    ano: Optional[int] = Query(None, ge=1900, description="Filtrar por ano exato"),
+    cor: Optional[str] = Query(None, description="Filtrar por descrição/cor (busca parcial e case-insensitive)"),
+    vendido: Optional[bool] = Query(None, description="Filtrar por status de venda"),
+    q: Optional[str] = Query(None, description="Busca textual em veículo, marca e descrição"),
+    session_factory = Depends(get_async_sessionmaker)
+):
+    """
+    **Exportação de Veículos**
+
+    Exporta todos os veículos que atendem aos filtros (os mesmos de `GET /veiculos/`), ordenados
+    por ID, sem paginação. O arquivo é enviado em streaming à medida que as linhas são lidas do
+    banco, com uso de memória constante independentemente da quantidade de veículos.
+
+    **Formatos:**
+    - `ndjson` (padrão): um objeto JSON por linha, com os mesmos campos de `GET /veiculos/{id}`.
+    - `csv`: cabeçalho seguido de uma linha por veículo; `vendido` como `true`/`false`.
+
+    **Respostas:**
+    - `200 OK`: O arquivo exportado.
+    - `422 Unprocessable Entity`: Se o formato ou os filtros forem inválidos.
+    """
+    return StreamingResponse(
+        exportar_veiculos(session_factory, formato, marca=marca, ano=ano, cor=cor, vendido=vendido, q=q),
+        media_type=TIPOS_EXPORTACAO[formato],
+        headers={"Content-Disposition": f'attachment; filename="veiculos.{formato}"'}
+    )
+
+# As rotas de importação são síncronas (def): a leitura do arquivo enviado e as gravações
+# em lote rodam no threadpool, com a Session síncrona, sem bloquear o event loop.
+
+@router.post("/import", response_model=ResultadoImportacao,
+    summary="Importa veículos de um arquivo CSV ou NDJSON",
+    response_description="Estado final da importação e as primeiras rejeições"
+)
+def importar(
+    arquivo: UploadFile = File(..., description="Arquivo CSV (com cabeçalho) ou NDJSON"),
+    formato: Optional[Literal["csv", "ndjson"]] = Query(
+        None, alias="format", description="Formato do arquivo; por padrão, deduzido da extensão"
+    ),
+    importacao_id: Optional[int] = Query(None, description="ID de uma importação interrompida, para retomá-la"),
+    chunk_size: int = Query(TAMANHO_BLOCO_PADRAO, ge=1, le=10_000, description="Registros por lote (transação)"),
+    db: Session = Depends(get_db)
+):
+    """
+    **Importação de Veículos em Arquivo**
+
+    Lê o arquivo enviado (multipart) registro a registro, valida cada um com as mesmas regras
+    de `POST /veiculos/` e grava os válidos em lotes de `chunk_size` registros, cada lote em
+    uma transação. A memória usada não depende do tamanho do arquivo.
+
+    O progresso fica registrado em `GET /veiculos/importacoes/{id}` a cada lote. Se a importação
+    for interrompida, envie o mesmo arquivo com `importacao_id` para continuar do primeiro
+    registro não gravado.
+
+    **Formatos:**
+    - `csv`: primeira linha com os nomes dos campos (`veiculo`, `marca`, `ano`, `descricao`, `vendido`);
+      colunas extras (como as do `GET /veiculos/export`) são ignoradas.
+    - `ndjson`: um objeto JSON por linha.
+
+    **Respostas:**
+    - `200 OK`: Retorna os totais da importação e até 1000 rejeições (linha e motivo).
+    - `400 Bad Request`: Se o formato não for suportado.
+    - `404 Not Found`: Se `importacao_id` não existir.
+    """
+    return servico_importacao.executar_importacao(
+        db, arquivo.file, arquivo.filename or "upload", formato, importacao_id, chunk_size
+    )
+
+@router.get("/importacoes/{importacao_id}", response_model=Importacao,
+    summary="Obtém o progresso de uma importação",
+    response_description="Checkpoint e totais da importação"
+)
+def obter_importacao(importacao_id: int, db: Session = Depends(get_db)):
+    """
+    **Progresso de Importação**
+
+    Retorna quantos registros do arquivo já foram processados, inseridos e rejeitados,
+    e se a importação foi concluída. Os valores são atualizados a cada lote gravado.
+
+    **Respostas:**
+    - `200 OK`: Retorna a importação.
+    - `404 Not Found`: Se a importação não existir.
+    """
+    return servico_importacao.obter_importacao(db, importacao_id)
+
+@router.get("/facets", response_model=Facetas,
+    summary="Contagens por marca, ano e status de venda para os filtros da listagem",
+    response_description="Contagens por faceta"
+)
+async def obter_facetas(
+    marca: Optional[str] = Query(None, description="Filtrar por marca (busca parcial e case-insensitive)"),
+    ano: Optional[int] = Query(None, ge=1900, description="Filtrar por ano exato"),
+    cor: Optional[str] = Query(None, description="Filtrar por descrição/cor (busca parcial e case-insensitive)"),
+    vendido: Optional[bool] = Query(None, description="Filtrar por status de venda"),
+    q: Optional[str] = Query(None, description="Busca textual em veículo, marca e descrição"),
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
+):
+    """
+    **Contagens por Faceta**
+
+    Este endpoint retorna, para os mesmos filtros da listagem (`GET /veiculos/`), quantos
+    veículos existem por marca, por ano, por década e por status de venda, além do total.
+
+    As contagens saem de uma única consulta agrupada e ficam em cache por poucos segundos
+    (`TINNOVA_CACHE_FACETAS_TTL`, padrão 5); uma escrita feita pelo mesmo processo invalida
+    o cache imediatamente.
+
+    **Casos de Uso:**
+    - Exibir, no painel de filtros, quantos resultados cada valor de filtro traria.
+
+    **Respostas:**
+    - `200 OK`: Retorna o objeto com as contagens.
+    """
+    return await service.obter_facetas(marca=marca, ano=ano, cor=cor, vendido=vendido, q=q)
+
+# Cabeçalhos das respostas SSE: sem cache e sem buffer no proxy reverso (nginx)
+CABECALHOS_SSE = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.get("/stream",
+    summary="Transmite as alterações de veículos (Server-Sent Events)",
+    response_description="Fluxo text/event-stream com um evento por alteração",
+    response_class=StreamingResponse,
+)
+async def transmitir_alteracoes(hub: HubEventos = Depends(get_hub_eventos)):
+    """
+    **Fluxo de Alterações (SSE)**
+
+    Mantém a conexão aberta e envia um evento `text/event-stream` a cada escrita feita pela
+    API, pela interface web ou por uma importação. O nome do evento é o tipo da alteração e
+    os dados, um JSON compacto:
+
+    - `criado` / `atualizado`: `{"tipo", "id", "veiculo"}`, com o veículo após a escrita.
+    - `removido`: `{"tipo", "id"}`.
+    - `lote`: `{"tipo", "total"}`, para operações em lote e importações (busque a lista de novo).
+    - `recarregar`: o cliente ficou para trás e perdeu eventos; busque a lista de novo.
+
+    Sem alterações, só um comentário de keep-alive é enviado a cada
+    `TINNOVA_SSE_KEEPALIVE` segundos. Os eventos são os das escritas atendidas pelo mesmo
+    processo.
+
+    **Casos de Uso:**
+    - Atualizar listas e painéis abertos sem consultar a API periodicamente.
+    """
+    return StreamingResponse(transmitir_eventos(hub, evento_json), media_type="text/event-stream", headers=CABECALHOS_SSE)
 
 @router.get("/{veiculo_id}", response_model=Veiculo,
     summary="Obtém os detalhes de um veículo",
     response_description="Detalhes do veículo solicitado"
 )
-def obter_veiculo(
+async def obter_veiculo(
+    request: Request,
     veiculo_id: int,
-    service: VeiculoService = Depends(get_veiculo_service)
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
 ):
     """
     **Obtenção de Detalhes do Veículo**
 
     Este endpoint retorna as informações detalhadas de um veículo específico com base no seu ID.
 
+    A resposta traz `ETag` e `Last-Modified` (da coluna `updated`). Com `If-None-Match` ou
+    `If-Modified-Since` correspondentes à versão atual, retorna `304 Not Modified` sem corpo.
+
     **Casos de Uso:**
     - Visualizar todos os dados de um veículo individualmente.
 
     **Respostas:**
     - `200 OK`: Retorna o objeto do veículo com seus dados completos.
+    - `304 Not Modified`: Se a versão em cache no cliente ainda é a atual.
     - `404 Not Found`: Se nenhum veículo com o ID fornecido for encontrado.
     """
-    return service.obter_veiculo(veiculo_id)
+    # ETag só do ID e de `updated`: um acerto no cache de veículos não vai ao banco, e
+    # escritas em outros veículos não invalidam esta representação. Como o Last-Modified,
+    # tem a resolução de `updated` (segundos no MySQL DATETIME)
+    veiculo = await service.obter_veiculo(veiculo_id)
+    etag = calcular_etag("veiculo", veiculo.id, veiculo.updated)
+    nao_modificado = responder_se_nao_modificado(request, etag, veiculo.updated)
+    if nao_modificado:
+        return nao_modificado
+    return resposta_veiculo(veiculo, headers=cabecalhos_cache(etag, veiculo.updated))
 
 @router.get("/", response_model=List[Veiculo],
     summary="Lista todos os veículos com filtros opcionais",
     response_description="Lista de veículos"
 )
-def listar_veiculos(
+async def listar_veiculos(
+    request: Request,
     skip: int = Query(0, ge=0, description="Número de registros para pular"),
     limit: int = Query(100, ge=1, le=100, description="Limite de registros por página"),
     marca: Optional[str] = Query(None, description="Filtrar por marca (busca parcial e case-insensitive)"),
     ano: Optional[int] = Query(None, ge=1900, description="Filtrar por ano exato"),
     cor: Optional[str] = Query(None, description="Filtrar por descrição/cor (busca parcial e case-insensitive)"),
-    service: VeiculoService = Depends(get_veiculo_service)
+    vendido: Optional[bool] = Query(None, description="Filtrar por status de venda"),
+    q: Optional[str] = Query(None, description="Busca textual em veículo, marca e descrição, ordenada por relevância"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página, retornado no header X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (ex.: `id,veiculo,marca`); o `id` é sempre incluído"),
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
 ):
     """
     **Listagem de Veículos**
 
-    Este endpoint retorna uma lista de veículos, permitindo aplicar filtros e controlar a paginação.
+    Este endpoint retorna uma lista de veículos ordenada por ID, permitindo aplicar filtros e controlar a paginação.
 
     **Filtros:**
     - `marca`: Filtra veículos cuja marca contenha o texto especificado (case-insensitive).
     - `ano`: Filtra veículos por ano exato.
     - `cor`: Filtra veículos cuja descrição/cor contenha o texto especificado (case-insensitive).
+    - `vendido`: Filtra veículos pelo status de venda (`true` ou `false`).
+    - `q`: Busca textual indexada em veículo, marca e descrição. Cada palavra é buscada como
+      prefixo (ex.: `oni prata` encontra "Onix" com descrição "Prata") e todas são obrigatórias.
+      Os resultados passam a ser ordenados por relevância e paginados apenas por `skip`/`limit`.
 
     **Paginação:**
-    - `skip`: Número de veículos para pular (para offset).
+    - `cursor`: Cursor opaco da próxima página (recomendado). O custo de cada página não depende da sua profundidade.
+    - `skip`: Número de veículos para pular (para offset). Mantido por compatibilidade; ignorado quando `cursor` é informado.
     - `limit`: Número máximo de veículos a retornar.
 
+    Quando existem mais resultados, a resposta inclui o header `X-Next-Cursor` com o cursor
+    da página seguinte. Os filtros devem ser repetidos em todas as páginas.
+
+    **Projeção de campos:**
+    - `fields`: Lista de campos do veículo a retornar (ex.: `fields=id,veiculo,marca,ano`). Só
+      essas colunas são lidas do banco e serializadas; os objetos da resposta trazem apenas
+      os campos pedidos (e sempre o `id`). Campos fora do schema `Veiculo` resultam em `400`.
+
     **Casos de Uso:**
     - Exibir a lista completa de veículos.
     - Buscar veículos por critérios específicos (marca, ano, cor).
     - Implementar paginação em interfaces de usuário.
 
+    **Cache no cliente:**
+    A resposta traz uma `ETag` fraca, derivada dos parâmetros e da versão dos dados (um
+    contador incrementado por toda escrita, lido pela chave primária). Com `If-None-Match`
+    correspondente, retorna `304 Not Modified` sem consultar a página.
+
     **Respostas:**
     - `200 OK`: Retorna uma lista de objetos de veículo.
+    - `304 Not Modified`: Se a listagem em cache no cliente ainda é a atual.
+    - `400 Bad Request`: Se o cursor for inválido ou for usado junto com `q`, ou se `fields` tiver campos inválidos.
     """
-    return service.listar_veiculos(
+    campos = normalizar_campos(fields)
+    # Só ETag, sem Last-Modified: o maior `updated` da página não muda quando um veículo é
+    # removido ou deixa de atender aos filtros, e com `fields` nem é lido (ver README)
+    versao = await service.obter_versao_dados()
+    etag = calcular_etag("veiculos", skip, limit, marca, ano, cor, vendido, q, cursor, campos, versao, fraca=True)
+    nao_modificado = responder_se_nao_modificado(request, etag)
+    if nao_modificado:
+        return nao_modificado
+
+    veiculos, next_cursor = await service.listar_veiculos_paginado(
         skip=skip,
         limit=limit,
         marca=marca,
         ano=ano,
-        cor=cor
+        cor=cor,
+        vendido=vendido,
+        cursor=cursor,
+        q=q,
+        campos=campos
     )
+    cabecalhos = cabecalhos_cache(etag)
+    if next_cursor:
+        cabecalhos["X-Next-Cursor"] = next_cursor
+    return resposta_listagem(veiculos, campos, headers=cabecalhos)
 
 @router.put("/{veiculo_id}", response_model=Veiculo,
     summary="Atualiza completamente um veículo existente",
     response_description="O veículo atualizado"
 )
-def atualizar_veiculo(
+async def atualizar_veiculo(
     veiculo_id: int,
     veiculo_update: VeiculoUpdate,
-    service: VeiculoService = Depends(get_veiculo_service)
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
 ):
     """
     **Atualização Completa de Veículo (PUT)**
@@ -139,15 +494,15 @@ def atualizar_veiculo(
     - `404 Not Found`: Se nenhum veículo com o ID especificado for encontrado.
     - `422 Unprocessable Entity`: Se o corpo da requisição não seguir o schema esperado.
     """
-    return service.atualizar_veiculo(veiculo_id, veiculo_update)
+    return resposta_veiculo(await service.atualizar_veiculo(veiculo_id, veiculo_update))
 
 @router.delete("/{veiculo_id}",
     summary="Remove um veículo",
     response_description="Mensagem de sucesso após remoção"
 )
-def remover_veiculo(
+async def remover_veiculo(
     veiculo_id: int,
-    service: VeiculoService = Depends(get_veiculo_service)
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
 ):
     """
     **Remoção de Veículo**
@@ -161,14 +516,16 @@ def remover_veiculo(
     - `200 OK`: Retorna uma mensagem de sucesso indicando que o veículo foi removido.
     - `404 Not Found`: Se nenhum veículo com o ID fornecido for encontrado.
     """
-    return service.remover_veiculo(veiculo_id)
+    return await service.remover_veiculo(veiculo_id)
 
 @router.get("/estatisticas/geral",
     summary="Retorna estatísticas gerais sobre os veículos",
     response_description="Objeto com estatísticas"
 )
-def obter_estatisticas(
-    service: VeiculoService = Depends(get_veiculo_service)
+async def obter_estatisticas(
+    request: Request,
+    response: Response,
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
 ):
     """
     **Estatísticas Gerais de Veículos**
@@ -179,43 +536,98 @@ def obter_estatisticas(
     - **Total de veículos não vendidos:** Conta todos os veículos onde `vendido` é `False`.
     - **Distribuição por década:** Agrupa e conta veículos pela década de fabricação (ex: 1990s, 2000s).
     - **Distribuição por fabricante:** Agrupa e conta veículos por marca/fabricante.
-    - **Veículos recentes:** Conta veículos criados nos últimos 7 dias.
+    - **Veículos recentes:** Conta veículos criados nos últimos 7 dias (dias corridos em UTC, incluindo hoje).
+
+    Os valores são lidos de contadores atualizados na mesma transação de cada criação,
+    atualização ou remoção, de modo que a consulta tem custo constante independente do
+    número de veículos. Para recalcular os contadores: `python -m scripts.reconstruir_estatisticas`.
 
     **Casos de Uso:**
     - Obter um panorama geral do inventário de veículos.
     - Análise rápida sobre o estado das vendas e o perfil da base de veículos.
 
+    A resposta traz uma `ETag` calculada a partir da versão dos dados e do dia corrente; com
+    `If-None-Match` correspondente, retorna `304 Not Modified` sem corpo e sem ler os contadores.
+
     **Respostas:**
     - `200 OK`: Retorna um objeto JSON contendo as estatísticas.
+    - `304 Not Modified`: Se as estatísticas em cache no cliente ainda são as atuais.
     """
-    return service.obter_estatisticas()
+    # O dia entra na ETag porque a janela de "veículos recentes" muda à meia-noite (UTC)
+    versao = await service.obter_versao_dados()
+    etag = calcular_etag("estatisticas", versao, datetime.now(UTC).date(), fraca=True)
+    nao_modificado = responder_se_nao_modificado(request, etag)
+    if nao_modificado:
+        return nao_modificado
+    response.headers.update(cabecalhos_cache(etag))
+    return await service.obter_estatisticas()
 
 @router.get("/nao-vendidos/", response_model=List[Veiculo],
     summary="Lista todos os veículos não vendidos",
     response_description="Lista de veículos não vendidos"
 )
-def listar_veiculos_nao_vendidos(
-    service: VeiculoService = Depends(get_veiculo_service)
+async def listar_veiculos_nao_vendidos(
+    request: Request,
+    skip: int = Query(0, ge=0, description="Número de registros para pular"),
+    limit: int = Query(100, ge=1, le=100, description="Limite de registros por página"),
+    marca: Optional[str] = Query(None, description="Filtrar por marca (busca parcial e case-insensitive)"),
+    ano: Optional[int] = Query(None, ge=1900, description="Filtrar por ano exato"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página, retornado no header X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (ex.: `id,veiculo,marca`); o `id` é sempre incluído"),
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
 ):
     """
     **Listagem de Veículos Não Vendidos**
 
-    Este endpoint retorna uma lista apenas dos veículos cujo status `vendido` é `False`.
+    Este endpoint retorna uma lista apenas dos veículos cujo status `vendido` é `False`, ordenada por ID.
+    O filtro é aplicado no banco, de modo que o custo depende do tamanho da página e não do inventário.
+
+    **Filtros:**
+    - `marca`: Filtra veículos cuja marca contenha o texto especificado (case-insensitive).
+    - `ano`: Filtra veículos por ano exato.
+
+    **Paginação:**
+    - `cursor`: Cursor opaco da próxima página, retornado no header `X-Next-Cursor`.
+    - `skip`/`limit`: Paginação por offset, como em `GET /veiculos/`.
 
     **Casos de Uso:**
     - Identificar rapidamente o estoque de veículos ainda disponíveis para venda.
 
+    Suporta `fields` (projeção de campos) e `ETag`/`If-None-Match` como `GET /veiculos/`.
+
     **Respostas:**
     - `200 OK`: Retorna uma lista de objetos de veículo não vendidos.
+    - `304 Not Modified`: Se a listagem em cache no cliente ainda é a atual.
+    - `400 Bad Request`: Se o cursor informado for inválido ou se `fields` tiver campos inválidos.
     """
-    return service.obter_veiculos_nao_vendidos()
+    campos = normalizar_campos(fields)
+    # Só ETag, sem Last-Modified, como em `listar_veiculos`
+    versao = await service.obter_versao_dados()
+    etag = calcular_etag("nao-vendidos", skip, limit, marca, ano, cursor, campos, versao, fraca=True)
+    nao_modificado = responder_se_nao_modificado(request, etag)
+    if nao_modificado:
+        return nao_modificado
+
+    veiculos, next_cursor = await service.obter_veiculos_nao_vendidos(
+        skip=skip,
+        limit=limit,
+        marca=marca,
+        ano=ano,
+        cursor=cursor,
+        campos=campos
+    )
+    cabecalhos = cabecalhos_cache(etag)
+    if next_cursor:
+        cabecalhos["X-Next-Cursor"] = next_cursor
+    return resposta_listagem(veiculos, campos, headers=cabecalhos)
 
 @router.get("/recentes/", response_model=List[Veiculo],
     summary="Lista veículos cadastrados nos últimos 7 dias",
     response_description="Lista de veículos recentes"
 )
-def listar_veiculos_recentes(
-    service: VeiculoService = Depends(get_veiculo_service)
+async def listar_veiculos_recentes(
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula (ex.: `id,veiculo,marca`); o `id` é sempre incluído"),
+    service: AsyncVeiculoService = Depends(get_veiculo_service)
 ):
     """
     **Listagem de Veículos Recentes**
@@ -225,7 +637,11 @@ def listar_veiculos_recentes(
     **Casos de Uso:**
     - Visualizar os veículos adicionados recentemente ao inventário.
 
+    Suporta `fields` (projeção de campos) como `GET /veiculos/`.
+
     **Respostas:**
     - `200 OK`: Retorna uma lista de objetos de veículo recentes.
+    - `400 Bad Request`: Se `fields` tiver campos inválidos.
     """
-    return service.obter_veiculos_recentes()
+    campos = normalizar_campos(fields)
+    return resposta_listagem(await service.obter_veiculos_recentes(campos), campos)
@@ -1,13 +1,17 @@
 # /Users/everlonpassos/Downloads/tinnova/app/routes/web.py
 from typing import Optional
-from fastapi import APIRouter, Request, Form, Query, Path, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Request, Form, Query, Path, Depends
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-import requests
 import os
 import pathlib
 
+from app.routes.veiculo import CABECALHOS_SSE, get_veiculo_service
+from app.services.cache import CacheBackend, chave_fragmento, get_cache_fragmentos
+from app.services.eventos import ATUALIZADO, REMOVIDO, EventoVeiculo, HubEventos, get_hub_eventos, mensagem_sse, transmitir_eventos
 from app.services.veiculo import MARCAS_VALIDAS
+from app.services.veiculo_async import AsyncVeiculoService
+from app.services.veiculo_client import VeiculoHttpClient, VeiculoServiceClient
 
 # Caminho base do projeto (um nível acima de 'app')
 # tinnova/app/routes/web.py -> tinnova/
@@ -22,54 +26,33 @@ templates = Jinja2Templates(directory=os.path.join(BASE_PROJECT_DIR, 'web', 'tem
 # templates.env.filters['truncate'] = lambda s, length=255, killwords=False, end='...': s[:length] if len(s) > length else s
 
 # URL base da sua API de Veículos Tinnova (FastAPI)
+# Usada apenas no modo "http" (interface web e API implantadas separadamente)
 # Ajuste a porta se sua API FastAPI rodar em uma porta diferente de 8000
 BASE_API_URL = os.environ.get("TINNOVA_API_URL", "http://localhost:8000/api/v1")
 
-# --- Funções Auxiliares para interagir com a API ---
-def get_api_data(endpoint, params=None):
-    try:
-        url = f"{BASE_API_URL}{endpoint}"
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()  # Levanta HTTPError para respostas 4xx/5xx
-        return response.json(), None
-    except requests.exceptions.HTTPError as e:
-        # Tenta extrair uma mensagem de erro mais útil do corpo da resposta JSON, se disponível
-        error_message = f"Erro HTTP da API: {e.response.status_code}"
-        try:
-            error_detail = e.response.json().get("detail", e.response.text)
-            error_message += f" - {error_detail}"
-        except ValueError: # Se o corpo do erro não for JSON
-            error_message += f" - {e.response.text}"
-        return None, error_message
-    except requests.exceptions.RequestException as e:
-        return None, f"Erro de conexão com a API: {e}"
-    except ValueError: # Erro ao decodificar JSON
-        return None, "Resposta inválida da API (não é JSON)."
-
-def post_api_data(endpoint, data=None):
-    try:
-        url = f"{BASE_API_URL}{endpoint}"
-        response = requests.post(url, json=data)
-        # Não levantar erro aqui imediatamente, pois queremos inspecionar o status_code e o corpo
-        return response, None
-    except requests.exceptions.RequestException as e:
-        return None, f"Erro de conexão com a API: {e}"
-
-def put_api_data(endpoint, data=None):
-    try:
-        url = f"{BASE_API_URL}{endpoint}"
-        response = requests.put(url, json=data)
-        return response, None
-    except requests.exceptions.RequestException as e:
-        return None, f"Erro de conexão com a API: {e}"
+# Modo de acesso da interface web aos dados:
+# - "local" (padrão): chama o VeiculoService em processo, com a sessão de banco da requisição
+# - "http": chama a API /api/v1 via HTTP em BASE_API_URL
+WEB_API_MODE = os.environ.get("TINNOVA_WEB_MODE", "local")
 
-def delete_api_data(endpoint):
-    try:
-        url = f"{BASE_API_URL}{endpoint}"
-        response = requests.delete(url)
-        return response, None
-    except requests.exceptions.RequestException as e:
-        return None, f"Erro de conexão com a API: {e}"
+# Colunas exibidas na tabela de veículos (_lista_veiculos.html), pedidas com `fields=`
+CAMPOS_TABELA_VEICULOS = "id,veiculo,marca,ano,descricao,vendido"
+
+# Os fragmentos de lista e estatísticas são guardados já renderizados em `cache_fragmentos`,
+# com a versão dos dados (`client.obter_versao_dados`) na chave: um acerto custa só a
+# leitura da versão, sem consultar os veículos nem renderizar o template. No modo local a
+# versão é o contador do banco, compartilhado entre os workers. A versão é lida antes da
+# consulta, de modo que um fragmento montado durante uma escrita fica com a versão anterior
+# e não é servido depois dela.
+
+# --- Dependência para interagir com a API ---
+def get_veiculo_client(service: AsyncVeiculoService = Depends(get_veiculo_service)):
+    """
+    Dependency injection do cliente usado pelos fragmentos e ações da interface web.
+    """
+    if WEB_API_MODE == "http":
+        return VeiculoHttpClient(BASE_API_URL)
+    return VeiculoServiceClient(service)
 
 
 # O prefixo /ui será adicionado pelo FastAPI ao montar o app Flask
@@ -84,8 +67,12 @@ async def fragment_veiculos_lista(
     marca: str = Query(None),
     ano_str: Optional[str] = Query(None, alias="ano"),
     cor: str = Query(None),
-    skip: int = Query(0),
-    limit: int = Query(10)
+    vendido_str: Optional[str] = Query(None, alias="vendido"),
+    q: str = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    client = Depends(get_veiculo_client),
+    cache: CacheBackend = Depends(get_cache_fragmentos)
 ):
     ano_int: Optional[int] = None
     if ano_str and ano_str.strip():
@@ -93,24 +80,36 @@ async def fragment_veiculos_lista(
             ano_int = int(ano_str)
         except ValueError:
             pass
-
-    params = {
-        'marca': marca,
-        'ano': ano_int,
-        'cor': cor,
-        'skip': skip,
-        'limit': limit
-    }
-    params = {k: v for k, v in params.items() if v is not None}
-    veiculos_data, error = get_api_data("/veiculos/", params=params)
-
-    if error:
-        return HTMLResponse(content=f"<div class='error'>Erro ao carregar veículos: {error}</div>", status_code=500)
+    # O select de status envia "" para "Todos"
+    vendido: Optional[bool] = {"true": True, "false": False}.get((vendido_str or "").lower())
+
+    filtros = {'marca': marca or None, 'ano': ano_int, 'cor': cor or None, 'vendido': vendido, 'q': q or None}
+    filtros = {k: v for k, v in filtros.items() if v is not None}
+    params = {**filtros, 'skip': skip, 'limit': limit, 'fields': CAMPOS_TABELA_VEICULOS}
+    versao = await client.obter_versao_dados()
+    chave = chave_fragmento('_lista_veiculos.html', params, versao)
+    html = await cache.obter(chave)
+    if html is not None:
+        return HTMLResponse(content=html)
+
+    resposta = await client.listar_veiculos(params)
+
+    if resposta.error:
+        return HTMLResponse(content=f"<div class='error'>Erro ao carregar veículos: {resposta.error}</div>", status_code=500)
+    # Contagens do painel de filtros; sem elas (erro na API), a lista é exibida mesmo assim
+    facetas = await client.obter_facetas(filtros, versao)
     try:
         response = templates.TemplateResponse(
             '_lista_veiculos.html',
-            {"request": request, "veiculos": veiculos_data if veiculos_data else []}
+            {
+                "request": request,
+                "veiculos": resposta.data if resposta.data else [],
+                "filtros": filtros,
+                "facetas": facetas.data if not facetas.error else None,
+            }
         )
+        if not facetas.error:
+            await cache.gravar(chave, response.body)
         return response
     except Exception as e_template:
         # Logar o traceback completo aqui seria ideal
@@ -119,6 +118,28 @@ async def fragment_veiculos_lista(
         return HTMLResponse(content=f"<div class='error'>Erro interno ao renderizar a lista.</div>", status_code=500)
 
 
+def evento_html(evento: EventoVeiculo) -> str:
+    """
+    Mensagem SSE da interface web. Atualizações e remoções vão para o evento da própria
+    linha (`veiculo-<id>`, ver _linha_veiculo.html), com o HTML da linha nova; as demais
+    alterações (criações, lotes, importações) só avisam que a lista pode estar desatualizada,
+    já que a linha nova depende dos filtros e da página exibidos.
+    """
+    if evento.tipo in (ATUALIZADO, REMOVIDO):
+        html = templates.get_template('_linha_veiculo.html').render(
+            veiculo=evento.veiculo or {"id": evento.id}, removido=evento.tipo == REMOVIDO
+        )
+        return mensagem_sse(f"veiculo-{evento.id}", html.strip())
+    return mensagem_sse("lista-desatualizada", templates.get_template('_aviso_lista.html').render().strip())
+
+@web_router.get('/stream')
+async def stream(hub: HubEventos = Depends(get_hub_eventos)):
+    """
+    Alterações de veículos para a extensão SSE do HTMX (conectada em index.html): cada
+    evento traz o fragmento a ser trocado na página, renderizado uma vez por evento.
+    """
+    return StreamingResponse(transmitir_eventos(hub, evento_html), media_type="text/event-stream", headers=CABECALHOS_SSE)
+
 @web_router.get('/fragment/veiculo-form-criar', response_class=HTMLResponse)
 async def fragment_veiculo_form_criar(request: Request):
     return templates.TemplateResponse(
@@ -126,45 +147,84 @@ async def fragment_veiculo_form_criar(request: Request):
         {"request": request, "veiculo": {}, "marcas_validas": MARCAS_VALIDAS}
     )
 
-@web_router.get('/fragment/veiculos-estatisticas', response_class=HTMLResponse)
-async def fragment_veiculos_estatisticas(request: Request):
-    stats_data, error = get_api_data("/veiculos/estatisticas/geral")
-    if error:
-        return HTMLResponse(content=f"<div class='error'>Erro ao carregar estatísticas: {error}</div>", status_code=500)
-    return templates.TemplateResponse(
-        '_estatisticas.html',
-        {"request": request, "stats": stats_data if stats_data else {}}
+async def _fragmento_estatisticas(request: Request, template: str, client, cache: CacheBackend) -> HTMLResponse:
+    # Estatísticas renderizadas em `template`, em cache até a próxima escrita
+    chave = chave_fragmento(template, {}, await client.obter_versao_dados())
+    html = await cache.obter(chave)
+    if html is not None:
+        return HTMLResponse(content=html)
+
+    resposta = await client.obter_estatisticas()
+    if resposta.error:
+        return HTMLResponse(content=f"<div class='error'>Erro ao carregar estatísticas: {resposta.error}</div>", status_code=500)
+    response = templates.TemplateResponse(
+        template,
+        {"request": request, "stats": resposta.data if resposta.data else {}}
     )
+    await cache.gravar(chave, response.body)
+    return response
+
+@web_router.get('/fragment/veiculos-estatisticas', response_class=HTMLResponse)
+async def fragment_veiculos_estatisticas(
+    request: Request,
+    client = Depends(get_veiculo_client),
+    cache: CacheBackend = Depends(get_cache_fragmentos)
+):
+    return await _fragmento_estatisticas(request, '_estatisticas.html', client, cache)
+
+@web_router.get('/fragment/estatisticas-badges', response_class=HTMLResponse)
+async def fragment_estatisticas_badges(
+    request: Request,
+    client = Depends(get_veiculo_client),
+    cache: CacheBackend = Depends(get_cache_fragmentos)
+):
+    return await _fragmento_estatisticas(request, '_estatisticas_badges.html', client, cache)
 
 @web_router.get('/fragment/veiculo-detalhes/{veiculo_id}', response_class=HTMLResponse)
-async def fragment_veiculo_detalhes(request: Request, veiculo_id: int = Path(...)):
-    veiculo_data, error = get_api_data(f"/veiculos/{veiculo_id}")
-    if error:
-        status_code = 500
-        if "404" in error or (hasattr(error, 'response') and error.response.status_code == 404):
-            status_code = 404
+async def fragment_veiculo_detalhes(request: Request, veiculo_id: int = Path(...), client = Depends(get_veiculo_client)):
+    resposta = await client.obter_veiculo(veiculo_id)
+    if resposta.error:
+        status_code = 404 if resposta.status_code == 404 else 500
         return HTMLResponse(
-            content=f"<div class='error'>Erro ao carregar detalhes do veículo {veiculo_id}: {error}</div>",
+            content=f"<div class='error'>Erro ao carregar detalhes do veículo {veiculo_id}: {resposta.error}</div>",
             status_code=status_code
         )
-    return templates.TemplateResponse('_detalhes_veiculo.html', {"request": request, "veiculo": veiculo_data})
+    return templates.TemplateResponse('_detalhes_veiculo.html', {"request": request, "veiculo": resposta.data})
 
 @web_router.get('/fragment/veiculo-form-editar/{veiculo_id}', response_class=HTMLResponse)
-async def fragment_veiculo_form_editar(request: Request, veiculo_id: int = Path(...)):
-    veiculo_data, error = get_api_data(f"/veiculos/{veiculo_id}")
-    if error:
-        status_code = 500
-        if "404" in error or (hasattr(error, 'response') and error.response.status_code == 404):
-            status_code = 404
+async def fragment_veiculo_form_editar(request: Request, veiculo_id: int = Path(...), client = Depends(get_veiculo_client)):
+    resposta = await client.obter_veiculo(veiculo_id)
+    if resposta.error:
+        status_code = 404 if resposta.status_code == 404 else 500
         return HTMLResponse(
-            content=f"<div class='error'>Erro ao carregar veículo para edição: {error}</div>",
+            content=f"<div class='error'>Erro ao carregar veículo para edição: {resposta.error}</div>",
             status_code=status_code
         )
     return templates.TemplateResponse(
         '_form_veiculo_editar.html',
-        {"request": request, "veiculo": veiculo_data, "marcas_validas": MARCAS_VALIDAS}
+        {"request": request, "veiculo": resposta.data, "marcas_validas": MARCAS_VALIDAS}
     )
 
+# As ações de escrita respondem com o conteúdo do painel e fragmentos fora de banda
+# (hx-swap-oob) para a linha alterada da tabela e para os badges de estatísticas, montados
+# com os dados que a própria escrita retornou e com os valores dos badges em memória, já
+# com os deltas da escrita (`RespostaApi.estatisticas`, de `contadores_badges`), sem outra
+# leitura. A criação não insere linha: a posição do veículo novo depende dos filtros e da
+# página exibidos (o aviso de lista desatualizada vem pelo SSE). Sem valores recentes em
+# memória (nenhuma leitura das estatísticas neste processo há TINNOVA_CACHE_BADGES_TTL
+# segundos) e sempre no modo http, os badges são trocados por um marcador que busca
+# /ui/fragment/estatisticas-badges: uma requisição a mais, com os valores atuais.
+
+def fragmentos_oob(veiculo: Optional[dict] = None, estatisticas: Optional[dict] = None) -> str:
+    """
+    Linha de `veiculo` (substituindo a existente) e os badges de estatísticas, para serem
+    anexados à resposta de uma escrita.
+    """
+    html = ""
+    if veiculo is not None:
+        html += templates.get_template('_linha_veiculo.html').render(veiculo=veiculo, oob=True).strip()
+    return html + templates.get_template('_estatisticas_badges.html').render(oob=True, stats=estatisticas).strip()
+
 @web_router.post('/action/veiculo-criar', response_class=HTMLResponse)
 async def action_veiculo_criar(
     request: Request,
@@ -172,7 +232,8 @@ async def action_veiculo_criar(
     marca: str = Form(...),
     ano: int = Form(...),
     descricao: str = Form(None),
-    vendido: bool = Form(False) # FastAPI converte "true" para True, ausência para False se o tipo for bool
+    vendido: bool = Form(False), # FastAPI converte "true" para True, ausência para False se o tipo for bool
+    client = Depends(get_veiculo_client)
 ):
     form_data_dict = {
         "veiculo": veiculo,
@@ -184,38 +245,28 @@ async def action_veiculo_criar(
     # A conversão de 'ano' para int já é feita pelo FastAPI com o type hint
     # A conversão de 'vendido' para bool também
 
-    api_response, error_conn = post_api_data("/veiculos/", data=form_data_dict)
+    resposta = await client.criar_veiculo(form_data_dict)
 
-    if error_conn: # Erro de conexão com a API
+    if resposta.status_code is None: # Erro de conexão com a API
         return templates.TemplateResponse(
             '_form_veiculo.html',
-            {"request": request, "veiculo": form_data_dict, "form_error": f"Erro de comunicação com API: {error_conn}", "marcas_validas": MARCAS_VALIDAS},
+            {"request": request, "veiculo": form_data_dict, "form_error": f"Erro de comunicação com API: {resposta.error}", "marcas_validas": MARCAS_VALIDAS},
             status_code=500
         )
 
-    if api_response.status_code == 201:
-        success_message = "<div id='form-messages' class='success' style='color: green; padding: 10px; border: 1px solid green; margin-bottom: 10px;'>Veículo criado com sucesso!</div>"
-        return HTMLResponse(content=success_message, headers={'HX-Trigger': 'reloadVeiculosListEvent'})
+    if resposta.status_code == 201:
+        # Formulário vazio para o próximo cadastro e os badges; a tabela não é alterada
+        formulario = templates.get_template('_form_veiculo.html').render(
+            veiculo={}, form_success="Veículo criado com sucesso!", marcas_validas=MARCAS_VALIDAS
+        )
+        return HTMLResponse(content=formulario + fragmentos_oob(estatisticas=resposta.estatisticas))
 
     else: # Erro da API (validação, etc.)
-        error_details = "Erro desconhecido ao criar veículo."
-        print(error_details)
-        try:
-            error_data = api_response.json()
-            if 'detail' in error_data:
-                if isinstance(error_data['detail'], list): # FastAPI validation errors
-                     error_details = "; ".join([f"{e.get('loc', ['campo'])[-1]}: {e.get('msg', '')}" for e in error_data['detail']])
-                else:
-                    error_details = str(error_data['detail'])
-            elif 'errors' in error_data and isinstance(error_data['errors'], list): # Outro formato de erro
-                 error_details = "; ".join([f"{e.get('loc', ['campo'])[-1]}: {e.get('msg', '')}" for e in error_data['errors']])
-        except ValueError: # Se a resposta de erro não for JSON
-            error_details = api_response.text or f"Erro {api_response.status_code} da API."
-
+        error_details = resposta.error or "Erro desconhecido ao criar veículo."
         response = templates.TemplateResponse(
             '_form_veiculo.html',
             {"request": request, "veiculo": form_data_dict, "form_error": error_details, "marcas_validas": MARCAS_VALIDAS},
-            status_code=api_response.status_code
+            status_code=resposta.status_code
         )
         response.headers["HX-Reswap"] = "innerHTML" # Instrui HTMX a fazer o swap
         return response
@@ -228,7 +279,8 @@ async def action_veiculo_editar(
     marca: str = Form(...),
     ano: int = Form(...),
     descricao: str = Form(None),
-    vendido: bool = Form(False)
+    vendido: bool = Form(False),
+    client = Depends(get_veiculo_client)
 ):
     form_data_dict = {
         "veiculo": veiculo,
@@ -237,85 +289,51 @@ async def action_veiculo_editar(
         "descricao": descricao,
         "vendido": vendido
     }
-    print(f"DEBUG: Dados recebidos no formulário de edição para ID {veiculo_id}: {form_data_dict}") 
 
-    api_response, error_conn = put_api_data(f"/veiculos/{veiculo_id}", data=form_data_dict)
+    resposta = await client.atualizar_veiculo(veiculo_id, form_data_dict)
 
-    if error_conn:
+    if resposta.status_code is None:
         form_data_dict['id'] = veiculo_id # Adiciona ID para o template
         return templates.TemplateResponse(
             '_form_veiculo_editar.html',
-            {"request": request, "veiculo": form_data_dict, "form_error": f"Erro de comunicação com API: {error_conn}", "marcas_validas": MARCAS_VALIDAS},
+            {"request": request, "veiculo": form_data_dict, "form_error": f"Erro de comunicação com API: {resposta.error}", "marcas_validas": MARCAS_VALIDAS},
             status_code=500
         )
 
-    if api_response.status_code == 200:
-        updated_veiculo = api_response.json()
-        return templates.TemplateResponse('_detalhes_veiculo.html', {"request": request, "veiculo": updated_veiculo})
+    if resposta.status_code == 200:
+        detalhes = templates.get_template('_detalhes_veiculo.html').render(veiculo=resposta.data)
+        return HTMLResponse(content=detalhes + fragmentos_oob(resposta.data, resposta.estatisticas))
     else:
-        error_details = f"Erro ao atualizar veículo (ID: {veiculo_id})."
-        try:
-            error_data = api_response.json()
-            if 'detail' in error_data:
-                if isinstance(error_data['detail'], list):
-                     error_details = "; ".join([f"{e.get('loc', ['campo'])[-1]}: {e.get('msg', '')}" for e in error_data['detail']])
-                else:
-                    error_details = str(error_data['detail'])
-            elif 'errors' in error_data and isinstance(error_data['errors'], list):
-                 error_details = "; ".join([f"{e.get('loc', ['campo'])[-1]}: {e.get('msg', '')}" for e in error_data['errors']])
-        except ValueError:
-            error_details = api_response.text or f"Erro {api_response.status_code} da API."
-        print(f"DEBUG: Erro da API ao editar (ID: {veiculo_id}): {error_details}") 
-
-
+        # O formulário só usa os campos enviados e o ID: é repopulado sem consultar o veículo
+        error_details = resposta.error or f"Erro ao atualizar veículo (ID: {veiculo_id})."
         form_data_dict['id'] = veiculo_id
-        current_veiculo_data, _ = get_api_data(f"/veiculos/{veiculo_id}") # Pega os dados atuais para repopular
-
-        resposta_com_erro = None
-
-        if current_veiculo_data:
-            # Mescla dados atuais com os do formulário, priorizando os do formulário
-            # Isso é útil se a API não retornar os dados submetidos em caso de erro
-            merged_veiculo_data = {**current_veiculo_data, **form_data_dict}
-            resposta_com_erro = templates.TemplateResponse(
-                '_form_veiculo_editar.html',
-                {"request": request, "veiculo": merged_veiculo_data, "form_error": error_details, "marcas_validas": MARCAS_VALIDAS},
-                status_code=api_response.status_code
-            )
-            resposta_com_erro.headers["HX-Reswap"] = "innerHTML"
-            return resposta_com_erro
-
         resposta_com_erro = templates.TemplateResponse(
             '_form_veiculo_editar.html',
             {"request": request, "veiculo": form_data_dict, "form_error": error_details, "marcas_validas": MARCAS_VALIDAS},
-            status_code=api_response.status_code
+            status_code=resposta.status_code
         )
         resposta_com_erro.headers["HX-Reswap"] = "innerHTML"
         return resposta_com_erro
 
 
 @web_router.delete('/action/veiculo-remover/{veiculo_id}', response_class=HTMLResponse)
-async def action_veiculo_remover(veiculo_id: int = Path(...)):
-    api_response, error_conn = delete_api_data(f"/veiculos/{veiculo_id}")
+async def action_veiculo_remover(veiculo_id: int = Path(...), client = Depends(get_veiculo_client)):
+    resposta = await client.remover_veiculo(veiculo_id)
 
-    if error_conn:
+    if resposta.status_code is None:
         return HTMLResponse(
-            content=f"<div class='error' hx-swap-oob='true' id='error-messages'>Erro de comunicação com API: {error_conn}</div>",
+            content=f"<div class='error' hx-swap-oob='true' id='error-messages'>Erro de comunicação com API: {resposta.error}</div>",
             status_code=500
         )
 
-    if api_response.status_code == 200 or api_response.status_code == 204: # OK ou No Content
-        return HTMLResponse(content="", status_code=200)
-    elif api_response.status_code == 404:
+    if resposta.status_code == 200 or resposta.status_code == 204: # OK ou No Content
+        # A linha é removida pelo próprio swap (hx-target="closest tr"); só os badges vão fora de banda
+        return HTMLResponse(content=fragmentos_oob(estatisticas=resposta.estatisticas), status_code=200)
+    elif resposta.status_code == 404:
         return HTMLResponse(content="", status_code=200) # HTMX remove o item da UI
     else:
-        error_msg = f"Erro ao remover veículo (ID: {veiculo_id}). Status: {api_response.status_code}"
-        try:
-            error_data = api_response.json()
-            error_msg = error_data.get("detail", error_msg)
-        except ValueError:
-            error_msg = api_response.text or error_msg
+        error_msg = resposta.error or f"Erro ao remover veículo (ID: {veiculo_id}). Status: {resposta.status_code}"
         return HTMLResponse(
             content=f"<div class='error' hx-swap-oob='true' id='error-messages'>{error_msg}</div>",
-            status_code=api_response.status_code
-        )
\ No newline at end of file
+            status_code=resposta.status_code
+        )
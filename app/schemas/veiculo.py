@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class VeiculoBase(BaseModel):
@@ -81,3 +81,99 @@ class Veiculo(VeiculoBase):
         },
         "from_attributes": True
     }
+
+class VeiculoUpdateLote(VeiculoUpdate):
+    # Item de uma atualização em lote: o ID do veículo mais os campos a alterar
+    id: int
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "id": 1,
+                    "vendido": True,
+                }
+            ]
+        }
+    }
+
+class ErroItemLote(BaseModel):
+    indice: int = Field(..., description="Posição do item no lote (a partir de 0)")
+    id: Optional[int] = Field(None, description="ID do veículo, nas atualizações e remoções")
+    erro: str
+
+class ResultadoLote(BaseModel):
+    total: int = Field(..., description="Itens recebidos")
+    processados: int = Field(..., description="Itens gravados")
+    erros: List[ErroItemLote] = []
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "total": 3,
+                    "processados": 2,
+                    "erros": [{"indice": 1, "id": None, "erro": "Marca inválida: Xpto. Marcas permitidas: ..."}],
+                }
+            ]
+        }
+    }
+
+class FacetaMarca(BaseModel):
+    marca: str
+    quantidade: int
+
+class FacetaAno(BaseModel):
+    ano: int
+    quantidade: int
+
+class FacetaDecada(BaseModel):
+    decada: str = Field(..., description="Início da década seguido de \"s\" (ex.: \"2010s\")")
+    quantidade: int
+
+class FacetaVendido(BaseModel):
+    vendido: bool
+    quantidade: int
+
+class Facetas(BaseModel):
+    total: int = Field(..., description="Veículos que atendem aos filtros")
+    marcas: List[FacetaMarca] = Field(..., description="Por marca do catálogo, da mais frequente para a menos")
+    anos: List[FacetaAno] = Field(..., description="Por ano, do mais recente para o mais antigo")
+    decadas: List[FacetaDecada] = Field(..., description="Por década, da mais recente para a mais antiga")
+    vendido: List[FacetaVendido] = Field(..., description="Por status de venda")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "total": 3,
+                    "marcas": [{"marca": "Fiat", "quantidade": 2}, {"marca": "Ford", "quantidade": 1}],
+                    "anos": [{"ano": 2021, "quantidade": 1}, {"ano": 2019, "quantidade": 2}],
+                    "decadas": [{"decada": "2020s", "quantidade": 1}, {"decada": "2010s", "quantidade": 2}],
+                    "vendido": [{"vendido": False, "quantidade": 2}, {"vendido": True, "quantidade": 1}],
+                }
+            ]
+        }
+    }
+
+class Importacao(BaseModel):
+    id: int
+    arquivo: str
+    formato: str
+    registros_processados: int = Field(..., description="Registros do arquivo já lidos e gravados (checkpoint)")
+    inseridos: int
+    rejeitados: int
+    concluida: bool
+    created: datetime
+    updated: datetime
+
+    model_config = {"from_attributes": True}
+
+class RejeicaoImportacao(BaseModel):
+    linha: int = Field(..., description="Linha do arquivo (no CSV, a linha em que o registro termina)")
+    erro: str
+
+class ResultadoImportacao(Importacao):
+    rejeicoes: List[RejeicaoImportacao] = Field(
+        [], description="Primeiras rejeições desta execução (o total está em `rejeitados`)"
+    )
@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+# Cache de leitura (read-through) usado pelo AsyncVeiculoService.obter_veiculo.
+#
+# O backend padrão é um LRU em memória, por processo, limitado em quantidade de itens
+# e com expiração (TTL). Para compartilhar o cache entre processos (vários workers do
+# uvicorn), implemente CacheBackend sobre um serviço externo (ex.: Redis) e substitua a
+# dependência `get_cache_veiculos` — nesse caso o backend deve serializar os valores
+# (os veículos são schemas Pydantic: `model_dump_json`/`model_validate_json`).
+#
+# Com o backend em memória e vários workers, uma escrita invalida apenas o cache do
+# worker que a atendeu; os demais podem servir o valor antigo por até TTL segundos.
+
+CACHE_VEICULOS_MAX_ITENS = int(os.environ.get("TINNOVA_CACHE_VEICULOS_MAX_ITENS", "10000"))
+CACHE_VEICULOS_TTL = float(os.environ.get("TINNOVA_CACHE_VEICULOS_TTL", "60"))
+
+# Cache dos fragmentos HTML renderizados pela interface web (ver `chave_fragmento`)
+CACHE_FRAGMENTOS_MAX_ITENS = int(os.environ.get("TINNOVA_CACHE_FRAGMENTOS_MAX_ITENS", "500"))
+CACHE_FRAGMENTOS_TTL = float(os.environ.get("TINNOVA_CACHE_FRAGMENTOS_TTL", "300"))
+
+# Cache das contagens por facetas (ver `chave_facetas`). O TTL curto limita o tempo em que
+# um worker serve contagens anteriores a uma escrita atendida por outro worker
+CACHE_FACETAS_MAX_ITENS = int(os.environ.get("TINNOVA_CACHE_FACETAS_MAX_ITENS", "1000"))
+CACHE_FACETAS_TTL = float(os.environ.get("TINNOVA_CACHE_FACETAS_TTL", "5"))
+
+# Valores dos badges de estatísticas (ver `ContadoresBadges`): por quanto tempo, desde a
+# última leitura do banco, os valores mantidos com os deltas das escritas são usados
+CACHE_BADGES_TTL = float(os.environ.get("TINNOVA_CACHE_BADGES_TTL", "60"))
+
+class CacheBackend(ABC):
+    """
+    Interface dos backends de cache. Os métodos são assíncronos para permitir
+    backends com I/O de rede sem bloquear o event loop.
+    """
+
+    @abstractmethod
+    async def obter(self, chave: str) -> Optional[Any]:
+        """Retorna o valor da chave, ou None se ausente ou expirado."""
+
+    @abstractmethod
+    async def gravar(self, chave: str, valor: Any) -> None:
+        """Grava o valor da chave."""
+
+    @abstractmethod
+    async def invalidar(self, chaves: Iterable[str]) -> None:
+        """Remove as chaves do cache."""
+
+    @abstractmethod
+    async def limpar(self) -> None:
+        """Remove todas as chaves."""
+
+    @abstractmethod
+    def metricas(self) -> Dict[str, Any]:
+        """Contadores de uso (acertos, falhas, remoções por limite de tamanho, ...)."""
+
+class LRUCache(CacheBackend):
+    """
+    Cache em memória com política LRU, limitado a `max_itens` entradas, cada uma
+    válida por `ttl` segundos. Seguro para uso concorrente entre threads.
+    """
+
+    def __init__(self, max_itens: int = CACHE_VEICULOS_MAX_ITENS, ttl: float = CACHE_VEICULOS_TTL):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes_por_tamanho = 0
+        self.expiracoes = 0
+        self.invalidacoes = 0
+
+    async def obter(self, chave: str) -> Optional[Any]:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[0] <= time.monotonic():
+                del self._itens[chave]
+                self.expiracoes += 1
+                item = None
+            if item is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[1]
+
+    async def gravar(self, chave: str, valor: Any) -> None:
+        if self.max_itens <= 0:
+            return
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.remocoes_por_tamanho += 1
+
+    async def invalidar(self, chaves: Iterable[str]) -> None:
+        with self._lock:
+            for chave in chaves:
+                if self._itens.pop(chave, None) is not None:
+                    self.invalidacoes += 1
+
+    async def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "backend": "lru",
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "ttl_segundos": self.ttl,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_de_acerto": round(self.acertos / consultas, 4) if consultas else None,
+                "remocoes_por_tamanho": self.remocoes_por_tamanho,
+                "expiracoes": self.expiracoes,
+                "invalidacoes": self.invalidacoes,
+            }
+
+class VersaoDados:
+    """
+    Versão dos dados de veículos, incrementada a cada escrita. Entra na chave de caches
+    de consultas agregadas (listas, estatísticas), que assim deixam de ser servidos após
+    qualquer alteração sem precisar descobrir quais entradas foram afetadas; as entradas
+    de versões antigas saem do cache pela política LRU ou pelo TTL.
+    """
+
+    def __init__(self):
+        self._valor = 0
+        self._lock = threading.Lock()
+
+    @property
+    def valor(self) -> int:
+        return self._valor
+
+    def incrementar(self) -> int:
+        with self._lock:
+            self._valor += 1
+            return self._valor
+
+class ContadoresBadges:
+    """
+    Valores dos badges de estatísticas da interface web (não vendidos e últimos 7 dias),
+    gravados a cada leitura das estatísticas e atualizados com os deltas das escritas
+    deste processo: as ações de escrita respondem com os badges sem reler os contadores.
+
+    Escritas atendidas por outros workers não chegam aqui; por isso os valores só são
+    usados por `ttl` segundos desde a última leitura do banco (aplicar deltas não renova
+    o prazo). Depois disso, `obter` retorna None e os badges são buscados de novo.
+    """
+
+    CAMPOS = ("total_nao_vendidos", "veiculos_ultimos_7_dias")
+
+    def __init__(self, ttl: float = CACHE_BADGES_TTL):
+        self.ttl = ttl
+        self._valores: Optional[Dict[str, int]] = None
+        self._expira_em = 0.0
+        self._lock = threading.Lock()
+
+    def gravar(self, estatisticas: Dict[str, Any]) -> None:
+        with self._lock:
+            self._valores = {campo: estatisticas[campo] for campo in self.CAMPOS}
+            self._expira_em = time.monotonic() + self.ttl
+
+    def aplicar(self, deltas: Dict[str, int]) -> None:
+        with self._lock:
+            if self._valores is not None:
+                for campo, delta in deltas.items():
+                    self._valores[campo] += delta
+
+    def obter(self) -> Optional[Dict[str, int]]:
+        with self._lock:
+            if self._valores is None or self._expira_em <= time.monotonic():
+                return None
+            return dict(self._valores)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._valores = None
+
+cache_veiculos: CacheBackend = LRUCache()
+cache_fragmentos: CacheBackend = LRUCache(CACHE_FRAGMENTOS_MAX_ITENS, CACHE_FRAGMENTOS_TTL)
+cache_facetas: CacheBackend = LRUCache(CACHE_FACETAS_MAX_ITENS, CACHE_FACETAS_TTL)
+versao_veiculos = VersaoDados()
+contadores_badges = ContadoresBadges()
+
+def get_cache_veiculos() -> CacheBackend:
+    """
+    Dependency injection do cache de veículos (substitua para usar um backend compartilhado).
+    """
+    return cache_veiculos
+
+def chave_veiculo(veiculo_id: int) -> str:
+    return f"veiculo:{veiculo_id}"
+
+def get_cache_fragmentos() -> CacheBackend:
+    """
+    Dependency injection do cache de fragmentos HTML da interface web.
+    """
+    return cache_fragmentos
+
+def _normalizar_params(params: Dict[str, Any]) -> str:
+    # Sem valores vazios, em ordem alfabética
+    return "&".join(
+        f"{nome}={valor}" for nome, valor in sorted(params.items()) if valor is not None and valor != ""
+    )
+
+def chave_fragmento(template: str, params: Dict[str, Any], versao: int) -> str:
+    """
+    Chave de um fragmento renderizado: template, versão dos dados e parâmetros
+    normalizados (sem valores vazios, em ordem alfabética).
+    """
+    return f"fragmento:{template}:v{versao}:{_normalizar_params(params)}"
+
+def get_cache_facetas() -> CacheBackend:
+    """
+    Dependency injection do cache de contagens por facetas.
+    """
+    return cache_facetas
+
+def chave_facetas(filtros: Dict[str, Any], versao: int) -> str:
+    """Chave das contagens por facetas: versão dos dados e filtros normalizados."""
+    return f"facetas:v{versao}:{_normalizar_params(filtros)}"
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+# Hub de eventos de alteração dos veículos, em processo.
+#
+# Os métodos de escrita do AsyncVeiculoService (e a importação) publicam um evento compacto
+# após o commit; os endpoints SSE (`GET /api/v1/veiculos/stream` e `GET /ui/stream`) mantêm
+# uma assinatura por conexão e repassam os eventos ao cliente. Sem escritas, uma conexão
+# fica parada em `fila.get()`, acordando só para o keep-alive a cada
+# TINNOVA_SSE_KEEPALIVE segundos (padrão 15).
+#
+# Cada assinatura tem uma fila limitada a TINNOVA_SSE_FILA_MAX eventos (padrão 100). Um
+# cliente lento que deixa a fila encher perde os eventos pendentes e recebe um único
+# evento "recarregar", que manda buscar a lista de novo.
+#
+# Como os caches em memória, o hub é por processo: com vários workers, um cliente só
+# recebe os eventos das escritas atendidas pelo worker em que está conectado.
+
+SSE_KEEPALIVE = float(os.environ.get("TINNOVA_SSE_KEEPALIVE", "15"))
+SSE_FILA_MAX = int(os.environ.get("TINNOVA_SSE_FILA_MAX", "100"))
+
+# Tipos de evento
+CRIADO = "criado"
+ATUALIZADO = "atualizado"
+REMOVIDO = "removido"
+LOTE = "lote" # escritas em lote e importações: muitas linhas, sem os dados de cada uma
+RECARREGAR = "recarregar" # eventos perdidos por fila cheia
+
+@dataclass
+class EventoVeiculo:
+    """
+    Alteração em um veículo (`id`, e os dados após a escrita em `veiculo`, quando houver) ou
+    em vários (`tipo` LOTE, com a quantidade em `total`).
+    """
+    tipo: str
+    id: Optional[int] = None
+    veiculo: Optional[Dict[str, Any]] = None
+    total: Optional[int] = None
+    # Formatações já calculadas (ver `formatar`)
+    _formatados: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            chave: valor
+            for chave, valor in (("tipo", self.tipo), ("id", self.id), ("veiculo", self.veiculo), ("total", self.total))
+            if valor is not None
+        }
+
+    def formatar(self, nome: str, formatador: Callable[["EventoVeiculo"], Any]) -> Any:
+        """
+        Resultado de `formatador` para o evento, calculado uma vez e compartilhado entre as
+        conexões: o JSON ou o HTML de um evento não é refeito para cada cliente.
+        """
+        if nome not in self._formatados:
+            self._formatados[nome] = formatador(self)
+        return self._formatados[nome]
+
+class Assinatura:
+    """Fila de eventos de uma conexão, entregues no event loop em que ela foi criada."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_eventos: int):
+        self.loop = loop
+        self.fila: "asyncio.Queue[EventoVeiculo]" = asyncio.Queue(max_eventos)
+        self.descartados = 0
+
+    def entregar(self, evento: EventoVeiculo) -> None:
+        try:
+            self.fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.descartados += self.fila.qsize()
+            while not self.fila.empty():
+                self.fila.get_nowait()
+            self.fila.put_nowait(EventoVeiculo(RECARREGAR))
+
+class HubEventos:
+    """
+    Distribui os eventos publicados a todas as assinaturas ativas. `publicar` não bloqueia
+    e pode ser chamado de qualquer thread (as rotas síncronas, como a importação, rodam no
+    threadpool): a entrega é agendada no event loop de cada assinatura.
+    """
+
+    def __init__(self, max_eventos: int = SSE_FILA_MAX):
+        self.max_eventos = max_eventos
+        self._assinaturas: Set[Assinatura] = set()
+        self._lock = threading.Lock()
+        self.publicados = 0
+
+    def assinar(self) -> Assinatura:
+        """Nova assinatura, no event loop em execução."""
+        assinatura = Assinatura(asyncio.get_running_loop(), self.max_eventos)
+        with self._lock:
+            self._assinaturas.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura) -> None:
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    def publicar(self, evento: EventoVeiculo) -> None:
+        with self._lock:
+            self.publicados += 1
+            assinaturas: List[Assinatura] = list(self._assinaturas)
+        if not assinaturas:
+            return
+        try:
+            loop_atual = asyncio.get_running_loop()
+        except RuntimeError:
+            loop_atual = None
+        for assinatura in assinaturas:
+            if assinatura.loop is loop_atual:
+                assinatura.entregar(evento)
+            elif not assinatura.loop.is_closed():
+                assinatura.loop.call_soon_threadsafe(assinatura.entregar, evento)
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "conexoes": len(self._assinaturas),
+                "eventos_publicados": self.publicados,
+                "eventos_descartados": sum(assinatura.descartados for assinatura in self._assinaturas),
+            }
+
+hub_eventos = HubEventos()
+
+def get_hub_eventos() -> HubEventos:
+    """
+    Dependency injection do hub de eventos dos veículos.
+    """
+    return hub_eventos
+
+def mensagem_sse(evento: str, dados: str) -> str:
+    """Mensagem no formato text/event-stream (cada linha de `dados` vira uma linha `data:`)."""
+    linhas = "".join(f"data: {linha}\n" for linha in dados.split("\n"))
+    return f"event: {evento}\n{linhas}\n"
+
+def evento_json(evento: EventoVeiculo) -> str:
+    """Mensagem SSE da API: o nome é o tipo do evento e os dados, o evento em JSON."""
+    return mensagem_sse(evento.tipo, json.dumps(evento.como_dict(), default=str, separators=(",", ":")))
+
+async def transmitir_eventos(
+    hub: HubEventos,
+    formatar: Callable[[EventoVeiculo], str],
+    keepalive: float = SSE_KEEPALIVE
+) -> AsyncIterator[str]:
+    """
+    Corpo de uma resposta SSE: as mensagens de `formatar` para cada evento publicado e, sem
+    eventos, um comentário a cada `keepalive` segundos (mantém proxies e balanceadores com
+    a conexão aberta). A assinatura é cancelada quando o cliente desconecta.
+    """
+    assinatura = hub.assinar()
+    try:
+        # Comentário inicial: o cliente recebe os cabeçalhos e a conexão já fica aberta
+        yield ": conectado\n\n"
+        while True:
+            try:
+                evento = await asyncio.wait_for(assinatura.fila.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield evento.formatar(formatar.__name__, formatar)
+    finally:
+        hub.cancelar(assinatura)
@@ -0,0 +1,77 @@
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Optional, Sequence
+
+from pydantic_core import to_json
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.veiculo import COLUNAS_EXPORTACAO, nome_dialeto, query_exportacao
+
+# Exportação do inventário em streaming: as linhas são lidas de um cursor do lado do
+# servidor em partições de tamanho fixo e cada partição é codificada e enviada antes
+# da seguinte ser lida, de modo que a memória não depende do tamanho do resultado.
+
+CAMPOS_EXPORTACAO = COLUNAS_EXPORTACAO
+
+TIPOS_EXPORTACAO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+LINHAS_POR_PARTICAO = 1000
+
+def codificar_ndjson(linhas: Sequence[Any]) -> bytes:
+    """
+    Codifica as linhas como NDJSON (um objeto JSON por linha). O encoder do pydantic-core
+    gera as datas no mesmo formato das respostas da API e escreve direto em bytes UTF-8.
+    """
+    return b"".join(to_json(dict(zip(CAMPOS_EXPORTACAO, linha))) + b"\n" for linha in linhas)
+
+def _booleano_csv(valor: Optional[bool]) -> Optional[str]:
+    return None if valor is None else ("true" if valor else "false")
+
+def _data_csv(valor: Optional[datetime]) -> Optional[str]:
+    return None if valor is None else valor.isoformat()
+
+def codificar_csv(linhas: Sequence[Any]) -> bytes:
+    """
+    Codifica as linhas como CSV. As linhas seguem a ordem de `CAMPOS_EXPORTACAO` (a das
+    colunas de `query_exportacao`); só as colunas booleana e de data são convertidas.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        (id_, veiculo, marca, ano, descricao, _booleano_csv(vendido), _data_csv(created), _data_csv(updated))
+        for id_, veiculo, marca, ano, descricao, vendido, created, updated in linhas
+    )
+    return buffer.getvalue().encode()
+
+def cabecalho_csv() -> bytes:
+    return (",".join(CAMPOS_EXPORTACAO) + "\n").encode()
+
+async def exportar_veiculos(
+    session_factory: Callable[[], AsyncSession],
+    formato: str = "ndjson",
+    marca: Optional[str] = None,
+    ano: Optional[int] = None,
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    q: Optional[str] = None,
+    linhas_por_particao: int = LINHAS_POR_PARTICAO
+) -> AsyncIterator[bytes]:
+    """
+    Gera o conteúdo da exportação em blocos de bytes, um por partição de linhas.
+    Abre a própria sessão (com `session_factory`), que fica aberta enquanto o
+    resultado é consumido.
+    """
+    codificar = codificar_csv if formato == "csv" else codificar_ndjson
+    if formato == "csv":
+        yield cabecalho_csv()
+    async with session_factory() as db:
+        query = query_exportacao(marca=marca, ano=ano, cor=cor, vendido=vendido, q=q, dialect_name=nome_dialeto(db))
+        # stream() usa um cursor do lado do servidor (stream_results); yield_per limita as
+        # linhas mantidas em memória pelo driver e pelo Result a uma partição.
+        resultado = await db.stream(query.execution_options(yield_per=linhas_por_particao))
+        async for particao in resultado.partitions():
+            yield codificar(particao)
@@ -0,0 +1,181 @@
+import codecs
+import csv
+import json
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.models.importacao import ImportacaoVeiculos
+from app.replicas import usar_primario
+from app.schemas.veiculo import Importacao, RejeicaoImportacao, ResultadoImportacao
+from app.services.cache import contadores_badges, versao_veiculos
+from app.services.eventos import LOTE, EventoVeiculo, hub_eventos
+from app.services.veiculo import TAMANHO_BLOCO_PADRAO, formatar_erros_validacao, validar_item_criacao
+from app.src import veiculo as crud_veiculo
+from app.src.estatisticas import deltas_dos_badges, retirar_deltas
+
+# Importação de veículos a partir de arquivos CSV ou NDJSON, usada pela rota
+# POST /api/v1/veiculos/import e pelo script scripts/importar_veiculos.py.
+#
+# O arquivo é lido como um gerador de registros, sem carregá-lo inteiro; os registros
+# válidos são gravados em lotes de `tamanho_lote`, cada um em uma transação que também
+# avança o checkpoint da importação. A memória fica limitada ao tamanho do lote.
+
+FORMATOS_IMPORTACAO = ("csv", "ndjson")
+
+Registro = Tuple[int, Any]
+
+class RegistroInvalido:
+    """Registro que não pôde ser lido do arquivo (ex.: JSON malformado)."""
+
+    def __init__(self, erro: str):
+        self.erro = erro
+
+def detectar_formato(nome_arquivo: str, formato: Optional[str] = None) -> str:
+    """Formato explícito ou deduzido da extensão do arquivo. Levanta HTTP 400 se não for suportado."""
+    formato = (formato or nome_arquivo.rsplit(".", 1)[-1]).lower()
+    if formato == "jsonl":
+        formato = "ndjson"
+    if formato not in FORMATOS_IMPORTACAO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato de importação não suportado: {formato}. Use csv ou ndjson"
+        )
+    return formato
+
+def ler_ndjson(arquivo: BinaryIO) -> Iterator[Registro]:
+    """Gera (linha, objeto) para cada linha não vazia do arquivo NDJSON."""
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except ValueError:
+            yield numero, RegistroInvalido("JSON inválido")
+
+def ler_csv(arquivo: BinaryIO) -> Iterator[Registro]:
+    """
+    Gera (linha, dicionário) para cada registro do CSV, usando a primeira linha como
+    cabeçalho. Campos vazios são omitidos, para que os valores padrão do schema se apliquem.
+    """
+    texto = codecs.getreader("utf-8-sig")(arquivo)
+    leitor = csv.DictReader(texto)
+    for registro in leitor:
+        if None in registro:
+            yield leitor.line_num, RegistroInvalido("Quantidade de colunas maior que a do cabeçalho")
+            continue
+        yield leitor.line_num, {campo: valor for campo, valor in registro.items() if valor not in (None, "")}
+
+def ler_registros(arquivo: BinaryIO, formato: str) -> Iterator[Registro]:
+    return ler_csv(arquivo) if formato == "csv" else ler_ndjson(arquivo)
+
+def validar_registro(item: Any) -> dict:
+    """Valida um registro do arquivo com as mesmas regras de `POST /veiculos/`."""
+    if isinstance(item, RegistroInvalido):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=item.erro)
+    return validar_item_criacao(item).model_dump()
+
+def criar_importacao(db: Session, arquivo: str, formato: str) -> ImportacaoVeiculos:
+    """Registra uma nova importação, com o checkpoint no início do arquivo."""
+    importacao = ImportacaoVeiculos(arquivo=arquivo[:255], formato=formato)
+    db.add(importacao)
+    db.commit()
+    db.refresh(importacao)
+    return importacao
+
+def obter_importacao(db: Session, importacao_id: int) -> ImportacaoVeiculos:
+    """Retorna a importação pelo ID. Levanta HTTP 404 se não existir."""
+    importacao = db.get(ImportacaoVeiculos, importacao_id)
+    if not importacao:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Importação não encontrada")
+    return importacao
+
+def importar_veiculos(
+    db: Session,
+    importacao: ImportacaoVeiculos,
+    registros: Iterator[Registro],
+    tamanho_lote: int = TAMANHO_BLOCO_PADRAO,
+    ao_rejeitar: Optional[Callable[[RejeicaoImportacao], None]] = None,
+    ao_gravar_lote: Optional[Callable[[ImportacaoVeiculos], None]] = None
+) -> ImportacaoVeiculos:
+    """
+    Importa os registros para a tabela de veículos, a partir do checkpoint da importação
+    (os primeiros `registros_processados` registros são pulados sem validação).
+
+    A cada `tamanho_lote` registros lidos, os válidos são inseridos e o checkpoint é
+    avançado na mesma transação. `ao_rejeitar` recebe cada registro rejeitado, com o
+    motivo, e `ao_gravar_lote` é chamado após cada commit (para relatar o progresso).
+    """
+    ja_processados = importacao.registros_processados
+    lote: List[dict] = []
+    rejeitados = 0
+    pendentes = 0
+
+    def gravar_lote():
+        # As alterações do checkpoint são enviadas pelo flush do commit de create_veiculos,
+        # na mesma transação dos veículos do lote.
+        importacao.registros_processados += pendentes
+        importacao.inseridos += len(lote)
+        importacao.rejeitados += rejeitados
+        crud_veiculo.create_veiculos(db, lote, tamanho_lote)
+        if lote:
+            versao_veiculos.incrementar()
+            contadores_badges.aplicar(deltas_dos_badges(retirar_deltas(db.info)))
+            hub_eventos.publicar(EventoVeiculo(LOTE, total=len(lote)))
+        if ao_gravar_lote:
+            ao_gravar_lote(importacao)
+
+    for posicao, (linha, item) in enumerate(registros, start=1):
+        if posicao <= ja_processados:
+            continue
+        pendentes += 1
+        try:
+            lote.append(validar_registro(item))
+        except ValidationError as e:
+            rejeitados += 1
+            if ao_rejeitar:
+                ao_rejeitar(RejeicaoImportacao(linha=linha, erro=formatar_erros_validacao(e.errors())))
+        except HTTPException as e:
+            rejeitados += 1
+            if ao_rejeitar:
+                ao_rejeitar(RejeicaoImportacao(linha=linha, erro=str(e.detail)))
+        if pendentes >= tamanho_lote:
+            gravar_lote()
+            lote, rejeitados, pendentes = [], 0, 0
+
+    importacao.concluida = True
+    gravar_lote()
+    return importacao
+
+MAX_REJEICOES_RESPOSTA = 1000
+
+def executar_importacao(
+    db: Session,
+    arquivo: BinaryIO,
+    nome_arquivo: str,
+    formato: Optional[str] = None,
+    importacao_id: Optional[int] = None,
+    tamanho_lote: int = TAMANHO_BLOCO_PADRAO
+) -> ResultadoImportacao:
+    """
+    Inicia uma importação (ou retoma a de `importacao_id`) e processa o arquivo até o fim.
+    Retorna o estado final da importação e as primeiras rejeições desta execução.
+    """
+    usar_primario(db)
+    if importacao_id is not None:
+        importacao = obter_importacao(db, importacao_id)
+        formato = importacao.formato
+    else:
+        formato = detectar_formato(nome_arquivo, formato)
+        importacao = criar_importacao(db, nome_arquivo, formato)
+
+    rejeicoes: List[RejeicaoImportacao] = []
+
+    def guardar_rejeicao(rejeicao: RejeicaoImportacao):
+        if len(rejeicoes) < MAX_REJEICOES_RESPOSTA:
+            rejeicoes.append(rejeicao)
+
+    importar_veiculos(db, importacao, ler_registros(arquivo, formato), tamanho_lote, ao_rejeitar=guardar_rejeicao)
+    return ResultadoImportacao(**Importacao.model_validate(importacao).model_dump(), rejeicoes=rejeicoes)
@@ -1,20 +1,158 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Tuple
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from datetime import datetime
+import base64
+import binascii
+import json
 
+from app.replicas import usar_primario
 from app.src import veiculo as crud_veiculo
-from app.schemas.veiculo import VeiculoCreate, VeiculoUpdate, Veiculo
+from app.src.marcas import MARCAS, buscar_marca
+from app.src import estatisticas as crud_estatisticas
+from app.schemas.veiculo import VeiculoCreate, VeiculoUpdate, VeiculoUpdateLote, Veiculo, ErroItemLote
 
-MARCAS_VALIDAS = [
-    "Chevrolet", "Ford", "Volkswagen", "Fiat", "Toyota", "Honda", "Hyundai",
-    "Nissan", "Renault", "Peugeot", "Citroën", "Jeep", "Kia", "BMW",
-    "Mercedes-Benz", "Audi", "Mitsubishi", "Chery", "Subaru", "Volvo"
-]
+# Nomes canônicos do catálogo de marcas (app/src/marcas.py), na ordem dos IDs
+MARCAS_VALIDAS = [nome for _, nome in MARCAS]
 
 def is_valid_marca(marca: str) -> bool:
-    """Verifica se a marca fornecida está na lista de marcas válidas (case-insensitive)."""
-    return marca.capitalize() in MARCAS_VALIDAS
+    """
+    Verifica se a marca está no catálogo, sem diferenciar maiúsculas, acentos e
+    separadores ("bmw", "Mercedes Benz", "Citroen"). Busca O(1) em um dicionário.
+    """
+    return buscar_marca(marca) is not None
+
+def validar_ano(ano: int) -> None:
+    """Levanta HTTP 400 se o ano estiver fora do intervalo aceito (1900 até o ano atual)."""
+    ano_atual = datetime.now().year
+    if ano < 1900 or ano > ano_atual:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ano inválido. Deve estar entre 1900 e {ano_atual}"
+        )
+
+def validar_marca_permitida(marca: str) -> None:
+    """Levanta HTTP 400 se a marca não estiver na lista de marcas válidas."""
+    if not is_valid_marca(marca):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Marca inválida: {marca}. Marcas permitidas: {', '.join(MARCAS_VALIDAS)}"
+        )
+
+def formatar_erros_validacao(errors) -> str:
+    """Converte uma lista de erros de validação (Pydantic/FastAPI) em uma mensagem legível."""
+    return "; ".join([f"{(e.get('loc') or ['item'])[-1]}: {e.get('msg', '')}" for e in errors])
+
+def veiculo_nao_encontrado() -> HTTPException:
+    """Exceção HTTP 404 padrão para veículos inexistentes."""
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Veículo não encontrado"
+    )
+
+def codificar_cursor(ultimo_id: int) -> str:
+    """Gera o cursor opaco que aponta para a página seguinte ao veículo `ultimo_id`."""
+    payload = json.dumps({"id": ultimo_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str) -> int:
+    """Extrai o último ID de um cursor gerado por `codificar_cursor`. Levanta HTTP 400 se for inválido."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ultimo_id = json.loads(payload)["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        ultimo_id = None
+    if not isinstance(ultimo_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+    return ultimo_id
+
+# --- Projeção de campos (fields=) ---
+
+# Campos do schema de resposta `Veiculo`, com o ID primeiro
+CAMPOS_VEICULO = ["id"] + [campo for campo in Veiculo.model_fields if campo != "id"]
+
+def normalizar_campos(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Converte o parâmetro `fields` (nomes separados por vírgula) na lista de campos a
+    selecionar, na ordem de `CAMPOS_VEICULO` e sempre com o `id` (usado no cursor).
+    Retorna None sem `fields`. Levanta HTTP 400 para campos fora do schema `Veiculo`.
+    """
+    if not fields or not fields.strip():
+        return None
+    pedidos = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    invalidos = sorted(pedidos - set(CAMPOS_VEICULO))
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos em fields: {', '.join(invalidos)}. Campos disponíveis: {', '.join(CAMPOS_VEICULO)}"
+        )
+    return [campo for campo in CAMPOS_VEICULO if campo == "id" or campo in pedidos]
+
+# --- Validação de lotes ---
+
+TAMANHO_BLOCO_PADRAO = 1000
+
+def validar_item_criacao(item: Any) -> VeiculoCreate:
+    """Valida um item de criação em lote: schema `VeiculoCreate` e regras de ano e marca."""
+    veiculo = VeiculoCreate.model_validate(item)
+    validar_ano(veiculo.ano)
+    validar_marca_permitida(veiculo.marca)
+    return veiculo
+
+def validar_item_atualizacao(item: Any) -> VeiculoUpdateLote:
+    """Valida um item de atualização em lote: schema `VeiculoUpdateLote` e regras de ano e marca."""
+    veiculo = VeiculoUpdateLote.model_validate(item)
+    if veiculo.marca is not None:
+        validar_marca_permitida(veiculo.marca)
+    if veiculo.ano is not None:
+        validar_ano(veiculo.ano)
+    return veiculo
+
+def validar_id_remocao(item: Any) -> int:
+    """Valida um item de remoção em lote, que deve ser o ID (inteiro) do veículo."""
+    if not isinstance(item, int) or isinstance(item, bool):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID inválido: esperado um número inteiro")
+    return item
+
+def _id_do_item(item: Any) -> Optional[int]:
+    valor = item.get("id") if isinstance(item, dict) else item
+    return valor if isinstance(valor, int) and not isinstance(valor, bool) else None
+
+def validar_lote(itens: List[Any], validar: Callable[[Any], Any]) -> Tuple[List[Tuple[int, Any]], List[ErroItemLote]]:
+    """
+    Aplica `validar` a cada item do lote. Retorna os itens válidos (com sua posição no
+    lote) e um erro por item inválido, sem interromper a validação dos demais.
+    """
+    validos, erros = [], []
+    for indice, item in enumerate(itens):
+        try:
+            validos.append((indice, validar(item)))
+        except ValidationError as e:
+            erros.append(ErroItemLote(indice=indice, id=_id_do_item(item), erro=formatar_erros_validacao(e.errors())))
+        except HTTPException as e:
+            erros.append(ErroItemLote(indice=indice, id=_id_do_item(item), erro=str(e.detail)))
+    return validos, erros
+
+def separar_ids_repetidos(
+    validos: List[Tuple[int, Any]],
+    id_do_item: Callable[[Any], int]
+) -> Tuple[Dict[int, Tuple[int, Any]], List[ErroItemLote]]:
+    """
+    Indexa os itens válidos pelo ID do veículo. A primeira ocorrência de cada ID é
+    mantida; as demais viram erro, já que o resultado dependeria da ordem de aplicação.
+    """
+    por_id, erros = {}, []
+    for indice, item in validos:
+        veiculo_id = id_do_item(item)
+        if veiculo_id in por_id:
+            erros.append(ErroItemLote(indice=indice, id=veiculo_id, erro="ID repetido no lote"))
+        else:
+            por_id[veiculo_id] = (indice, item)
+    return por_id, erros
 
 class VeiculoService:
     def __init__(self, db: Session):
@@ -24,18 +162,9 @@ class VeiculoService:
         """
         Cria um novo veículo com validações adicionais.
         """
-        ano_atual = datetime.now().year
-        if veiculo.ano < 1900 or veiculo.ano > ano_atual:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Ano inválido. Deve estar entre 1900 e {ano_atual}"
-            )
-
-        if not is_valid_marca(veiculo.marca):
-             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Marca inválida: {veiculo.marca}. Marcas permitidas: {', '.join(MARCAS_VALIDAS)}"
-            )
+        usar_primario(self.db)
+        validar_ano(veiculo.ano)
+        validar_marca_permitida(veiculo.marca)
 
         db_veiculo = crud_veiculo.create_veiculo(self.db, veiculo)
         return Veiculo.model_validate(db_veiculo)
@@ -46,10 +175,7 @@ class VeiculoService:
         """
         db_veiculo = crud_veiculo.get_veiculo(self.db, veiculo_id)
         if not db_veiculo:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Veículo não encontrado"
-            )
+            raise veiculo_nao_encontrado()
         return Veiculo.model_validate(db_veiculo)
 
     def listar_veiculos(
@@ -81,64 +207,45 @@ class VeiculoService:
         """
         Atualiza um veículo existente com validações.
         """
-        db_veiculo = crud_veiculo.get_veiculo(self.db, veiculo_id)
-        if not db_veiculo:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Veículo não encontrado"
-            )
-
         if veiculo_update.marca is not None:
-             if not is_valid_marca(veiculo_update.marca):
-                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Marca inválida: {veiculo_update.marca}. Marcas permitidas: {', '.join(MARCAS_VALIDAS)}"
-                )
+            validar_marca_permitida(veiculo_update.marca)
 
         if veiculo_update.ano is not None:
-            ano_atual = datetime.now().year
-            if veiculo_update.ano < 1900 or veiculo_update.ano > ano_atual:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Ano inválido. Deve estar entre 1900 e {ano_atual}"
-                )
+            validar_ano(veiculo_update.ano)
 
+        # A existência é verificada na própria escrita, que lê o veículo com a linha bloqueada
+        usar_primario(self.db)
         db_veiculo = crud_veiculo.update_veiculo(
             self.db,
             veiculo_id,
             veiculo_update
         )
+        if not db_veiculo:
+            raise veiculo_nao_encontrado()
         return Veiculo.model_validate(db_veiculo)
 
     def remover_veiculo(self, veiculo_id: int) -> Dict[str, str]:
         """
         Remove um veículo com validações.
         """
+        usar_primario(self.db)
         if not crud_veiculo.delete_veiculo(self.db, veiculo_id):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Veículo não encontrado"
-            )
+            raise veiculo_nao_encontrado()
         return {"message": "Veículo removido com sucesso"}
 
     def obter_estatisticas(self) -> Dict[str, Any]:
         """
-        Retorna estatísticas gerais sobre os veículos.
+        Retorna estatísticas gerais sobre os veículos, lidas dos contadores
+        mantidos incrementalmente (custo constante, independente do número de veículos).
         """
-        return {
-            "total_nao_vendidos": crud_veiculo.count_veiculos_nao_vendidos(self.db),
-            "distribuicao_por_decada": crud_veiculo.get_distribuicao_por_decada(self.db),
-            "distribuicao_por_fabricante": crud_veiculo.get_distribuicao_por_fabricante(self.db),
-            "veiculos_ultimos_7_dias": len(crud_veiculo.get_veiculos_ultimos_7_dias(self.db))
-        }
+        return crud_estatisticas.get_estatisticas(self.db)
 
-    def obter_veiculos_nao_vendidos(self) -> List[Veiculo]:
+    def obter_veiculos_nao_vendidos(self, skip: int = 0, limit: int = 100) -> List[Veiculo]:
         """
-        Retorna lista de veículos não vendidos.
+        Retorna lista de veículos não vendidos (filtrados no banco).
         """
-        veiculos = crud_veiculo.get_veiculos(self.db)
-        nao_vendidos = [v for v in veiculos if not v.vendido]
-        return [Veiculo.model_validate(v) for v in nao_vendidos]
+        veiculos = crud_veiculo.get_veiculos(self.db, skip=skip, limit=limit, vendido=False)
+        return [Veiculo.model_validate(v) for v in veiculos]
 
     def obter_veiculos_recentes(self) -> List[Veiculo]:
         """
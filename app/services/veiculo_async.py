@@ -0,0 +1,331 @@
+from typing import List, Optional, Dict, Any, Tuple, Union
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.replicas import usar_primario
+from app.src import veiculo_async as crud_veiculo
+from app.src import estatisticas_async as crud_estatisticas
+from app.src.estatisticas import deltas_dos_badges, retirar_deltas
+from app.schemas.veiculo import VeiculoCreate, VeiculoUpdate, Veiculo, ErroItemLote, ResultadoLote
+from app.services.cache import CacheBackend, chave_facetas, chave_veiculo, contadores_badges, versao_veiculos
+from app.services.eventos import ATUALIZADO, CRIADO, LOTE, REMOVIDO, EventoVeiculo, hub_eventos
+from app.services.veiculo import (
+    validar_ano,
+    validar_marca_permitida,
+    veiculo_nao_encontrado,
+    codificar_cursor,
+    decodificar_cursor,
+    TAMANHO_BLOCO_PADRAO,
+    validar_item_criacao,
+    validar_item_atualizacao,
+    validar_id_remocao,
+    validar_lote,
+    separar_ids_repetidos,
+)
+
+class AsyncVeiculoService:
+    """
+    Versão assíncrona do VeiculoService, usada pelas rotas da API e pela interface web.
+    As regras de negócio (validação de ano e marca) são as mesmas.
+
+    Com `cache`, `obter_veiculo` consulta o cache antes do banco (read-through) e as
+    escritas invalidam as chaves dos veículos alterados ou removidos. Toda escrita também
+    incrementa `versao_veiculos`, usada pelo cache de facetas (`cache_facetas`, de
+    `obter_facetas`), aplica os deltas das estatísticas aos `contadores_badges` e publica
+    um evento no `hub_eventos` (transmitido às conexões SSE).
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        cache: Optional[CacheBackend] = None,
+        cache_facetas: Optional[CacheBackend] = None
+    ):
+        self.db = db
+        self.cache = cache
+        self.cache_facetas = cache_facetas
+
+    async def _invalidar_cache(self, ids=()) -> None:
+        versao_veiculos.incrementar()
+        contadores_badges.aplicar(deltas_dos_badges(retirar_deltas(self.db.info)))
+        if self.cache is not None and ids:
+            await self.cache.invalidar([chave_veiculo(veiculo_id) for veiculo_id in ids])
+
+    async def criar_veiculo(self, veiculo: VeiculoCreate) -> Veiculo:
+        """
+        Cria um novo veículo com validações adicionais.
+        """
+        usar_primario(self.db)
+        validar_ano(veiculo.ano)
+        validar_marca_permitida(veiculo.marca)
+
+        db_veiculo = await crud_veiculo.create_veiculo(self.db, veiculo)
+        await self._invalidar_cache()
+        criado = Veiculo.model_validate(db_veiculo)
+        hub_eventos.publicar(EventoVeiculo(CRIADO, criado.id, criado.model_dump(mode="json")))
+        return criado
+
+    async def obter_veiculo(self, veiculo_id: int) -> Veiculo:
+        """
+        Obtém um veículo específico por ID, do cache quando disponível.
+        """
+        if self.cache is not None:
+            veiculo = await self.cache.obter(chave_veiculo(veiculo_id))
+            if veiculo is not None:
+                return veiculo
+            # O valor lido vai para o cache, que só é invalidado na próxima escrita: lido do
+            # primário, já que uma réplica atrasada deixaria o cache com a versão anterior
+            usar_primario(self.db)
+
+        db_veiculo = await crud_veiculo.get_veiculo(self.db, veiculo_id)
+        if not db_veiculo:
+            raise veiculo_nao_encontrado()
+        veiculo = Veiculo.model_validate(db_veiculo)
+        if self.cache is not None:
+            await self.cache.gravar(chave_veiculo(veiculo_id), veiculo)
+        return veiculo
+
+    async def listar_veiculos(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        marca: Optional[str] = None,
+        ano: Optional[int] = None,
+        cor: Optional[str] = None,
+        vendido: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        q: Optional[str] = None,
+        campos: Optional[List[str]] = None
+    ) -> List[Union[Veiculo, Dict[str, Any]]]:
+        """
+        Lista veículos com filtros opcionais.
+        """
+        veiculos, _ = await self.listar_veiculos_paginado(
+            skip=skip, limit=limit, marca=marca, ano=ano, cor=cor, vendido=vendido, cursor=cursor, q=q,
+            campos=campos
+        )
+        return veiculos
+
+    async def listar_veiculos_paginado(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        marca: Optional[str] = None,
+        ano: Optional[int] = None,
+        cor: Optional[str] = None,
+        vendido: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        q: Optional[str] = None,
+        campos: Optional[List[str]] = None
+    ) -> Tuple[List[Union[Veiculo, Dict[str, Any]]], Optional[str]]:
+        """
+        Lista veículos com filtros opcionais e retorna também o cursor da próxima página
+        (None quando não há mais resultados). Com `cursor`, o `skip` é ignorado.
+
+        Com a busca textual `q` os resultados vêm ordenados por relevância, e a paginação
+        é feita apenas por `skip`/`limit` (sem cursor).
+
+        Com `campos` (ver `normalizar_campos`), só essas colunas são lidas do banco e os
+        veículos são retornados como dicionários parciais, sem passar pelo schema `Veiculo`.
+        """
+        if q and cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A paginação por cursor não é suportada junto com a busca textual (q); use skip"
+            )
+        after_id = decodificar_cursor(cursor) if cursor else None
+        # Busca um registro a mais para saber se existe uma próxima página
+        veiculos = await crud_veiculo.get_veiculos(
+            self.db,
+            skip=0 if after_id is not None else skip,
+            limit=limit + 1,
+            marca=marca,
+            ano=ano,
+            cor=cor,
+            vendido=vendido,
+            after_id=after_id,
+            q=q,
+            campos=campos
+        )
+        next_cursor = None
+        if len(veiculos) > limit:
+            veiculos = veiculos[:limit]
+            if not q:
+                next_cursor = codificar_cursor(veiculos[-1]["id"] if campos else veiculos[-1].id)
+        if campos:
+            return veiculos, next_cursor
+        return [Veiculo.model_validate(v) for v in veiculos], next_cursor
+
+    async def obter_versao_dados(self) -> int:
+        """
+        Retorna a versão dos dados de veículos, incrementada por toda escrita no banco.
+        Usada para validar listagens em cache no cliente (ETag) sem montar a página.
+        """
+        return await crud_estatisticas.get_versao(self.db)
+
+    async def atualizar_veiculo(
+        self,
+        veiculo_id: int,
+        veiculo_update: VeiculoUpdate
+    ) -> Veiculo:
+        """
+        Atualiza um veículo existente com validações.
+        """
+        if veiculo_update.marca is not None:
+            validar_marca_permitida(veiculo_update.marca)
+
+        if veiculo_update.ano is not None:
+            validar_ano(veiculo_update.ano)
+
+        # A existência é verificada na própria escrita, que lê o veículo com a linha bloqueada
+        usar_primario(self.db)
+        db_veiculo = await crud_veiculo.update_veiculo(
+            self.db,
+            veiculo_id,
+            veiculo_update
+        )
+        if not db_veiculo:
+            raise veiculo_nao_encontrado()
+        await self._invalidar_cache([veiculo_id])
+        atualizado = Veiculo.model_validate(db_veiculo)
+        hub_eventos.publicar(EventoVeiculo(ATUALIZADO, veiculo_id, atualizado.model_dump(mode="json")))
+        return atualizado
+
+    async def remover_veiculo(self, veiculo_id: int) -> Dict[str, str]:
+        """
+        Remove um veículo com validações.
+        """
+        usar_primario(self.db)
+        if not await crud_veiculo.delete_veiculo(self.db, veiculo_id):
+            raise veiculo_nao_encontrado()
+        await self._invalidar_cache([veiculo_id])
+        hub_eventos.publicar(EventoVeiculo(REMOVIDO, veiculo_id))
+        return {"message": "Veículo removido com sucesso"}
+
+    async def criar_veiculos_lote(self, itens: List[Any], chunk_size: int = TAMANHO_BLOCO_PADRAO) -> ResultadoLote:
+        """
+        Cria vários veículos em uma única transação. Cada item é validado como em
+        `criar_veiculo`; os inválidos são reportados em `erros` e os demais são gravados.
+        """
+        usar_primario(self.db)
+        validos, erros = validar_lote(itens, validar_item_criacao)
+        processados = 0
+        if validos:
+            processados = await crud_veiculo.create_veiculos(
+                self.db, [veiculo.model_dump() for _, veiculo in validos], chunk_size
+            )
+            await self._invalidar_cache()
+            hub_eventos.publicar(EventoVeiculo(LOTE, total=processados))
+        return ResultadoLote(total=len(itens), processados=processados, erros=erros)
+
+    async def atualizar_veiculos_lote(self, itens: List[Any], chunk_size: int = TAMANHO_BLOCO_PADRAO) -> ResultadoLote:
+        """
+        Atualiza vários veículos em uma única transação. Cada item traz o `id` e os
+        campos a alterar, validados como em `atualizar_veiculo`.
+        """
+        usar_primario(self.db)
+        validos, erros = validar_lote(itens, validar_item_atualizacao)
+        por_id, repetidos = separar_ids_repetidos(validos, lambda veiculo: veiculo.id)
+        erros += repetidos
+        nao_encontrados = []
+        if por_id:
+            alteracoes = {
+                veiculo_id: veiculo.model_dump(exclude_unset=True, exclude={"id"})
+                for veiculo_id, (_, veiculo) in por_id.items()
+            }
+            nao_encontrados = await crud_veiculo.update_veiculos(self.db, alteracoes, chunk_size)
+            await self._invalidar_cache(alteracoes)
+            hub_eventos.publicar(EventoVeiculo(LOTE, total=len(por_id) - len(nao_encontrados)))
+        erros += [
+            ErroItemLote(indice=por_id[veiculo_id][0], id=veiculo_id, erro="Veículo não encontrado")
+            for veiculo_id in nao_encontrados
+        ]
+        return ResultadoLote(
+            total=len(itens),
+            processados=len(por_id) - len(nao_encontrados),
+            erros=sorted(erros, key=lambda erro: erro.indice)
+        )
+
+    async def remover_veiculos_lote(self, itens: List[Any], chunk_size: int = TAMANHO_BLOCO_PADRAO) -> ResultadoLote:
+        """
+        Remove vários veículos, informados pelos IDs, em uma única transação.
+        """
+        usar_primario(self.db)
+        validos, erros = validar_lote(itens, validar_id_remocao)
+        por_id, repetidos = separar_ids_repetidos(validos, lambda veiculo_id: veiculo_id)
+        erros += repetidos
+        nao_encontrados = []
+        if por_id:
+            nao_encontrados = await crud_veiculo.delete_veiculos(self.db, list(por_id), chunk_size)
+            await self._invalidar_cache(por_id)
+            hub_eventos.publicar(EventoVeiculo(LOTE, total=len(por_id) - len(nao_encontrados)))
+        erros += [
+            ErroItemLote(indice=por_id[veiculo_id][0], id=veiculo_id, erro="Veículo não encontrado")
+            for veiculo_id in nao_encontrados
+        ]
+        return ResultadoLote(
+            total=len(itens),
+            processados=len(por_id) - len(nao_encontrados),
+            erros=sorted(erros, key=lambda erro: erro.indice)
+        )
+
+    async def obter_estatisticas(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas gerais sobre os veículos, lidas dos contadores
+        mantidos incrementalmente (custo constante, independente do número de veículos).
+        """
+        estatisticas = await crud_estatisticas.get_estatisticas(self.db)
+        contadores_badges.gravar(estatisticas)
+        return estatisticas
+
+    async def obter_facetas(
+        self,
+        marca: Optional[str] = None,
+        ano: Optional[int] = None,
+        cor: Optional[str] = None,
+        vendido: Optional[bool] = None,
+        q: Optional[str] = None,
+        versao: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Retorna as contagens por marca, ano, década e vendido dos veículos que atendem aos
+        filtros (os mesmos da listagem), do cache de facetas quando disponível. Com `versao`
+        (a versão dos dados já lida do banco pelo chamador), a chave do cache usa essa versão
+        em vez da `versao_veiculos` do processo.
+        """
+        filtros = {"marca": marca, "ano": ano, "cor": cor, "vendido": vendido, "q": q}
+        # Versão lida antes da consulta: contagens montadas durante uma escrita ficam com a anterior
+        chave = chave_facetas(filtros, versao_veiculos.valor if versao is None else versao)
+        if self.cache_facetas is not None:
+            facetas = await self.cache_facetas.obter(chave)
+            if facetas is not None:
+                return facetas
+        facetas = await crud_veiculo.get_facetas(self.db, **filtros)
+        if self.cache_facetas is not None:
+            await self.cache_facetas.gravar(chave, facetas)
+        return facetas
+
+    async def obter_veiculos_nao_vendidos(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        marca: Optional[str] = None,
+        ano: Optional[int] = None,
+        cursor: Optional[str] = None,
+        campos: Optional[List[str]] = None
+    ) -> Tuple[List[Union[Veiculo, Dict[str, Any]]], Optional[str]]:
+        """
+        Retorna uma página de veículos não vendidos (filtrados no banco) e o cursor da próxima página.
+        """
+        return await self.listar_veiculos_paginado(
+            skip=skip, limit=limit, marca=marca, ano=ano, vendido=False, cursor=cursor, campos=campos
+        )
+
+    async def obter_veiculos_recentes(self, campos: Optional[List[str]] = None) -> List[Union[Veiculo, Dict[str, Any]]]:
+        """
+        Retorna veículos cadastrados nos últimos 7 dias (como dicionários parciais, com `campos`).
+        """
+        veiculos = await crud_veiculo.get_veiculos_ultimos_7_dias(self.db, campos)
+        if campos:
+            return veiculos
+        return [Veiculo.model_validate(v) for v in veiculos]
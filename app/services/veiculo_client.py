@@ -0,0 +1,167 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import requests
+from fastapi import HTTPException
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas.veiculo import VeiculoCreate, VeiculoUpdate
+from app.services.cache import contadores_badges, versao_veiculos
+from app.services.veiculo import formatar_erros_validacao, normalizar_campos
+from app.services.veiculo_async import AsyncVeiculoService
+
+
+@dataclass
+class RespostaApi:
+    """
+    Resultado normalizado de uma chamada à API de veículos, independente do modo
+    (em processo ou HTTP). `status_code` é None quando não houve comunicação com a API.
+    Nas escritas do cliente em processo, `estatisticas` traz os valores dos badges após a
+    escrita (`contadores_badges`), ou None se não há valores recentes em memória.
+    """
+    status_code: Optional[int]
+    data: Any = None
+    error: Optional[str] = None
+    estatisticas: Optional[Dict[str, Any]] = None
+
+
+class VeiculoServiceClient:
+    """
+    Cliente em processo: chama o AsyncVeiculoService diretamente, usando a mesma sessão
+    de banco da requisição. Evita o round trip HTTP e a serialização JSON dupla.
+    """
+
+    def __init__(self, service: AsyncVeiculoService):
+        self.service = service
+
+    async def _executar(self, status_code: int, coro_func) -> RespostaApi:
+        try:
+            data = await coro_func()
+        except HTTPException as e:
+            return RespostaApi(status_code=e.status_code, error=str(e.detail))
+        except ValidationError as e:
+            return RespostaApi(status_code=422, error=formatar_erros_validacao(e.errors()))
+        return RespostaApi(status_code=status_code, data=data)
+
+    async def _executar_escrita(self, status_code: int, coro_func) -> RespostaApi:
+        # Valores em memória, já com os deltas da própria escrita: nenhuma leitura a mais
+        resposta = await self._executar(status_code, coro_func)
+        if resposta.error is None:
+            resposta.estatisticas = contadores_badges.obter()
+        return resposta
+
+    async def listar_veiculos(self, params: Dict[str, Any]) -> RespostaApi:
+        async def listar():
+            # `fields` no mesmo formato da API; com ele o serviço já retorna dicionários parciais
+            filtros = dict(params)
+            campos = normalizar_campos(filtros.pop("fields", None))
+            veiculos = await self.service.listar_veiculos(campos=campos, **filtros)
+            return veiculos if campos else [v.model_dump() for v in veiculos]
+        return await self._executar(200, listar)
+
+    async def obter_veiculo(self, veiculo_id: int) -> RespostaApi:
+        async def obter():
+            return (await self.service.obter_veiculo(veiculo_id)).model_dump()
+        return await self._executar(200, obter)
+
+    async def obter_estatisticas(self) -> RespostaApi:
+        return await self._executar(200, self.service.obter_estatisticas)
+
+    async def obter_facetas(self, params: Dict[str, Any], versao: Optional[int] = None) -> RespostaApi:
+        return await self._executar(200, lambda: self.service.obter_facetas(**params, versao=versao))
+
+    async def obter_versao_dados(self) -> int:
+        """Versão dos dados lida do banco (compartilhada entre os workers)."""
+        return await self.service.obter_versao_dados()
+
+    async def criar_veiculo(self, data: Dict[str, Any]) -> RespostaApi:
+        async def criar():
+            return (await self.service.criar_veiculo(VeiculoCreate(**data))).model_dump()
+        return await self._executar_escrita(201, criar)
+
+    async def atualizar_veiculo(self, veiculo_id: int, data: Dict[str, Any]) -> RespostaApi:
+        async def atualizar():
+            return (await self.service.atualizar_veiculo(veiculo_id, VeiculoUpdate(**data))).model_dump()
+        return await self._executar_escrita(200, atualizar)
+
+    async def remover_veiculo(self, veiculo_id: int) -> RespostaApi:
+        return await self._executar_escrita(200, lambda: self.service.remover_veiculo(veiculo_id))
+
+
+class VeiculoHttpClient:
+    """
+    Cliente HTTP para implantações separadas, em que a interface web e a API rodam
+    em processos distintos. As chamadas bloqueantes do `requests` são executadas no
+    threadpool para não travar o event loop.
+
+    As escritas bem-sucedidas feitas por este cliente incrementam `versao_veiculos` local;
+    alterações feitas diretamente na API (outro processo) só chegam aos fragmentos em
+    cache da interface após o TTL do cache de fragmentos. As escritas não trazem os
+    valores dos badges (`RespostaApi.estatisticas` fica None): a resposta da ação leva o
+    marcador que busca /ui/fragment/estatisticas-badges, com uma requisição a mais.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def _request(self, method: str, endpoint: str, **kwargs) -> RespostaApi:
+        try:
+            url = f"{self.base_url}{endpoint}"
+            response = requests.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            return RespostaApi(status_code=None, error=f"Erro de conexão com a API: {e}")
+
+        if response.status_code >= 400:
+            return RespostaApi(status_code=response.status_code, error=self._extrair_erro(response))
+        try:
+            return RespostaApi(status_code=response.status_code, data=response.json())
+        except ValueError: # Erro ao decodificar JSON
+            return RespostaApi(status_code=500, error="Resposta inválida da API (não é JSON).")
+
+    @staticmethod
+    def _extrair_erro(response) -> str:
+        # Tenta extrair uma mensagem de erro mais útil do corpo da resposta JSON, se disponível
+        try:
+            error_data = response.json()
+        except ValueError: # Se o corpo do erro não for JSON
+            return response.text or f"Erro {response.status_code} da API."
+        if 'detail' in error_data and isinstance(error_data['detail'], list): # FastAPI validation errors
+            return formatar_erros_validacao(error_data['detail'])
+        if 'errors' in error_data and isinstance(error_data['errors'], list): # Handler customizado da API
+            return formatar_erros_validacao(error_data['errors'])
+        if 'detail' in error_data:
+            return str(error_data['detail'])
+        return f"Erro {response.status_code} da API."
+
+    async def _executar(self, method: str, endpoint: str, **kwargs) -> RespostaApi:
+        resposta = await run_in_threadpool(self._request, method, endpoint, **kwargs)
+        if method != "GET" and resposta.status_code is not None and resposta.status_code < 400:
+            versao_veiculos.incrementar()
+        return resposta
+
+    async def listar_veiculos(self, params: Dict[str, Any]) -> RespostaApi:
+        return await self._executar("GET", "/veiculos/", params=params)
+
+    async def obter_veiculo(self, veiculo_id: int) -> RespostaApi:
+        return await self._executar("GET", f"/veiculos/{veiculo_id}")
+
+    async def obter_estatisticas(self) -> RespostaApi:
+        return await self._executar("GET", "/veiculos/estatisticas/geral")
+
+    async def obter_facetas(self, params: Dict[str, Any], versao: Optional[int] = None) -> RespostaApi:
+        return await self._executar("GET", "/veiculos/facets", params=params)
+
+    async def obter_versao_dados(self) -> int:
+        """Versão local (`versao_veiculos`): a interface não acessa o banco neste modo."""
+        return versao_veiculos.valor
+
+    async def criar_veiculo(self, data: Dict[str, Any]) -> RespostaApi:
+        return await self._executar("POST", "/veiculos/", json=data)
+
+    async def atualizar_veiculo(self, veiculo_id: int, data: Dict[str, Any]) -> RespostaApi:
+        return await self._executar("PUT", f"/veiculos/{veiculo_id}", json=data)
+
+    async def remover_veiculo(self, veiculo_id: int) -> RespostaApi:
+        return await self._executar("DELETE", f"/veiculos/{veiculo_id}")
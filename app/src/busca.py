@@ -0,0 +1,48 @@
+import re
+from typing import List, Optional
+
+from sqlalchemy import Select, and_, column, literal_column, or_, table
+from sqlalchemy.dialects.mysql import match
+
+from app.models.busca import TABELA_BUSCA_SQLITE
+from app.models.veiculo import Veiculo
+
+# Busca textual em veiculo, marca e descricao usando o índice de cada banco
+# (FULLTEXT no MySQL, FTS5 no SQLite). Cada termo é buscado como prefixo de
+# palavra e todos os termos são obrigatórios.
+
+_busca_sqlite = table(TABELA_BUSCA_SQLITE, column("rowid"), column("rank"))
+
+def termos_busca(q: Optional[str]) -> List[str]:
+    """Extrai as palavras da busca, descartando operadores e pontuação."""
+    return re.findall(r"\w+", q or "")
+
+def aplicar_busca(query: Select, termos: List[str], dialect_name: str) -> Select:
+    """
+    Restringe a consulta aos veículos que contêm todos os termos e a ordena por relevância.
+    Deve ser aplicada antes de qualquer outra ordenação.
+    """
+    if dialect_name == "mysql":
+        relevancia = match(
+            Veiculo.veiculo, Veiculo.marca, Veiculo.descricao,
+            against=" ".join(f"+{termo}*" for termo in termos)
+        ).in_boolean_mode()
+        return query.where(relevancia).order_by(relevancia.desc())
+
+    if dialect_name == "sqlite":
+        expressao = " ".join(f'"{termo}"*' for termo in termos)
+        return query.join(
+            _busca_sqlite, _busca_sqlite.c.rowid == Veiculo.id
+        ).where(
+            literal_column(TABELA_BUSCA_SQLITE).op("MATCH")(expressao)
+        ).order_by(_busca_sqlite.c.rank)
+
+    # Demais bancos: sem índice textual, recorre a LIKE (sem ordenação por relevância)
+    return query.where(and_(*[
+        or_(
+            Veiculo.veiculo.ilike(f"%{termo}%"),
+            Veiculo.marca.ilike(f"%{termo}%"),
+            Veiculo.descricao.ilike(f"%{termo}%")
+        )
+        for termo in termos
+    ]))
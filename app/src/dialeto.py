@@ -0,0 +1,30 @@
+from sqlalchemy import ColumnElement, literal_column
+
+# Expressões cuja forma mais eficiente (ou correta) depende do banco. As consultas de
+# app/src recebem o nome do dialeto (`nome_dialeto(db)`) e montam o SQL com estas funções;
+# o padrão "mysql" mantém o comportamento do banco de produção.
+
+def expressao_decada(ano: ColumnElement, dialect_name: str = "mysql") -> ColumnElement:
+    """
+    Início da década do ano (1997 -> 1990). No MySQL usa a divisão inteira `DIV` (o `//`
+    do SQLAlchemy vira FLOOR(ano / 10), com divisão decimal); no SQLite a divisão entre
+    inteiros já é inteira. Os literais entram no SQL sem parâmetros, para que a mesma
+    expressão possa aparecer no SELECT e no GROUP BY (ONLY_FULL_GROUP_BY).
+    """
+    dez = literal_column("10")
+    if dialect_name == "mysql":
+        return ano.op("DIV")(dez) * dez
+    if dialect_name == "sqlite":
+        return ano.op("/")(dez) * dez
+    return (ano // 10) * 10
+
+def contem(coluna: ColumnElement, valor: str, dialect_name: str = "mysql") -> ColumnElement:
+    """
+    Filtro "contém `valor`", sem diferenciar maiúsculas de minúsculas. O `ilike` do
+    SQLAlchemy vira lower(coluna) LIKE lower(valor), calculando lower() em cada linha:
+    no MySQL a collation padrão (utf8mb4_0900_ai_ci) já compara sem caixa
+    e sem acento, e no SQLite o LIKE já ignora a caixa (como o lower(), só para ASCII).
+    """
+    if dialect_name in ("mysql", "sqlite"):
+        return coluna.like(f"%{valor}%")
+    return coluna.ilike(f"%{valor}%")
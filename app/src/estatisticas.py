@@ -0,0 +1,254 @@
+from collections import Counter
+from datetime import date, datetime, timedelta, UTC
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Insert, Select, String, cast, delete, func, insert, literal, or_, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.estatistica import EstatisticaVeiculo
+from app.models.veiculo import Marca, Veiculo
+from app.src.dialeto import expressao_decada
+from app.src.marcas import NOMES_MARCAS
+
+# Estatísticas mantidas incrementalmente: cada escrita em `veiculos` aplica, na mesma
+# transação, a diferença entre os contadores do veículo antes e depois da alteração.
+# A leitura lê apenas as linhas de contadores, independente do tamanho de `veiculos`.
+
+TIPO_NAO_VENDIDOS = "nao_vendidos"
+TIPO_DECADA = "decada"
+TIPO_MARCA = "marca"
+TIPO_DIA = "dia"
+TIPO_VERSAO = "versao"
+
+# Toda escrita incrementa este contador, mesmo as que não alteram as estatísticas, de modo
+# que ele funciona como versão dos dados compartilhada entre os processos da aplicação.
+CHAVE_VERSAO = (TIPO_VERSAO, "")
+
+DIAS_RECENTES = 7
+
+# Chave em `Session.info` com a soma dos deltas aplicados pela sessão desde o último
+# `retirar_deltas` (ver `registrar_deltas`)
+INFO_DELTAS = "estatisticas_deltas"
+
+Chave = Tuple[str, str]
+
+def _valor(veiculo: Any, campo: str) -> Any:
+    if isinstance(veiculo, dict):
+        return veiculo.get(campo)
+    return getattr(veiculo, campo)
+
+def contadores_do_veiculo(veiculo: Any) -> List[Chave]:
+    """
+    Retorna as chaves (tipo, chave) dos contadores para os quais o veículo contribui
+    com uma unidade. Aceita um objeto ORM ou um dicionário com os mesmos campos.
+    """
+    chaves = []
+    vendido = _valor(veiculo, "vendido")
+    if vendido is not None and not vendido:
+        chaves.append((TIPO_NAO_VENDIDOS, ""))
+    ano = _valor(veiculo, "ano")
+    if ano is not None:
+        chaves.append((TIPO_DECADA, str(ano // 10 * 10)))
+    # Só marcas do catálogo são contadas, pelo nome canônico (o mesmo de `queries_reconstrucao`)
+    marca_id = _valor(veiculo, "marca_id")
+    if marca_id is not None:
+        chaves.append((TIPO_MARCA, NOMES_MARCAS[marca_id]))
+    created = _valor(veiculo, "created")
+    if created is not None:
+        chaves.append((TIPO_DIA, created.date().isoformat()))
+    return chaves
+
+def calcular_deltas(antes: Iterable[Chave] = (), depois: Iterable[Chave] = ()) -> Dict[Chave, int]:
+    """
+    Diferença entre os contadores de um veículo antes e depois de uma escrita.
+    Criação: apenas `depois`; remoção: apenas `antes`.
+    """
+    deltas = Counter(depois)
+    deltas.subtract(antes)
+    return {chave: delta for chave, delta in deltas.items() if delta}
+
+# Bancos com UPSERT em `statement_deltas` e índice textual em app/src/busca.py (FULLTEXT
+# e FTS5, criados pela migração ce7e65df35c0); verificado na inicialização da aplicação
+DIALETOS_SUPORTADOS = ("mysql", "sqlite")
+
+def registrar_deltas(info: Dict[str, Any], deltas: Dict[Chave, int]) -> None:
+    """
+    Acumula em `info` (o `Session.info` da escrita) os deltas aplicados, para que a camada
+    de serviço, após o commit, atualize os valores que mantém em memória sem reler os
+    contadores (ver `retirar_deltas`).
+    """
+    info.setdefault(INFO_DELTAS, Counter()).update(deltas)
+
+def retirar_deltas(info: Dict[str, Any]) -> Dict[Chave, int]:
+    """Deltas acumulados em `info` desde a última chamada (que deixam de estar lá)."""
+    return dict(info.pop(INFO_DELTAS, {}))
+
+def deltas_dos_badges(deltas: Dict[Chave, int], hoje: Optional[date] = None) -> Dict[str, int]:
+    """
+    Variação de `total_nao_vendidos` e `veiculos_ultimos_7_dias` (os badges da interface
+    web) correspondente aos deltas de uma escrita.
+    """
+    hoje = hoje or datetime.now(UTC).date()
+    primeiro_dia = (hoje - timedelta(days=DIAS_RECENTES - 1)).isoformat()
+    return {
+        "total_nao_vendidos": deltas.get((TIPO_NAO_VENDIDOS, ""), 0),
+        "veiculos_ultimos_7_dias": sum(
+            delta for (tipo, chave), delta in deltas.items() if tipo == TIPO_DIA and chave >= primeiro_dia
+        ),
+    }
+
+def verificar_dialeto(dialect_name: str) -> None:
+    """
+    Falha logo na inicialização se o banco configurado não tiver suporte às
+    estatísticas incrementais e à busca textual (em vez de falhar na primeira escrita
+    ou de buscar sem índice).
+    """
+    if dialect_name not in DIALETOS_SUPORTADOS:
+        raise RuntimeError(
+            f"Banco não suportado: {dialect_name} "
+            f"(suportados: {', '.join(DIALETOS_SUPORTADOS)})"
+        )
+
+def statement_deltas(dialect_name: str, deltas: Dict[Chave, int]) -> Insert:
+    """
+    UPSERT que soma os deltas aos contadores, criando as linhas que ainda não existem.
+    As linhas vão em ordem de chave: duas escritas concorrentes bloqueiam os contadores
+    na mesma ordem e não entram em deadlock (no MySQL, o ON DUPLICATE KEY UPDATE bloqueia
+    as linhas na ordem dos VALUES).
+    """
+    valores = [
+        {"tipo": tipo, "chave": chave, "quantidade": delta}
+        for (tipo, chave), delta in sorted(deltas.items())
+    ]
+    if dialect_name == "mysql":
+        stmt = mysql_insert(EstatisticaVeiculo).values(valores)
+        return stmt.on_duplicate_key_update(
+            quantidade=EstatisticaVeiculo.quantidade + stmt.inserted.quantidade
+        )
+    stmt = sqlite_insert(EstatisticaVeiculo).values(valores)
+    return stmt.on_conflict_do_update(
+        index_elements=[EstatisticaVeiculo.tipo, EstatisticaVeiculo.chave],
+        set_={"quantidade": EstatisticaVeiculo.quantidade + stmt.excluded.quantidade}
+    )
+
+def query_versao() -> Select:
+    """
+    Consulta da versão dos dados (contador de escritas), lida pela chave primária.
+    """
+    return select(EstatisticaVeiculo.quantidade).where(
+        EstatisticaVeiculo.tipo == TIPO_VERSAO, EstatisticaVeiculo.chave == ""
+    )
+
+def query_estatisticas(hoje: Optional[date] = None) -> Select:
+    """
+    Consulta dos contadores usados em `/veiculos/estatisticas/geral`. Lê apenas os
+    buckets diários dos últimos DIAS_RECENTES dias, então o custo não depende do
+    tamanho da tabela de veículos.
+    """
+    hoje = hoje or datetime.now(UTC).date()
+    primeiro_dia = (hoje - timedelta(days=DIAS_RECENTES - 1)).isoformat()
+    return select(
+        EstatisticaVeiculo.tipo,
+        EstatisticaVeiculo.chave,
+        EstatisticaVeiculo.quantidade
+    ).where(
+        EstatisticaVeiculo.quantidade != 0,
+        EstatisticaVeiculo.tipo != TIPO_VERSAO,
+        or_(EstatisticaVeiculo.tipo != TIPO_DIA, EstatisticaVeiculo.chave >= primeiro_dia)
+    )
+
+def formatar_estatisticas(contadores) -> Dict[str, Any]:
+    """
+    Monta a resposta de estatísticas a partir das linhas (tipo, chave, quantidade).
+    """
+    total_nao_vendidos = 0
+    ultimos_dias = 0
+    decadas = []
+    fabricantes = []
+    for tipo, chave, quantidade in contadores:
+        if tipo == TIPO_NAO_VENDIDOS:
+            total_nao_vendidos = quantidade
+        elif tipo == TIPO_DECADA:
+            decadas.append((int(chave), quantidade))
+        elif tipo == TIPO_MARCA:
+            fabricantes.append((chave, quantidade))
+        elif tipo == TIPO_DIA:
+            ultimos_dias += quantidade
+
+    return {
+        "total_nao_vendidos": total_nao_vendidos,
+        "distribuicao_por_decada": [
+            {"decada": f"{decada}s", "quantidade": count}
+            for decada, count in sorted(decadas)
+        ],
+        "distribuicao_por_fabricante": [
+            {"fabricante": marca, "quantidade": count}
+            for marca, count in sorted(fabricantes)
+        ],
+        "veiculos_ultimos_7_dias": ultimos_dias
+    }
+
+def queries_reconstrucao(dialect_name: str = "mysql") -> List[Select]:
+    """
+    Consultas que recalculam todos os contadores a partir da tabela de veículos,
+    no formato (tipo, chave, quantidade).
+    """
+    decada = expressao_decada(Veiculo.ano, dialect_name)
+    dia = func.date(Veiculo.created)
+    por_marca = (
+        select(Veiculo.marca_id, func.count(Veiculo.id).label("quantidade"))
+            .where(Veiculo.marca_id.is_not(None)).group_by(Veiculo.marca_id).subquery()
+    )
+    return [
+        select(literal(TIPO_NAO_VENDIDOS), literal(""), func.count(Veiculo.id))
+            .where(Veiculo.vendido == False),
+        select(literal(TIPO_DECADA), cast(decada, String), func.count(Veiculo.id))
+            .where(Veiculo.ano.is_not(None)).group_by(decada),
+        select(literal(TIPO_MARCA), Marca.nome, por_marca.c.quantidade)
+            .join(Marca, Marca.id == por_marca.c.marca_id),
+        select(literal(TIPO_DIA), cast(dia, String), func.count(Veiculo.id))
+            .where(Veiculo.created.is_not(None)).group_by(dia),
+    ]
+
+# --- Operações com Session síncrona ---
+
+def aplicar_deltas(db: Session, deltas: Dict[Chave, int]) -> None:
+    """
+    Aplica os deltas aos contadores e incrementa a versão dos dados, na transação
+    corrente (sem commit). Os deltas ficam registrados em `db.info` (`registrar_deltas`).
+    """
+    db.execute(statement_deltas(db.get_bind().dialect.name, {**deltas, CHAVE_VERSAO: 1}))
+    registrar_deltas(db.info, deltas)
+
+def get_versao(db: Session) -> int:
+    """
+    Retorna a versão dos dados (0 se ainda não houve escritas).
+    """
+    return db.scalar(query_versao()) or 0
+
+def get_estatisticas(db: Session) -> Dict[str, Any]:
+    """
+    Retorna as estatísticas gerais a partir dos contadores.
+    """
+    return formatar_estatisticas(db.execute(query_estatisticas()).all())
+
+def reconstruir_estatisticas(db: Session) -> int:
+    """
+    Recalcula todos os contadores a partir da tabela de veículos, corrigindo qualquer
+    divergência. Retorna o número de contadores gravados. A versão dos dados é
+    incrementada, invalidando as ETags e caches calculados a partir dela.
+    """
+    contadores = [
+        {"tipo": tipo, "chave": str(chave), "quantidade": quantidade}
+        for query in queries_reconstrucao(db.get_bind().dialect.name)
+        for tipo, chave, quantidade in db.execute(query).all()
+        if quantidade
+    ]
+    db.execute(delete(EstatisticaVeiculo).where(EstatisticaVeiculo.tipo != TIPO_VERSAO))
+    if contadores:
+        db.execute(insert(EstatisticaVeiculo), contadores)
+    aplicar_deltas(db, {})
+    db.commit()
+    return len(contadores)
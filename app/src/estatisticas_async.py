@@ -0,0 +1,35 @@
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.estatisticas import (
+    CHAVE_VERSAO,
+    Chave,
+    formatar_estatisticas,
+    query_estatisticas,
+    query_versao,
+    registrar_deltas,
+    statement_deltas,
+)
+
+# Versões assíncronas (AsyncSession) das operações de app.src.estatisticas.
+
+async def aplicar_deltas(db: AsyncSession, deltas: Dict[Chave, int]) -> None:
+    """
+    Aplica os deltas aos contadores e incrementa a versão dos dados, na transação
+    corrente (sem commit). Os deltas ficam registrados em `db.info` (`registrar_deltas`).
+    """
+    await db.execute(statement_deltas(db.get_bind().dialect.name, {**deltas, CHAVE_VERSAO: 1}))
+    registrar_deltas(db.info, deltas)
+
+async def get_versao(db: AsyncSession) -> int:
+    """
+    Retorna a versão dos dados (0 se ainda não houve escritas).
+    """
+    return (await db.scalar(query_versao())) or 0
+
+async def get_estatisticas(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Retorna as estatísticas gerais a partir dos contadores.
+    """
+    return formatar_estatisticas((await db.execute(query_estatisticas())).all())
@@ -0,0 +1,74 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+# Catálogo das marcas aceitas, espelhado na tabela `marcas` (dimensão de veiculos.marca_id).
+#
+# Os IDs são fixos: a migração que cria a tabela e a criação das tabelas pelo metadata
+# (app/models/veiculo.py) gravam exatamente estas linhas, então a aplicação resolve
+# nome <-> ID sem consultar o banco. Uma marca nova entra aqui e em uma migração que
+# insira a linha correspondente. Nunca reaproveite um ID.
+
+MARCAS: Tuple[Tuple[int, str], ...] = (
+    (1, "Chevrolet"),
+    (2, "Ford"),
+    (3, "Volkswagen"),
+    (4, "Fiat"),
+    (5, "Toyota"),
+    (6, "Honda"),
+    (7, "Hyundai"),
+    (8, "Nissan"),
+    (9, "Renault"),
+    (10, "Peugeot"),
+    (11, "Citroën"),
+    (12, "Jeep"),
+    (13, "Kia"),
+    (14, "BMW"),
+    (15, "Mercedes-Benz"),
+    (16, "Audi"),
+    (17, "Mitsubishi"),
+    (18, "Chery"),
+    (19, "Subaru"),
+    (20, "Volvo"),
+)
+
+NOMES_MARCAS: Dict[int, str] = dict(MARCAS)
+
+_SEPARADORES = re.compile(r"[\W_]+")
+
+def chave_marca(texto: str) -> str:
+    """
+    Forma normalizada de um nome de marca, usada nas comparações: sem acentos, sem
+    diferenciar maiúsculas de minúsculas e sem espaços/pontuação
+    ("Mercedes Benz", "MERCEDES-BENZ" e "mercedes-benz" -> "mercedesbenz"; "Citroen" -> "citroen").
+    """
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _SEPARADORES.sub("", sem_acentos.casefold())
+
+_MARCAS_POR_CHAVE: Dict[str, Tuple[int, str]] = {chave_marca(nome): (marca_id, nome) for marca_id, nome in MARCAS}
+
+@lru_cache(maxsize=1024)
+def buscar_marca(texto: str) -> Optional[Tuple[int, str]]:
+    """(ID, nome canônico) da marca informada, ou None se não estiver no catálogo."""
+    return _MARCAS_POR_CHAVE.get(chave_marca(texto))
+
+@lru_cache(maxsize=1024)
+def ids_marcas_contendo(texto: str) -> Tuple[int, ...]:
+    """IDs das marcas cujo nome contém `texto` (filtro `marca` das listagens), comparados pela `chave_marca`."""
+    procurado = chave_marca(texto)
+    return tuple(marca_id for chave, (marca_id, _) in _MARCAS_POR_CHAVE.items() if procurado in chave)
+
+def colunas_marca(marca: Optional[str]) -> Dict[str, Any]:
+    """
+    Valores de `marca` (nome canônico) e `marca_id` a gravar para a marca informada.
+    Marcas fora do catálogo são recusadas (ValueError) mesmo nas escritas que não passam
+    pelo serviço: o filtro por marca usa só `marca_id` e não encontraria essas linhas.
+    """
+    if marca is None:
+        return {"marca": None, "marca_id": None}
+    encontrada = buscar_marca(marca)
+    if encontrada is None:
+        raise ValueError(f"Marca fora do catálogo: {marca!r}")
+    return {"marca": encontrada[1], "marca_id": encontrada[0]}
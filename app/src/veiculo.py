@@ -1,10 +1,283 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, select, Select, insert, update, delete, Insert, Update, Delete
 from datetime import datetime, timedelta, UTC
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Sequence, Tuple
 
-from app.models.veiculo import Veiculo
+from app.models.veiculo import Marca, Veiculo
 from app.schemas.veiculo import VeiculoCreate, VeiculoUpdate
+from app.src import estatisticas as crud_estatisticas
+from app.src.estatisticas import calcular_deltas, contadores_do_veiculo
+from app.src.busca import aplicar_busca, termos_busca
+from app.src.dialeto import contem, expressao_decada
+from app.src.marcas import NOMES_MARCAS, buscar_marca, colunas_marca, ids_marcas_contendo
+
+# --- Construção das consultas ---
+# Compartilhadas entre este módulo (Session síncrona, usada por scripts e pelo
+# Alembic) e app.src.veiculo_async (AsyncSession, usada pelas rotas da API).
+
+def query_veiculo(veiculo_id: int) -> Select:
+    """
+    Consulta de um veículo específico pelo ID.
+    """
+    return select(Veiculo).where(Veiculo.id == veiculo_id)
+
+def query_veiculo_para_alterar(veiculo_id: int) -> Select:
+    """
+    Consulta de um veículo a alterar ou remover, com a linha bloqueada (SELECT ... FOR UPDATE)
+    até o fim da transação: os contadores "antes" da escrita não mudam por uma escrita
+    concorrente. `populate_existing` recarrega o objeto mesmo que já esteja no mapa de
+    identidade da sessão, com os valores lidos sob o bloqueio.
+    """
+    return query_veiculo(veiculo_id).with_for_update().execution_options(populate_existing=True)
+
+def selecionar_veiculos(campos: Optional[Sequence[str]] = None) -> Select:
+    """
+    SELECT da entidade Veiculo completa ou, com `campos`, só das colunas informadas
+    (projeção no SQL; as linhas vêm como tuplas, e não como objetos do ORM).
+    """
+    if campos:
+        return select(*[getattr(Veiculo, campo) for campo in campos])
+    return select(Veiculo)
+
+def query_veiculos(
+    skip: int = 0,
+    limit: int = 100,
+    marca: Optional[str] = None,
+    ano: Optional[int] = None,
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    q: Optional[str] = None,
+    dialect_name: str = "mysql",
+    campos: Optional[Sequence[str]] = None
+) -> Select:
+    """
+    Consulta da lista de veículos com filtros opcionais, ordenada por ID.
+
+    `after_id` ativa a paginação por cursor (keyset): retorna apenas veículos com ID
+    maior que o último da página anterior, sem precisar descartar `skip` linhas.
+
+    `q` faz uma busca textual indexada em veiculo, marca e descricao; nesse caso os
+    resultados são ordenados por relevância (e depois por ID). A sintaxe da busca
+    depende do banco, informado em `dialect_name`.
+
+    `campos` restringe as colunas selecionadas (ver `selecionar_veiculos`).
+    """
+    query = filtrar_veiculos(selecionar_veiculos(campos), marca=marca, ano=ano, cor=cor, vendido=vendido, q=q, dialect_name=dialect_name)
+    if after_id is not None:
+        query = query.where(Veiculo.id > after_id)
+    return query.order_by(Veiculo.id.asc()).offset(skip).limit(limit)
+
+def filtrar_veiculos(
+    query: Select,
+    marca: Optional[str] = None,
+    ano: Optional[int] = None,
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    q: Optional[str] = None,
+    dialect_name: str = "mysql"
+) -> Select:
+    """
+    Aplica à consulta os filtros da listagem de veículos (os mesmos de `query_veiculos`).
+    """
+    if marca:
+        # "Contém", sem caixa nem acento, resolvido no catálogo em memória; no banco, o
+        # filtro é pela chave inteira (ix_veiculos_marca_id)
+        ids = ids_marcas_contendo(marca)
+        query = query.where(Veiculo.marca_id == ids[0] if len(ids) == 1 else Veiculo.marca_id.in_(ids))
+    if ano:
+        query = query.where(Veiculo.ano == ano)
+    if cor:
+        query = query.where(contem(Veiculo.veiculo, cor, dialect_name))
+    if vendido is not None:
+        query = query.where(Veiculo.vendido == vendido)
+    termos = termos_busca(q)
+    if termos:
+        query = aplicar_busca(query, termos, dialect_name)
+    return query
+
+# Colunas exportadas, nesta ordem (sem `marca_id`, interno)
+COLUNAS_EXPORTACAO = ["id", "veiculo", "marca", "ano", "descricao", "vendido", "created", "updated"]
+
+def query_exportacao(
+    marca: Optional[str] = None,
+    ano: Optional[int] = None,
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    q: Optional[str] = None,
+    dialect_name: str = "mysql"
+) -> Select:
+    """
+    Consulta de todos os veículos que atendem aos filtros, ordenada por ID, para exportação.
+    Seleciona as colunas (e não entidades ORM), evitando o custo do identity map por linha.
+    """
+    query = select(*[Veiculo.__table__.c[coluna] for coluna in COLUNAS_EXPORTACAO])
+    query = filtrar_veiculos(query, marca=marca, ano=ano, cor=cor, vendido=vendido, q=q, dialect_name=dialect_name)
+    return query.order_by(Veiculo.id.asc())
+
+def query_count_veiculos_nao_vendidos() -> Select:
+    """
+    Consulta do total de veículos não vendidos.
+    """
+    return select(func.count(Veiculo.id)).where(Veiculo.vendido == False)
+
+def query_distribuicao_por_decada(dialect_name: str = "mysql") -> Select:
+    """
+    Consulta da quantidade de veículos por década de fabricação.
+    """
+    decada_expression = expressao_decada(Veiculo.ano, dialect_name)
+
+    return select(
+        decada_expression.label("decada_inicio"),
+        func.count(Veiculo.id)
+    ).group_by(decada_expression).order_by(decada_expression.asc())
+
+def query_distribuicao_por_fabricante() -> Select:
+    """
+    Consulta da quantidade de veículos por fabricante. Agrupa pela chave inteira (só no
+    índice ix_veiculos_marca_id) e junta o nome das marcas ao resultado já agrupado.
+    """
+    por_marca = (
+        select(Veiculo.marca_id, func.count(Veiculo.id).label("quantidade"))
+            .where(Veiculo.marca_id.is_not(None)).group_by(Veiculo.marca_id).subquery()
+    )
+    return select(Marca.nome, por_marca.c.quantidade).join(Marca, Marca.id == por_marca.c.marca_id)
+
+def query_facetas(
+    marca: Optional[str] = None,
+    ano: Optional[int] = None,
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    q: Optional[str] = None,
+    dialect_name: str = "mysql"
+) -> Select:
+    """
+    Consulta das contagens por facetas (marca, ano e vendido) dos veículos que atendem aos
+    filtros. Um único GROUP BY pelas três colunas faz o papel de GROUPING SETS (que o MySQL
+    não tem): as poucas combinações resultantes são somadas por faceta em `formatar_facetas`,
+    e as décadas saem dos anos.
+    """
+    query = select(Veiculo.marca_id, Veiculo.ano, Veiculo.vendido, func.count().label("quantidade"))
+    query = filtrar_veiculos(query, marca=marca, ano=ano, cor=cor, vendido=vendido, q=q, dialect_name=dialect_name)
+    # A busca textual ordena por relevância, que não faz sentido (nem é válida) no agrupamento
+    return query.group_by(Veiculo.marca_id, Veiculo.ano, Veiculo.vendido).order_by(None)
+
+def query_veiculos_ultimos_7_dias(campos: Optional[Sequence[str]] = None) -> Select:
+    """
+    Consulta dos veículos cadastrados nos últimos 7 dias.
+    """
+    data_limite = datetime.now(UTC) - timedelta(days=7)
+    return selecionar_veiculos(campos).where(Veiculo.created >= data_limite)
+
+def formatar_distribuicao_por_decada(decadas) -> List[Dict[str, Any]]:
+    return [
+        {"decada": f"{decada}s", "quantidade": count}
+        for decada, count in decadas
+    ]
+
+def formatar_distribuicao_por_fabricante(fabricantes) -> List[Dict[str, Any]]:
+    return [
+        {"fabricante": marca, "quantidade": count}
+        for marca, count in fabricantes
+    ]
+
+def formatar_facetas(linhas) -> Dict[str, Any]:
+    """
+    Soma por faceta as contagens de `query_facetas`. Marcas em ordem decrescente de
+    quantidade (as fora do catálogo, sem `marca_id`, só entram no total), anos e décadas
+    do mais recente ao mais antigo.
+    """
+    total = 0
+    marcas: Dict[int, int] = {}
+    anos: Dict[int, int] = {}
+    vendidos: Dict[bool, int] = {}
+    for marca_id, ano, vendido, quantidade in linhas:
+        total += quantidade
+        if marca_id is not None:
+            marcas[marca_id] = marcas.get(marca_id, 0) + quantidade
+        anos[ano] = anos.get(ano, 0) + quantidade
+        vendidos[bool(vendido)] = vendidos.get(bool(vendido), 0) + quantidade
+    decadas: Dict[int, int] = {}
+    for ano, quantidade in anos.items():
+        decadas[ano // 10 * 10] = decadas.get(ano // 10 * 10, 0) + quantidade
+    return {
+        "total": total,
+        "marcas": [
+            {"marca": NOMES_MARCAS[marca_id], "quantidade": quantidade}
+            for marca_id, quantidade in sorted(marcas.items(), key=lambda item: (-item[1], NOMES_MARCAS[item[0]]))
+        ],
+        "anos": [{"ano": ano, "quantidade": quantidade} for ano, quantidade in sorted(anos.items(), reverse=True)],
+        "decadas": formatar_distribuicao_por_decada(sorted(decadas.items(), reverse=True)),
+        "vendido": [{"vendido": vendido, "quantidade": quantidade} for vendido, quantidade in sorted(vendidos.items())],
+    }
+
+def nome_dialeto(db) -> str:
+    """Nome do dialeto do banco ligado à sessão (ex.: "mysql", "sqlite")."""
+    return db.get_bind().dialect.name
+
+# --- Escritas em lote ---
+# Cada lote é gravado com um comando por bloco de `chunk_size` linhas (executemany no
+# INSERT/UPDATE, IN (...) no DELETE), todos na mesma transação, e os contadores de
+# estatísticas recebem a soma dos deltas de uma só vez.
+
+def em_blocos(itens: Sequence[Any], chunk_size: int) -> Iterator[Sequence[Any]]:
+    """Divide `itens` em blocos de até `chunk_size` elementos."""
+    for inicio in range(0, len(itens), chunk_size):
+        yield itens[inicio:inicio + chunk_size]
+
+def query_contadores_por_ids(ids: Sequence[int]) -> Select:
+    """
+    Consulta dos campos que alimentam as estatísticas, para os veículos com os IDs informados,
+    com as linhas bloqueadas até o fim da transação (em ordem de ID, a mesma em todas as
+    escritas em lote, para que duas delas não se bloqueiem mutuamente).
+    """
+    return select(
+        Veiculo.id, Veiculo.marca_id, Veiculo.ano, Veiculo.vendido, Veiculo.created
+    ).where(Veiculo.id.in_(ids)).order_by(Veiculo.id).with_for_update()
+
+def statement_insert_veiculos(veiculos: List[Dict[str, Any]]) -> Tuple[Insert, List[Dict[str, Any]], Dict]:
+    """
+    Comando de inserção em lote, as linhas a inserir (com `created`/`updated` definidos
+    aqui, para que o contador por dia use o mesmo valor gravado) e os deltas de estatísticas.
+    """
+    agora = datetime.now(UTC)
+    linhas = [
+        {**veiculo, **colunas_marca(veiculo.get("marca")), "created": agora, "updated": agora}
+        for veiculo in veiculos
+    ]
+    deltas = calcular_deltas(depois=[chave for linha in linhas for chave in contadores_do_veiculo(linha)])
+    return insert(Veiculo), linhas, deltas
+
+def statement_update_veiculos(
+    alteracoes: Dict[int, Dict[str, Any]],
+    atuais: Dict[int, Dict[str, Any]]
+) -> Tuple[Update, List[Dict[str, Any]], Dict]:
+    """
+    Comando de atualização em lote por chave primária, as linhas (ID + campos alterados)
+    dos veículos existentes em `atuais` e os deltas de estatísticas.
+    """
+    agora = datetime.now(UTC)
+    alteracoes = {
+        veiculo_id: {**campos, **colunas_marca(campos["marca"])} if "marca" in campos else campos
+        for veiculo_id, campos in alteracoes.items()
+    }
+    linhas = [{**alteracoes[veiculo_id], "id": veiculo_id, "updated": agora} for veiculo_id in atuais]
+    deltas = calcular_deltas(
+        antes=[chave for atual in atuais.values() for chave in contadores_do_veiculo(atual)],
+        depois=[
+            chave for veiculo_id, atual in atuais.items()
+            for chave in contadores_do_veiculo({**atual, **alteracoes[veiculo_id]})
+        ]
+    )
+    return update(Veiculo), linhas, deltas
+
+def statement_delete_veiculos(ids: Sequence[int]) -> Delete:
+    """
+    Comando de remoção dos veículos com os IDs informados.
+    """
+    return delete(Veiculo).where(Veiculo.id.in_(ids)).execution_options(synchronize_session=False)
+
+# --- Operações com Session síncrona ---
 
 def create_veiculo(db: Session, veiculo: VeiculoCreate) -> Veiculo:
     """
@@ -12,6 +285,8 @@ def create_veiculo(db: Session, veiculo: VeiculoCreate) -> Veiculo:
     """
     db_veiculo = Veiculo(**veiculo.model_dump())
     db.add(db_veiculo)
+    db.flush()
+    crud_estatisticas.aplicar_deltas(db, calcular_deltas(depois=contadores_do_veiculo(db_veiculo)))
     db.commit()
     db.refresh(db_veiculo)
     return db_veiculo
@@ -20,7 +295,7 @@ def get_veiculo(db: Session, veiculo_id: int) -> Optional[Veiculo]:
     """
     Retorna um veículo específico pelo ID.
     """
-    return db.query(Veiculo).filter(Veiculo.id == veiculo_id).first()
+    return db.scalars(query_veiculo(veiculo_id)).first()
 
 def get_veiculos(
     db: Session,
@@ -28,22 +303,20 @@ def get_veiculos(
     limit: int = 100,
     marca: Optional[str] = None,
     ano: Optional[int] = None,
-    cor: Optional[str] = None
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    q: Optional[str] = None
 ) -> List[Veiculo]:
     """
     Retorna uma lista de veículos com filtros opcionais.
     """
-    query = db.query(Veiculo)
-
-    # Aplica filtros se fornecidos
-    if marca:
-        query = query.filter(Veiculo.marca.ilike(f"%{marca}%"))
-    if ano:
-        query = query.filter(Veiculo.ano == ano)
-    if cor:
-        query = query.filter(Veiculo.veiculo.ilike(f"%{cor}%"))
-
-    return query.offset(skip).limit(limit).all()
+    return db.scalars(
+        query_veiculos(
+            skip=skip, limit=limit, marca=marca, ano=ano, cor=cor, vendido=vendido, after_id=after_id,
+            q=q, dialect_name=nome_dialeto(db)
+        )
+    ).all()
 
 def update_veiculo(
     db: Session,
@@ -53,15 +326,18 @@ def update_veiculo(
     """
     Atualiza um veículo existente.
     """
-    db_veiculo = get_veiculo(db, veiculo_id)
+    db_veiculo = db.scalars(query_veiculo_para_alterar(veiculo_id)).first()
     if not db_veiculo:
         return None
 
+    antes = contadores_do_veiculo(db_veiculo)
+
     # Atualiza apenas os campos fornecidos
     update_data = veiculo_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_veiculo, field, value)
 
+    crud_estatisticas.aplicar_deltas(db, calcular_deltas(antes, contadores_do_veiculo(db_veiculo)))
     db.commit()
     db.refresh(db_veiculo)
     return db_veiculo
@@ -71,63 +347,131 @@ def delete_veiculo(db: Session, veiculo_id: int) -> bool:
     Remove um veículo do banco de dados.
     Retorna True se o veículo foi encontrado e removido, False caso contrário.
     """
-    db_veiculo = get_veiculo(db, veiculo_id)
+    db_veiculo = db.scalars(query_veiculo_para_alterar(veiculo_id)).first()
     if not db_veiculo:
         return False
 
     db.delete(db_veiculo)
+    crud_estatisticas.aplicar_deltas(db, calcular_deltas(antes=contadores_do_veiculo(db_veiculo)))
     db.commit()
     return True
 
+def _carregar_contadores(db: Session, ids: Sequence[int], chunk_size: int) -> Dict[int, Dict[str, Any]]:
+    atuais = {}
+    for bloco in em_blocos(ids, chunk_size):
+        for row in db.execute(query_contadores_por_ids(bloco)).mappings():
+            atuais[row["id"]] = dict(row)
+    return atuais
+
+def create_veiculos(db: Session, veiculos: List[Dict[str, Any]], chunk_size: int = 1000) -> int:
+    """
+    Cria vários veículos (já validados) em uma única transação.
+    Retorna a quantidade inserida.
+    """
+    statement, linhas, deltas = statement_insert_veiculos(veiculos)
+    for bloco in em_blocos(linhas, chunk_size):
+        db.execute(statement, bloco)
+    crud_estatisticas.aplicar_deltas(db, deltas)
+    db.commit()
+    return len(linhas)
+
+def update_veiculos(db: Session, alteracoes: Dict[int, Dict[str, Any]], chunk_size: int = 1000) -> List[int]:
+    """
+    Atualiza vários veículos em uma única transação. `alteracoes` mapeia o ID do
+    veículo aos campos a alterar. Retorna os IDs não encontrados (que não são alterados).
+    """
+    atuais = _carregar_contadores(db, list(alteracoes), chunk_size)
+    statement, linhas, deltas = statement_update_veiculos(alteracoes, atuais)
+    for bloco in em_blocos(linhas, chunk_size):
+        db.execute(statement, bloco)
+    crud_estatisticas.aplicar_deltas(db, deltas)
+    db.commit()
+    return [veiculo_id for veiculo_id in alteracoes if veiculo_id not in atuais]
+
+def delete_veiculos(db: Session, ids: List[int], chunk_size: int = 1000) -> List[int]:
+    """
+    Remove vários veículos em uma única transação.
+    Retorna os IDs não encontrados.
+    """
+    atuais = _carregar_contadores(db, ids, chunk_size)
+    for bloco in em_blocos(list(atuais), chunk_size):
+        db.execute(statement_delete_veiculos(bloco))
+    crud_estatisticas.aplicar_deltas(
+        db, calcular_deltas(antes=[chave for atual in atuais.values() for chave in contadores_do_veiculo(atual)])
+    )
+    db.commit()
+    return [veiculo_id for veiculo_id in ids if veiculo_id not in atuais]
+
+def normalizar_marcas(db: Session) -> List[Tuple[str, int]]:
+    """
+    Preenche o `marca_id` (e o nome canônico) dos veículos gravados sem ele cuja marca
+    está no catálogo, reconstruindo as estatísticas se algum mudou. Retorna as marcas
+    fora do catálogo que restaram, com a quantidade de veículos de cada uma: o filtro
+    por marca não encontra esses veículos até que sejam corrigidos ou removidos.
+    """
+    sem_marca_id = and_(Veiculo.marca_id.is_(None), Veiculo.marca.is_not(None))
+    alterados = 0
+    for grafia in db.scalars(select(Veiculo.marca).where(sem_marca_id).distinct()).all():
+        encontrada = buscar_marca(grafia)
+        if encontrada is not None:
+            alterados += db.execute(
+                update(Veiculo)
+                .where(sem_marca_id, Veiculo.marca == grafia)
+                .values(marca_id=encontrada[0], marca=encontrada[1])
+                .execution_options(synchronize_session=False)
+            ).rowcount
+    if alterados:
+        crud_estatisticas.reconstruir_estatisticas(db)
+    restantes = db.execute(
+        select(Veiculo.marca, func.count()).where(sem_marca_id).group_by(Veiculo.marca).order_by(Veiculo.marca)
+    ).all()
+    db.commit()
+    return [(marca, quantidade) for marca, quantidade in restantes]
+
 def count_veiculos_nao_vendidos(db: Session) -> int:
     """
     Retorna o total de veículos não vendidos.
     """
-    return db.query(func.count(Veiculo.id)).filter(Veiculo.vendido == False).scalar()
+    return db.scalar(query_count_veiculos_nao_vendidos())
 
 def get_distribuicao_por_decada(db: Session) -> List[Dict[str, Any]]:
     """
     Retorna a distribuição de veículos por década de fabricação.
     """
-    decada_expression = (Veiculo.ano // 10) * 10
-
-    decadas = db.query(
-        decada_expression.label("decada_inicio"),
-        func.count(Veiculo.id)
-    ).group_by(decada_expression).order_by(decada_expression.asc()).all()
-
-    return [
-        {"decada": f"{decada}s", "quantidade": count}
-        for decada, count in decadas
-    ]
+    return formatar_distribuicao_por_decada(db.execute(query_distribuicao_por_decada(nome_dialeto(db))).all())
 
 def get_distribuicao_por_fabricante(db: Session) -> List[Dict[str, Any]]:
     """
     Retorna a distribuição de veículos por fabricante.
     """
-    fabricantes = db.query(
-        Veiculo.marca,
-        func.count(Veiculo.id)
-    ).group_by(Veiculo.marca).all()
+    return formatar_distribuicao_por_fabricante(db.execute(query_distribuicao_por_fabricante()).all())
 
-    return [
-        {"fabricante": marca, "quantidade": count}
-        for marca, count in fabricantes
-    ]
+def get_facetas(
+    db: Session,
+    marca: Optional[str] = None,
+    ano: Optional[int] = None,
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    q: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Retorna as contagens por marca, ano, década e vendido dos veículos que atendem aos filtros.
+    """
+    query = query_facetas(marca=marca, ano=ano, cor=cor, vendido=vendido, q=q, dialect_name=nome_dialeto(db))
+    return formatar_facetas(db.execute(query).all())
 
 def get_veiculos_ultimos_7_dias(db: Session) -> List[Veiculo]:
     """
     Retorna os veículos cadastrados nos últimos 7 dias.
     """
-    data_limite = datetime.now(UTC) - timedelta(days=7)
-    return db.query(Veiculo).filter(Veiculo.created >= data_limite).all()
+    return db.scalars(query_veiculos_ultimos_7_dias()).all()
 
 def validar_marca(db: Session, marca: str) -> bool:
     """
     Valida se a marca existe no banco de dados.
     Retorna True se a marca existe, False caso contrário.
     """
-    marca_existente = db.query(Veiculo).filter(
-        Veiculo.marca.ilike(f"%{marca}%")
+    marca_existente = db.scalars(
+        select(Veiculo).where(contem(Veiculo.marca, marca, nome_dialeto(db))).limit(1)
     ).first()
     return marca_existente is not None
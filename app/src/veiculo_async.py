@@ -0,0 +1,200 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any, Sequence, Union
+
+from app.models.veiculo import Veiculo
+from app.schemas.veiculo import VeiculoCreate, VeiculoUpdate
+from app.src import estatisticas_async as crud_estatisticas
+from app.src.estatisticas import calcular_deltas, contadores_do_veiculo
+from app.src.veiculo import (
+    query_veiculo,
+    query_veiculos,
+    query_count_veiculos_nao_vendidos,
+    query_distribuicao_por_decada,
+    query_distribuicao_por_fabricante,
+    query_veiculos_ultimos_7_dias,
+    query_facetas,
+    formatar_distribuicao_por_decada,
+    formatar_distribuicao_por_fabricante,
+    formatar_facetas,
+    nome_dialeto,
+    em_blocos,
+    query_contadores_por_ids,
+    query_veiculo_para_alterar,
+    statement_insert_veiculos,
+    statement_update_veiculos,
+    statement_delete_veiculos,
+)
+
+# Versões assíncronas (AsyncSession) das operações de app.src.veiculo.
+# As consultas são as mesmas; muda apenas a forma de executá-las.
+
+async def create_veiculo(db: AsyncSession, veiculo: VeiculoCreate) -> Veiculo:
+    """
+    Cria um novo veículo no banco de dados.
+    """
+    db_veiculo = Veiculo(**veiculo.model_dump())
+    db.add(db_veiculo)
+    await db.flush()
+    await crud_estatisticas.aplicar_deltas(db, calcular_deltas(depois=contadores_do_veiculo(db_veiculo)))
+    await db.commit()
+    await db.refresh(db_veiculo)
+    return db_veiculo
+
+async def get_veiculo(db: AsyncSession, veiculo_id: int) -> Optional[Veiculo]:
+    """
+    Retorna um veículo específico pelo ID.
+    """
+    return (await db.scalars(query_veiculo(veiculo_id))).first()
+
+async def get_veiculos(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    marca: Optional[str] = None,
+    ano: Optional[int] = None,
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    q: Optional[str] = None,
+    campos: Optional[Sequence[str]] = None
+) -> List[Union[Veiculo, Dict[str, Any]]]:
+    """
+    Retorna uma lista de veículos com filtros opcionais. Com `campos`, seleciona só essas
+    colunas e retorna dicionários em vez de objetos do ORM.
+    """
+    query = query_veiculos(
+        skip=skip, limit=limit, marca=marca, ano=ano, cor=cor, vendido=vendido, after_id=after_id,
+        q=q, dialect_name=nome_dialeto(db), campos=campos
+    )
+    return await _executar_listagem(db, query, campos)
+
+async def _executar_listagem(db: AsyncSession, query, campos: Optional[Sequence[str]]) -> List[Any]:
+    if campos:
+        return [dict(linha) for linha in (await db.execute(query)).mappings()]
+    return (await db.scalars(query)).all()
+
+async def update_veiculo(
+    db: AsyncSession,
+    veiculo_id: int,
+    veiculo_update: VeiculoUpdate
+) -> Optional[Veiculo]:
+    """
+    Atualiza um veículo existente.
+    """
+    db_veiculo = (await db.scalars(query_veiculo_para_alterar(veiculo_id))).first()
+    if not db_veiculo:
+        return None
+
+    antes = contadores_do_veiculo(db_veiculo)
+
+    # Atualiza apenas os campos fornecidos
+    update_data = veiculo_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_veiculo, field, value)
+
+    await crud_estatisticas.aplicar_deltas(db, calcular_deltas(antes, contadores_do_veiculo(db_veiculo)))
+    await db.commit()
+    await db.refresh(db_veiculo)
+    return db_veiculo
+
+async def delete_veiculo(db: AsyncSession, veiculo_id: int) -> bool:
+    """
+    Remove um veículo do banco de dados.
+    Retorna True se o veículo foi encontrado e removido, False caso contrário.
+    """
+    db_veiculo = (await db.scalars(query_veiculo_para_alterar(veiculo_id))).first()
+    if not db_veiculo:
+        return False
+
+    await db.delete(db_veiculo)
+    await crud_estatisticas.aplicar_deltas(db, calcular_deltas(antes=contadores_do_veiculo(db_veiculo)))
+    await db.commit()
+    return True
+
+async def _carregar_contadores(db: AsyncSession, ids: Sequence[int], chunk_size: int) -> Dict[int, Dict[str, Any]]:
+    atuais = {}
+    for bloco in em_blocos(ids, chunk_size):
+        for row in (await db.execute(query_contadores_por_ids(bloco))).mappings():
+            atuais[row["id"]] = dict(row)
+    return atuais
+
+async def create_veiculos(db: AsyncSession, veiculos: List[Dict[str, Any]], chunk_size: int = 1000) -> int:
+    """
+    Cria vários veículos (já validados) em uma única transação.
+    Retorna a quantidade inserida.
+    """
+    statement, linhas, deltas = statement_insert_veiculos(veiculos)
+    for bloco in em_blocos(linhas, chunk_size):
+        await db.execute(statement, bloco)
+    await crud_estatisticas.aplicar_deltas(db, deltas)
+    await db.commit()
+    return len(linhas)
+
+async def update_veiculos(db: AsyncSession, alteracoes: Dict[int, Dict[str, Any]], chunk_size: int = 1000) -> List[int]:
+    """
+    Atualiza vários veículos em uma única transação. `alteracoes` mapeia o ID do
+    veículo aos campos a alterar. Retorna os IDs não encontrados (que não são alterados).
+    """
+    atuais = await _carregar_contadores(db, list(alteracoes), chunk_size)
+    statement, linhas, deltas = statement_update_veiculos(alteracoes, atuais)
+    for bloco in em_blocos(linhas, chunk_size):
+        await db.execute(statement, bloco)
+    await crud_estatisticas.aplicar_deltas(db, deltas)
+    await db.commit()
+    return [veiculo_id for veiculo_id in alteracoes if veiculo_id not in atuais]
+
+async def delete_veiculos(db: AsyncSession, ids: List[int], chunk_size: int = 1000) -> List[int]:
+    """
+    Remove vários veículos em uma única transação.
+    Retorna os IDs não encontrados.
+    """
+    atuais = await _carregar_contadores(db, ids, chunk_size)
+    for bloco in em_blocos(list(atuais), chunk_size):
+        await db.execute(statement_delete_veiculos(bloco))
+    await crud_estatisticas.aplicar_deltas(
+        db, calcular_deltas(antes=[chave for atual in atuais.values() for chave in contadores_do_veiculo(atual)])
+    )
+    await db.commit()
+    return [veiculo_id for veiculo_id in ids if veiculo_id not in atuais]
+
+async def count_veiculos_nao_vendidos(db: AsyncSession) -> int:
+    """
+    Retorna o total de veículos não vendidos.
+    """
+    return await db.scalar(query_count_veiculos_nao_vendidos())
+
+async def get_distribuicao_por_decada(db: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Retorna a distribuição de veículos por década de fabricação.
+    """
+    return formatar_distribuicao_por_decada((await db.execute(query_distribuicao_por_decada(nome_dialeto(db)))).all())
+
+async def get_distribuicao_por_fabricante(db: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Retorna a distribuição de veículos por fabricante.
+    """
+    return formatar_distribuicao_por_fabricante((await db.execute(query_distribuicao_por_fabricante())).all())
+
+async def get_facetas(
+    db: AsyncSession,
+    marca: Optional[str] = None,
+    ano: Optional[int] = None,
+    cor: Optional[str] = None,
+    vendido: Optional[bool] = None,
+    q: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Retorna as contagens por marca, ano, década e vendido dos veículos que atendem aos filtros.
+    """
+    query = query_facetas(marca=marca, ano=ano, cor=cor, vendido=vendido, q=q, dialect_name=nome_dialeto(db))
+    return formatar_facetas((await db.execute(query)).all())
+
+async def get_veiculos_ultimos_7_dias(
+    db: AsyncSession,
+    campos: Optional[Sequence[str]] = None
+) -> List[Union[Veiculo, Dict[str, Any]]]:
+    """
+    Retorna os veículos cadastrados nos últimos 7 dias (só as colunas de `campos`, como
+    dicionários, quando informado).
+    """
+    return await _executar_listagem(db, query_veiculos_ultimos_7_dias(campos), campos)
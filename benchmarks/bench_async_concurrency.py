@@ -0,0 +1,95 @@
+"""
+Mostra que a concorrência da API deixou de ser limitada pelo threadpool do AnyIO.
+
+Compara, com a mesma latência de banco simulada por statement:
+
+- "sync": rota `def` com Session síncrona (modelo anterior), que ocupa um slot do
+  threadpool durante todo o round trip ao banco;
+- "async": a rota `async def` real da aplicação, com AsyncSession.
+
+A latência é injetada no callback de trace do sqlite3, que roda na thread que
+executa o statement (thread do threadpool no modo sync, thread do aiosqlite no
+modo async), de forma equivalente à espera de rede de um MySQL remoto.
+
+Uso:
+    python -m benchmarks.bench_async_concurrency --threads 8 --latency-ms 50
+"""
+import argparse
+import asyncio
+import time
+
+import anyio.to_thread
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.main import app
+from app.services.veiculo import VeiculoService
+from benchmarks.sqlite import preparar_banco
+
+sync_app = FastAPI()
+sync_app.dependency_overrides = app.dependency_overrides
+
+
+@sync_app.get("/api/v1/veiculos/{veiculo_id}")
+def obter_veiculo_sync(veiculo_id: int, db: Session = Depends(get_db)):
+    return VeiculoService(db).obter_veiculo(veiculo_id)
+
+
+def injetar_latencia(engine, conexao_sqlite, latencia: float) -> None:
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        conexao_sqlite(dbapi_connection).set_trace_callback(lambda _: time.sleep(latencia))
+
+    # Descarta as conexões abertas durante a carga de dados, que não têm o callback.
+    engine.dispose()
+
+
+async def medir(asgi_app, concorrencia: int, total: int) -> float:
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        fila = iter(range(total))
+
+        async def trabalhador():
+            for i in fila:
+                response = await client.get(f"/api/v1/veiculos/{i % 100 + 1}")
+                assert response.status_code == 200, response.text
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+        return total / (time.perf_counter() - inicio)
+
+
+async def executar(args, async_engine) -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+    print(f"threadpool: {args.threads} threads, latência simulada: {args.latency_ms} ms por statement")
+    print(f"{'concorrência':>12} {'sync req/s':>12} {'async req/s':>12}")
+    for concorrencia in args.concurrency:
+        total = concorrencia * args.rounds
+        sync_rps = await medir(sync_app, concorrencia, total)
+        async_rps = await medir(app, concorrencia, total)
+        print(f"{concorrencia:>12} {sync_rps:>12.1f} {async_rps:>12.1f}")
+    # As conexões do aiosqlite mantêm threads próprias; sem dispose o processo não termina.
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8, help="Tamanho do threadpool do AnyIO")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Latência simulada por statement")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--rounds", type=int, default=5, help="Requisições por cliente simultâneo")
+    args = parser.parse_args()
+
+    engine, async_engine = preparar_banco(200, pool_size=max(args.concurrency))
+    latencia = args.latency_ms / 1000
+    injetar_latencia(engine, lambda c: c, latencia)
+    injetar_latencia(async_engine.sync_engine, lambda c: c.driver_connection._conn, latencia)
+
+    asyncio.run(executar(args, async_engine))
+
+
+if __name__ == "__main__":
+    main()
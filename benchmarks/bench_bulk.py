@@ -0,0 +1,64 @@
+"""
+Compara a vazão (linhas/s) da carga de veículos um a um, com um POST /api/v1/veiculos/
+por veículo (um commit e um SELECT de refresh cada), com POST /api/v1/veiculos/bulk
+em diferentes tamanhos de bloco (executemany em uma única transação).
+
+As requisições são feitas em processo (ASGI), sem rede, sobre um banco SQLite.
+
+Uso:
+    python -m benchmarks.bench_bulk --rows 10000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.main import app
+from benchmarks.sqlite import dados_veiculo, preparar_banco
+
+URL = "/api/v1/veiculos/"
+
+
+async def um_a_um(client: httpx.AsyncClient, veiculos) -> float:
+    inicio = time.perf_counter()
+    for veiculo in veiculos:
+        response = await client.post(URL, json=veiculo)
+        response.raise_for_status()
+    return time.perf_counter() - inicio
+
+
+async def em_lote(client: httpx.AsyncClient, veiculos, chunk_size: int) -> float:
+    inicio = time.perf_counter()
+    response = await client.post(f"{URL}bulk", params={"chunk_size": chunk_size}, json=veiculos)
+    response.raise_for_status()
+    assert response.json()["processados"] == len(veiculos), response.json()["erros"][:3]
+    return time.perf_counter() - inicio
+
+
+async def executar(args):
+    _, async_engine = preparar_banco(0)
+    veiculos = [dados_veiculo(i) for i in range(args.rows)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'modo':<24} {'linhas':>8} {'segundos':>9} {'linhas/s':>10}")
+        amostra = veiculos[:args.one_by_one_rows]
+        segundos = await um_a_um(client, amostra)
+        print(f"{'um a um':<24} {len(amostra):>8} {segundos:>9.2f} {len(amostra) / segundos:>10.0f}")
+        for chunk_size in args.chunk_sizes:
+            segundos = await em_lote(client, veiculos, chunk_size)
+            print(f"{f'bulk chunk_size={chunk_size}':<24} {len(veiculos):>8} {segundos:>9.2f} {len(veiculos) / segundos:>10.0f}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="Veículos por carga em lote")
+    parser.add_argument("--one-by-one-rows", type=int, default=2_000,
+                        help="Veículos da carga um a um (mais lenta; a vazão não depende do total)")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compara a busca textual indexada (`q`, FTS5 no SQLite / FULLTEXT no MySQL) com a
+busca por LIKE '%termo%' em veiculo, marca e descricao, que percorre a tabela inteira.
+
+Uso:
+    python -m benchmarks.bench_busca --rows 1000000
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.veiculo import Veiculo
+from app.src import veiculo as crud_veiculo
+from benchmarks.sqlite import preparar_banco
+
+BUSCAS = ["#123456", "Corolla Cross Híbrido", "Tucson Bege", "Prata", "HB20 Preto Diesel #99"]
+
+
+def buscar_like(db: Session, q: str, limit: int):
+    termos = crud_veiculo.termos_busca(q)
+    query = select(Veiculo).where(and_(*[
+        or_(
+            Veiculo.veiculo.ilike(f"%{termo}%"),
+            Veiculo.marca.ilike(f"%{termo}%"),
+            Veiculo.descricao.ilike(f"%{termo}%")
+        )
+        for termo in termos
+    ])).order_by(Veiculo.id).limit(limit)
+    return db.scalars(query).all()
+
+
+def medir(func, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Veículos no banco de teste")
+    parser.add_argument("--limit", type=int, default=10, help="Tamanho da página (a lista da UI usa 10)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine, _ = preparar_banco(args.rows)
+
+    print(f"{'busca':<28} {'resultados':>10} {'LIKE ms':>10} {'índice ms':>10}")
+    with Session(engine) as db:
+        for q in BUSCAS:
+            total = len(crud_veiculo.get_veiculos(db, limit=args.rows, q=q))
+            like_ms = medir(lambda: buscar_like(db, q, args.limit), args.repeat)
+            indice_ms = medir(lambda: crud_veiculo.get_veiculos(db, limit=args.limit, q=q), args.repeat)
+            print(f"{q:<28} {total:>10} {like_ms:>10.2f} {indice_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
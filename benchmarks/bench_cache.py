@@ -0,0 +1,65 @@
+"""
+Mede GET /api/v1/veiculos/{id} com e sem o cache de leitura, repetindo consultas a um
+conjunto pequeno de IDs "quentes". Conta também os comandos SQL executados: com o cache,
+as consultas repetidas não chegam ao banco.
+
+Uso:
+    python -m benchmarks.bench_cache --rows 100000 --requests 5000 --hot-ids 50
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from sqlalchemy import event
+
+from app.main import app
+from app.services.cache import LRUCache, get_cache_veiculos
+from benchmarks.sqlite import preparar_banco
+
+
+def usar(cache):
+    return lambda: cache
+
+
+async def executar(args):
+    _, async_engine = preparar_banco(args.rows)
+    comandos = 0
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def contar(*_):
+        nonlocal comandos
+        comandos += 1
+
+    ids = random.Random(42).sample(range(1, args.rows + 1), args.hot_ids)
+    sequencia = [ids[i % len(ids)] for i in range(args.requests)]
+    transport = httpx.ASGITransport(app=app)
+
+    print(f"{'modo':<10} {'req/s':>8} {'ms/req':>8} {'SQL':>7}  métricas")
+    for nome, cache in (("sem cache", LRUCache(max_itens=0)), ("com cache", LRUCache(max_itens=args.hot_ids * 2))):
+        app.dependency_overrides[get_cache_veiculos] = usar(cache)
+        comandos = 0
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            inicio = time.perf_counter()
+            for veiculo_id in sequencia:
+                (await client.get(f"/api/v1/veiculos/{veiculo_id}")).raise_for_status()
+            segundos = time.perf_counter() - inicio
+        metricas = cache.metricas()
+        print(
+            f"{nome:<10} {args.requests / segundos:>8.0f} {segundos / args.requests * 1000:>8.3f} {comandos:>7}  "
+            f"acertos={metricas['acertos']} falhas={metricas['falhas']}"
+        )
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Veículos no banco de teste")
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--hot-ids", type=int, default=50, help="Quantidade de IDs consultados repetidamente")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
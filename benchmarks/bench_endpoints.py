@@ -0,0 +1,293 @@
+"""
+Suíte de benchmark dos endpoints: popula um banco com veículos em distribuição realista
+(participação de mercado das marcas, frota concentrada nos anos recentes, vendidos
+conforme a idade; ver `benchmarks.sqlite.dados_veiculo_realista`) e exercita, em processo
+e com a concorrência escolhida, todas as rotas de /api/v1/veiculos e /ui/fragment/*.
+Para cada rota reporta req/s e as latências p50/p95/p99, e grava tudo em JSON para
+comparar versões sucessivas (`--comparar resultado_anterior.json`).
+
+Os bancos populados ficam em `--dados` (um arquivo SQLite por tamanho) e são reutilizados
+nas execuções seguintes. Os cenários de escrita alteram os dados, mas devolvem o banco à
+mesma quantidade de veículos (o que é criado é removido). Com `--database-url` (ex.: um
+MySQL local), as tabelas desse banco são recriadas.
+
+Uso:
+    python -m benchmarks.bench_endpoints --rows 10000 1000000 5000000 --concurrency 8 \\
+        --requests 500 --saida resultados.json
+    python -m benchmarks.bench_endpoints --rows 10000 --rotas lista fragment --comparar resultados.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, UTC
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import sqlalchemy
+from sqlalchemy import select, text
+
+from app.main import app
+from app.models.veiculo import Veiculo
+from app.services.cache import LRUCache, get_cache_fragmentos, get_cache_veiculos
+from app.services.veiculo import codificar_cursor
+from benchmarks.sqlite import MARCAS, preparar_banco
+
+API = "/api/v1/veiculos"
+DESCRICAO_TEMPORARIA = "bench-endpoints"
+TAMANHO_LOTE = 50
+
+Requisicao = Tuple[str, str, Dict[str, Any]]
+
+
+def usar(cache):
+    return lambda: cache
+
+
+def percentil(ordenados: List[float], p: float) -> float:
+    """Percentil pelo método do posto mais próximo, sobre uma lista já ordenada."""
+    return ordenados[min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))]
+
+
+class Cenarios:
+    """
+    Gera as requisições de cada rota. `ids_criados` guarda os veículos criados pelo
+    cenário de criação, removidos depois pelo cenário de remoção.
+    """
+
+    def __init__(self, total: int, semente: int):
+        self.total = max(total, 1)
+        self.rng = random.Random(semente)
+        self.ids_criados: List[int] = []
+        self.ids_temporarios: List[int] = []
+
+    def id_qualquer(self) -> int:
+        return self.rng.randint(1, self.total)
+
+    def marca(self) -> str:
+        return self.rng.choice(MARCAS)
+
+    def novo_veiculo(self) -> Dict[str, Any]:
+        return {
+            "veiculo": "Bench", "marca": self.marca(), "ano": self.rng.randint(1990, 2024),
+            "descricao": DESCRICAO_TEMPORARIA, "vendido": False,
+        }
+
+    def arquivo_importacao(self) -> bytes:
+        linhas = ["veiculo,marca,ano,descricao,vendido"]
+        linhas += [f"Bench,{self.marca()},{self.rng.randint(1990, 2024)},{DESCRICAO_TEMPORARIA},false" for _ in range(TAMANHO_LOTE)]
+        return ("\n".join(linhas) + "\n").encode()
+
+    def todos(self) -> List[Tuple[str, Callable[[], Optional[Requisicao]]]]:
+        """(nome, gerador de requisição) na ordem de execução; o gerador retorna None quando se esgota."""
+        return [
+            ("GET /veiculos/{id}", lambda: ("GET", f"{API}/{self.id_qualquer()}", {})),
+            ("GET /veiculos/", lambda: ("GET", f"{API}/?limit=20", {})),
+            ("GET /veiculos/?marca", lambda: ("GET", f"{API}/?marca={self.marca()}&limit=20", {})),
+            ("GET /veiculos/?ano", lambda: ("GET", f"{API}/?ano={self.rng.randint(2010, 2024)}&limit=20", {})),
+            ("GET /veiculos/?vendido", lambda: ("GET", f"{API}/?vendido=false&limit=20", {})),
+            ("GET /veiculos/?cursor", lambda: ("GET", f"{API}/?limit=20&cursor={codificar_cursor(self.id_qualquer())}", {})),
+            ("GET /veiculos/?skip", lambda: ("GET", f"{API}/?limit=20&skip={self.id_qualquer() - 1}", {})),
+            ("GET /veiculos/?q", lambda: ("GET", f"{API}/?q={self.rng.choice(['corolla', 'onix preto', 'hilux diesel', 'turbo'])}&limit=20", {})),
+            ("GET /veiculos/?fields", lambda: ("GET", f"{API}/?fields=id,veiculo,marca,ano&limit=100", {})),
+            ("GET /veiculos/nao-vendidos/", lambda: ("GET", f"{API}/nao-vendidos/?limit=20", {})),
+            ("GET /veiculos/recentes/", lambda: ("GET", f"{API}/recentes/?fields=id,veiculo,marca,created", {})),
+            ("GET /veiculos/estatisticas/geral", lambda: ("GET", f"{API}/estatisticas/geral", {})),
+            ("GET /veiculos/facets", lambda: ("GET", f"{API}/facets" + self.rng.choice([
+                "", f"?marca={self.marca()}", "?vendido=false",
+            ]), {})),
+            ("GET /veiculos/export", lambda: ("GET", f"{API}/export?marca={self.marca()}&ano={self.rng.randint(1990, 2024)}", {})),
+            ("POST /veiculos/", lambda: ("POST", f"{API}/", {"json": self.novo_veiculo()})),
+            ("PUT /veiculos/{id}", lambda: ("PUT", f"{API}/{self.id_qualquer()}", {"json": {"vendido": self.rng.random() < 0.5}})),
+            ("DELETE /veiculos/{id}", lambda: self.ids_criados and ("DELETE", f"{API}/{self.ids_criados.pop()}", {})),
+            ("POST /veiculos/bulk", lambda: ("POST", f"{API}/bulk", {"json": [self.novo_veiculo() for _ in range(TAMANHO_LOTE)]})),
+            ("PUT /veiculos/bulk", lambda: ("PUT", f"{API}/bulk", {"json": [
+                {"id": self.id_qualquer(), "vendido": self.rng.random() < 0.5} for _ in range(TAMANHO_LOTE)
+            ]})),
+            ("POST /veiculos/import", lambda: ("POST", f"{API}/import", {
+                "files": {"arquivo": ("bench.csv", self.arquivo_importacao(), "text/csv")}
+            })),
+            ("GET /veiculos/importacoes/{id}", lambda: ("GET", f"{API}/importacoes/1", {})),
+            ("DELETE /veiculos/bulk", lambda: self.ids_temporarios and ("DELETE", f"{API}/bulk", {"json": [
+                self.ids_temporarios.pop() for _ in range(min(TAMANHO_LOTE, len(self.ids_temporarios)))
+            ]})),
+            ("GET /ui/fragment/veiculos-lista", lambda: ("GET", "/ui/fragment/veiculos-lista" + self.rng.choice([
+                "", f"?marca={self.marca()}", f"?ano={self.rng.randint(2015, 2024)}", "?vendido=false",
+            ]), {})),
+            ("GET /ui/fragment/veiculos-estatisticas", lambda: ("GET", "/ui/fragment/veiculos-estatisticas", {})),
+            ("GET /ui/fragment/veiculo-detalhes/{id}", lambda: ("GET", f"/ui/fragment/veiculo-detalhes/{self.id_qualquer()}", {})),
+            ("GET /ui/fragment/veiculo-form-criar", lambda: ("GET", "/ui/fragment/veiculo-form-criar", {})),
+            ("GET /ui/fragment/veiculo-form-editar/{id}", lambda: ("GET", f"/ui/fragment/veiculo-form-editar/{self.id_qualquer()}", {})),
+        ]
+
+
+async def executar_cenario(client, gerar, requisicoes: int, concorrencia: int, ids_criados: List[int]) -> Dict[str, Any]:
+    latencias: List[float] = []
+    status: Dict[str, int] = {}
+    restantes = requisicoes
+
+    async def trabalhador():
+        nonlocal restantes
+        while restantes > 0:
+            restantes -= 1
+            requisicao = gerar()
+            if not requisicao:
+                return
+            metodo, url, argumentos = requisicao
+            inicio = time.perf_counter()
+            response = await client.request(metodo, url, **argumentos)
+            await response.aread()
+            latencias.append(time.perf_counter() - inicio)
+            status[str(response.status_code)] = status.get(str(response.status_code), 0) + 1
+            if metodo == "POST" and url == f"{API}/" and response.status_code == 201:
+                ids_criados.append(response.json()["id"])
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabalhador() for _ in range(concorrencia)])
+    segundos = time.perf_counter() - inicio
+    if not latencias:
+        return {"requisicoes": 0}
+    ordenadas = sorted(latencias)
+    return {
+        "requisicoes": len(latencias),
+        "erros": sum(total for codigo, total in status.items() if not codigo.startswith(("2", "3"))),
+        "status": status,
+        "req_s": round(len(latencias) / segundos, 1),
+        "media_ms": round(sum(latencias) / len(latencias) * 1000, 3),
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 3),
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 3),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 3),
+    }
+
+
+def carregar_ids_temporarios(engine) -> List[int]:
+    """IDs dos veículos criados pelos cenários em lote e de importação, para remoção."""
+    with engine.connect() as conn:
+        return list(conn.scalars(select(Veiculo.id).where(Veiculo.descricao == DESCRICAO_TEMPORARIA)))
+
+
+async def executar_tamanho(args, total: int) -> Dict[str, Any]:
+    url = args.database_url
+    path = None if url else os.path.join(args.dados, f"veiculos_{total}.db")
+    inicio = time.perf_counter()
+    engine, async_engine = preparar_banco(
+        total, path=path, url=url, pool_size=max(5, args.concurrency), realista=True, reutilizar=url is None
+    )
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    print(f"\n{total} veículos ({engine.dialect.name}, banco pronto em {time.perf_counter() - inicio:.1f} s), "
+          f"concorrência {args.concurrency}")
+    if args.sem_cache:
+        app.dependency_overrides[get_cache_veiculos] = usar(LRUCache(max_itens=0))
+        app.dependency_overrides[get_cache_fragmentos] = usar(LRUCache(max_itens=0))
+
+    cenarios = Cenarios(total, args.semente)
+    resultados = {}
+    print(f"{'rota':<44} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for nome, gerar in cenarios.todos():
+            if args.rotas and not any(filtro in nome for filtro in args.rotas):
+                continue
+            if nome == "DELETE /veiculos/bulk":
+                cenarios.ids_temporarios = carregar_ids_temporarios(engine)
+            if args.aquecimento and nome.startswith("GET"):
+                await executar_cenario(client, gerar, args.aquecimento, args.concurrency, cenarios.ids_criados)
+            resultado = await executar_cenario(client, gerar, args.requests, args.concurrency, cenarios.ids_criados)
+            resultados[nome] = resultado
+            if resultado["requisicoes"]:
+                print(f"{nome:<44} {resultado['req_s']:>8.0f} {resultado['p50_ms']:>8.2f} "
+                      f"{resultado['p95_ms']:>8.2f} {resultado['p99_ms']:>8.2f} {resultado['erros']:>6}")
+        # Remove o que sobrou dos cenários de escrita (se algum foi filtrado por --rotas)
+        sobras = cenarios.ids_criados + carregar_ids_temporarios(engine)
+        for inicio_bloco in range(0, len(sobras), 1000):
+            await client.request("DELETE", f"{API}/bulk", json=sobras[inicio_bloco:inicio_bloco + 1000])
+
+    app.dependency_overrides.pop(get_cache_veiculos, None)
+    app.dependency_overrides.pop(get_cache_fragmentos, None)
+    await async_engine.dispose()
+    engine.dispose()
+    return resultados
+
+
+def versao_codigo() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual: Dict[str, Any], anterior: Dict[str, Any]) -> None:
+    """Imprime a variação de req/s e p95 de cada rota em relação a um resultado anterior."""
+    print(f"\nComparação com {anterior.get('versao')} ({anterior.get('data')})")
+    print(f"{'veículos':>9} {'rota':<44} {'req/s':>8} {'Δ req/s':>8} {'p95 ms':>8} {'Δ p95':>8}")
+    for total, rotas in atual["resultados"].items():
+        for nome, resultado in rotas.items():
+            antes = anterior.get("resultados", {}).get(total, {}).get(nome)
+            if not antes or not antes.get("requisicoes") or not resultado.get("requisicoes"):
+                continue
+            variacao_vazao = (resultado["req_s"] - antes["req_s"]) / antes["req_s"] * 100
+            variacao_p95 = (resultado["p95_ms"] - antes["p95_ms"]) / antes["p95_ms"] * 100
+            print(f"{total:>9} {nome:<44} {resultado['req_s']:>8.0f} {variacao_vazao:>+7.1f}% "
+                  f"{resultado['p95_ms']:>8.2f} {variacao_p95:>+7.1f}%")
+
+
+async def executar(args):
+    os.makedirs(args.dados, exist_ok=True)
+    if not args.log_sql:
+        # Sob concorrência, as escritas no SQLite esperam pelo lock do banco e cairiam no log de consultas lentas
+        logging.getLogger("app.sql").setLevel(logging.ERROR)
+    saida = {
+        "versao": versao_codigo(),
+        "data": datetime.now(UTC).isoformat(timespec="seconds"),
+        "parametros": {
+            "rows": args.rows, "concurrency": args.concurrency, "requests": args.requests,
+            "aquecimento": args.aquecimento, "sem_cache": args.sem_cache, "semente": args.semente,
+            "banco": "url" if args.database_url else "sqlite",
+        },
+        "ambiente": {
+            "python": platform.python_version(), "sqlalchemy": sqlalchemy.__version__,
+            "plataforma": platform.platform(), "cpus": os.cpu_count(),
+        },
+        "resultados": {},
+    }
+    for total in args.rows:
+        saida["resultados"][str(total)] = await executar_tamanho(args, total)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(saida, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em {args.saida}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(saida, json.load(arquivo))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000], help="Tamanhos do banco (ex.: 10000 1000000 5000000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas")
+    parser.add_argument("--requests", type=int, default=500, help="Requisições medidas por rota")
+    parser.add_argument("--aquecimento", type=int, default=20, help="Requisições de aquecimento por rota de leitura")
+    parser.add_argument("--rotas", nargs="*", help="Executa só as rotas cujo nome contém um destes textos")
+    parser.add_argument("--sem-cache", action="store_true", help="Desativa os caches de veículos e de fragmentos")
+    parser.add_argument("--semente", type=int, default=42, help="Semente dos dados e das requisições")
+    parser.add_argument("--dados", default=os.path.join(tempfile.gettempdir(), "tinnova_bench"),
+                        help="Diretório dos bancos SQLite populados (reutilizados entre execuções)")
+    parser.add_argument("--database-url", help="URL SQLAlchemy síncrona de outro banco (ex.: MySQL local); as tabelas são recriadas")
+    parser.add_argument("--log-sql", action="store_true", help="Mantém o log de consultas lentas e de possíveis N+1")
+    parser.add_argument("--saida", help="Arquivo JSON de resultados")
+    parser.add_argument("--comparar", help="Arquivo JSON de uma execução anterior para comparação")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
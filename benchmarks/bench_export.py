@@ -0,0 +1,70 @@
+"""
+Mede a exportação em streaming (GET /api/v1/veiculos/export): tempo até o primeiro
+bloco, tempo total e pico de memória alocada pelo Python (tracemalloc), comparando
+com a leitura de todas as linhas de uma vez antes de codificar o arquivo.
+
+O pico da exportação em streaming depende do tamanho da partição, e não do número
+de veículos; rode com valores diferentes de --rows para comparar.
+
+Uso:
+    python -m benchmarks.bench_export --rows 1000000 --format csv
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.exportacao import cabecalho_csv, codificar_csv, codificar_ndjson, exportar_veiculos
+from app.src.veiculo import nome_dialeto, query_exportacao
+from benchmarks.sqlite import preparar_banco
+
+
+async def em_streaming(session_factory, formato: str):
+    primeiro_bloco = None
+    total_bytes = 0
+    inicio = time.perf_counter()
+    async for bloco in exportar_veiculos(session_factory, formato):
+        if primeiro_bloco is None:
+            primeiro_bloco = time.perf_counter() - inicio
+        total_bytes += len(bloco)
+    return primeiro_bloco, time.perf_counter() - inicio, total_bytes
+
+
+async def tudo_em_memoria(session_factory, formato: str):
+    inicio = time.perf_counter()
+    async with session_factory() as db:
+        linhas = (await db.execute(query_exportacao(dialect_name=nome_dialeto(db)))).all()
+    conteudo = cabecalho_csv() + codificar_csv(linhas) if formato == "csv" else codificar_ndjson(linhas)
+    segundos = time.perf_counter() - inicio
+    return segundos, segundos, len(conteudo)
+
+
+async def medir(func, session_factory, formato: str):
+    tracemalloc.start()
+    primeiro_bloco, segundos, total_bytes = await func(session_factory, formato)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return primeiro_bloco, segundos, total_bytes, pico
+
+
+async def executar(args):
+    _, async_engine = preparar_banco(args.rows)
+    session_factory = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+    print(f"{'modo':<16} {'1º bloco s':>11} {'total s':>8} {'MB gerados':>11} {'pico MB':>8}")
+    for nome, func in (("streaming", em_streaming), ("tudo em memória", tudo_em_memoria)):
+        primeiro_bloco, segundos, total_bytes, pico = await medir(func, session_factory, args.format)
+        print(f"{nome:<16} {primeiro_bloco:>11.3f} {segundos:>8.2f} {total_bytes / 2**20:>11.1f} {pico / 2**20:>8.1f}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Veículos no banco de teste")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Mede os fragmentos HTMX de lista e estatísticas (/ui/fragment/...) com e sem o cache de
+fragmentos renderizados, repetindo um conjunto pequeno de combinações de filtros. Conta
+também os comandos SQL: com o cache, um acerto não consulta o banco nem renderiza o template.
+
+Uso:
+    python -m benchmarks.bench_fragmentos --rows 100000 --requests 3000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import event
+
+from app.main import app
+from app.services.cache import LRUCache, get_cache_fragmentos
+from benchmarks.sqlite import MARCAS, preparar_banco
+
+
+def usar(cache):
+    return lambda: cache
+
+
+async def executar(args):
+    _, async_engine = preparar_banco(args.rows)
+    comandos = 0
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def contar(*_):
+        nonlocal comandos
+        comandos += 1
+
+    urls = ["/ui/fragment/veiculos-estatisticas", "/ui/fragment/veiculos-lista"]
+    urls += [f"/ui/fragment/veiculos-lista?marca={marca}&limit=20" for marca in MARCAS[:8]]
+    sequencia = [urls[i % len(urls)] for i in range(args.requests)]
+    transport = httpx.ASGITransport(app=app)
+
+    print(f"{'modo':<10} {'req/s':>8} {'ms/req':>8} {'SQL':>7}  métricas")
+    for nome, cache in (("sem cache", LRUCache(max_itens=0)), ("com cache", LRUCache(max_itens=len(urls) * 2))):
+        app.dependency_overrides[get_cache_fragmentos] = usar(cache)
+        comandos = 0
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            inicio = time.perf_counter()
+            for url in sequencia:
+                (await client.get(url)).raise_for_status()
+            segundos = time.perf_counter() - inicio
+        metricas = cache.metricas()
+        print(
+            f"{nome:<10} {args.requests / segundos:>8.0f} {segundos / args.requests * 1000:>8.3f} {comandos:>7}  "
+            f"acertos={metricas['acertos']} falhas={metricas['falhas']}"
+        )
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Veículos no banco de teste")
+    parser.add_argument("--requests", type=int, default=3_000)
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
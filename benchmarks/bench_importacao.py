@@ -0,0 +1,68 @@
+"""
+Gera um arquivo NDJSON ou CSV sintético (1% dos registros inválidos) e o importa com
+o pipeline de importação em lotes, medindo a vazão e o pico de memória alocada pelo
+Python (tracemalloc). O pico depende do tamanho do lote, e não do tamanho do arquivo.
+
+Uso:
+    python -m benchmarks.bench_importacao --rows 1000000 --format ndjson
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy.orm import Session
+
+from app.services.exportacao import CAMPOS_EXPORTACAO
+from app.services.importacao import criar_importacao, importar_veiculos, ler_registros
+from benchmarks.sqlite import dados_veiculo, preparar_banco
+
+
+def gerar_arquivo(path: str, total: int, formato: str) -> None:
+    campos = CAMPOS_EXPORTACAO[1:6]
+    with open(path, "w", newline="", encoding="utf-8") as arquivo:
+        writer = csv.DictWriter(arquivo, fieldnames=campos) if formato == "csv" else None
+        if writer:
+            writer.writeheader()
+        for i in range(total):
+            veiculo = dados_veiculo(i)
+            if i % 100 == 99:
+                veiculo["marca"] = "Marca Desconhecida"
+            if writer:
+                writer.writerow(veiculo)
+            else:
+                arquivo.write(json.dumps(veiculo, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Registros no arquivo")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine, _ = preparar_banco(0)
+    path = os.path.join(tempfile.mkdtemp(), f"estoque.{args.format}")
+    gerar_arquivo(path, args.rows, args.format)
+    tamanho_mb = os.path.getsize(path) / 2**20
+
+    with Session(engine) as db, open(path, "rb") as arquivo:
+        importacao = criar_importacao(db, path, args.format)
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        importar_veiculos(db, importacao, ler_registros(arquivo, args.format), args.chunk_size)
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        inseridos, rejeitados = importacao.inseridos, importacao.rejeitados
+
+    print(f"arquivo: {tamanho_mb:.1f} MB, {args.rows} registros ({args.format}, chunk_size={args.chunk_size})")
+    print(f"inseridos: {inseridos}, rejeitados: {rejeitados}")
+    print(f"tempo: {segundos:.1f} s, {args.rows / segundos:.0f} registros/s, pico de memória: {pico / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Mede o custo do middleware de métricas (app/metricas.py) na vazão da aplicação: as mesmas
+requisições são feitas com e sem o middleware, em rodadas alternadas para diluir o ruído,
+e o resultado de cada modo é a mediana das rodadas. A rota `/` (sem banco) é o pior caso
+relativo; o detalhe e a lista de veículos representam requisições típicas da API.
+
+Uso:
+    python -m benchmarks.bench_metricas --rows 10000 --requests 2000 --rounds 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from starlette.middleware import Middleware
+
+from app.main import app
+from app.metricas import MiddlewareMetricas, registro_metricas
+from benchmarks.sqlite import preparar_banco
+
+
+def montar_pilha(com_metricas: bool):
+    """Reconstrói a pilha de middlewares da aplicação com ou sem o de métricas."""
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not MiddlewareMetricas]
+    if com_metricas:
+        app.user_middleware.insert(0, Middleware(MiddlewareMetricas))
+    app.middleware_stack = app.build_middleware_stack()
+
+
+async def medir(urls, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        inicio = time.perf_counter()
+        for i in range(requests):
+            (await client.get(urls[i % len(urls)])).raise_for_status()
+        return requests / (time.perf_counter() - inicio)
+
+
+async def executar(args):
+    _, async_engine = preparar_banco(args.rows)
+    cenarios = {
+        "/": ["/"],
+        "detalhe": [f"/api/v1/veiculos/{i}" for i in range(1, 101)],
+        "lista": ["/api/v1/veiculos/?limit=20", "/api/v1/veiculos/?marca=Ford&limit=20"],
+    }
+    print(f"{'cenário':<10} {'sem (req/s)':>12} {'com (req/s)':>12} {'custo':>8}")
+    for nome, urls in cenarios.items():
+        resultados = {False: [], True: []}
+        for rodada in range(args.rounds):
+            # Alterna a ordem a cada rodada para não favorecer um dos modos (aquecimento)
+            for com_metricas in ((False, True) if rodada % 2 == 0 else (True, False)):
+                montar_pilha(com_metricas)
+                resultados[com_metricas].append(await medir(urls, args.requests))
+        sem, com = statistics.median(resultados[False]), statistics.median(resultados[True])
+        print(f"{nome:<10} {sem:>12.0f} {com:>12.0f} {(sem - com) / sem * 100:>7.1f}%")
+    montar_pilha(True)
+    print(f"séries registradas: {len(registro_metricas.series)}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="Veículos no banco de teste")
+    parser.add_argument("--requests", type=int, default=2_000, help="Requisições por rodada")
+    parser.add_argument("--rounds", type=int, default=5, help="Rodadas por modo")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compara a latência de páginas profundas de GET /api/v1/veiculos/ usando offset
+(`skip`) e cursor (keyset por ID), em um banco SQLite populado.
+
+Com offset, o banco lê e descarta `skip` linhas, e a latência cresce com a página.
+Com cursor, a consulta é uma busca por faixa na chave primária e a latência fica
+constante.
+
+Uso:
+    python -m benchmarks.bench_paginacao --rows 5000000
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy.orm import Session
+
+from app.src import veiculo as crud_veiculo
+from benchmarks.sqlite import preparar_banco
+
+
+def medir(func, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Veículos no banco de teste")
+    parser.add_argument("--limit", type=int, default=100, help="Tamanho da página")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, _ = preparar_banco(args.rows)
+    profundidades = [p for p in (0, 1_000, 10_000, 100_000, 1_000_000, args.rows - args.limit) if p < args.rows]
+
+    print(f"{'posição':>10} {'skip ms':>10} {'cursor ms':>10}")
+    with Session(engine) as db:
+        for posicao in profundidades:
+            # Com IDs sequenciais a partir de 1, o cursor equivalente a `skip` é o ID `posicao`
+            skip_ms = medir(lambda: crud_veiculo.get_veiculos(db, skip=posicao, limit=args.limit), args.repeat)
+            cursor_ms = medir(lambda: crud_veiculo.get_veiculos(db, limit=args.limit, after_id=posicao), args.repeat)
+            print(f"{posicao:>10} {skip_ms:>10.2f} {cursor_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Mede a montagem da resposta JSON das listagens de veículos:
+
+- "serialização": só o pipeline de resposta para uma página de `--limit` veículos já
+  validados pelo serviço, comparando o caminho padrão do FastAPI (revalidação pelo
+  `response_model` + `jsonable_encoder` + `json.dumps`) com o dump único em bytes do
+  `TypeAdapter` usado pelas rotas (`app/routes/respostas.py`);
+- "GET /veiculos/": a rota completa, com a consulta ao banco, via ASGI; com `--fields`,
+  mede também a mesma página com projeção de campos (`fields=`).
+
+Uso:
+    python -m benchmarks.bench_serializacao --rows 100000 --limit 100 --requests 2000 \
+        --fields id,veiculo,marca,ano,descricao,vendido
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.main import app
+from app.schemas.veiculo import Veiculo
+from benchmarks.sqlite import preparar_banco
+
+
+async def medir_serializacao(veiculos: List[Veiculo], repeticoes: int):
+    campo = create_response_field(name="Response_listar", type_=List[Veiculo])
+
+    async def padrao_fastapi():
+        conteudo = await serialize_response(field=campo, response_content=veiculos, is_coroutine=True)
+        return JSONResponse(conteudo).body
+
+    async def type_adapter():
+        from app.routes.respostas import resposta_lista_veiculos
+        return resposta_lista_veiculos(veiculos).body
+
+    assert (await padrao_fastapi()).replace(b" ", b"") == (await type_adapter()).replace(b" ", b"")
+    resultados = {}
+    for nome, func in (("padrão FastAPI", padrao_fastapi), ("TypeAdapter", type_adapter)):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            await func()
+        resultados[nome] = (time.perf_counter() - inicio) / repeticoes * 1000
+    return resultados
+
+
+async def executar(args):
+    _, async_engine = preparar_banco(args.rows)
+    transport = httpx.ASGITransport(app=app)
+    url = f"/api/v1/veiculos/?limit={args.limit}"
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        veiculos = [Veiculo.model_validate(v) for v in (await client.get(url)).json()]
+        for ms in (await medir_serializacao(veiculos, args.requests)).items():
+            print(f"serialização ({args.limit} itens) {ms[0]:<15} {ms[1]:>8.3f} ms")
+
+        urls = [url] + ([f"{url}&fields={args.fields}"] if args.fields else [])
+        for url in urls:
+            inicio = time.perf_counter()
+            total_bytes = 0
+            for _ in range(args.requests):
+                response = await client.get(url)
+                response.raise_for_status()
+                total_bytes += len(response.content)
+            segundos = time.perf_counter() - inicio
+            print(f"GET {url.removeprefix('/api/v1')}: {args.requests / segundos:.0f} req/s, "
+                  f"{segundos / args.requests * 1000:.3f} ms/req, {total_bytes / args.requests / 1024:.1f} KB/resposta")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="Veículos no banco de teste")
+    parser.add_argument("--limit", type=int, default=100, help="Itens por página")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--fields", default=None, help="Campos para medir também a listagem com fields=")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark dos fragmentos HTMX nos dois modos de acesso da interface web:
+
+- "local": o router web chama o VeiculoService em processo;
+- "http": o router web chama a própria API /api/v1 via HTTP (requests).
+
+Sobe a aplicação com uvicorn em uma porta local, usando um banco SQLite temporário
+no lugar do MySQL, e mede latência (p50/p95) e vazão de cada fragmento.
+
+Uso:
+    python -m benchmarks.bench_web_modes --requests 300 --concurrency 8
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import uvicorn
+
+from app.main import app
+from app.routes import web as web_routes
+from benchmarks.sqlite import preparar_banco
+
+FRAGMENTOS = [
+    "/ui/fragment/veiculos-lista",
+    "/ui/fragment/veiculos-lista?marca=Ford&limit=10",
+    "/ui/fragment/veiculos-estatisticas",
+    "/ui/fragment/veiculo-detalhes/1",
+]
+
+
+def iniciar_servidor(port: int) -> uvicorn.Server:
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def medir(base_url: str, path: str, total: int, concurrency: int) -> dict:
+    latencias = []
+
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        client.get(path)  # aquecimento
+
+        def chamar(_):
+            inicio = time.perf_counter()
+            response = client.get(path)
+            latencias.append(time.perf_counter() - inicio)
+            assert response.status_code == 200, response.text
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(chamar, range(total)))
+        duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p95_ms": latencias[int(len(latencias) * 0.95) - 1] * 1000,
+        "req_s": total / duracao,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="Requisições por fragmento e modo")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas")
+    parser.add_argument("--rows", type=int, default=1000, help="Veículos no banco de teste")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    preparar_banco(args.rows)
+    server = iniciar_servidor(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    web_routes.BASE_API_URL = f"{base_url}/api/v1"
+
+    print(f"{'fragmento':<50} {'modo':<6} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8}")
+    try:
+        for path in FRAGMENTOS:
+            for modo in ("http", "local"):
+                web_routes.WEB_API_MODE = modo
+                r = medir(base_url, path, args.requests, args.concurrency)
+                print(f"{path:<50} {modo:<6} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['req_s']:>8.1f}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Banco SQLite usado pelos benchmarks no lugar do MySQL.
+
+Cria as tabelas, popula veículos sintéticos e substitui as dependências de sessão
+(`get_db` e `get_async_db`) da aplicação para que apontem para o arquivo SQLite (ou
+para outro banco, como um MySQL local, com `url`).
+"""
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import create_engine, func, insert, inspect, select
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database import (
+    argumentos_conexao, configurar_sqlite, get_async_db, get_async_sessionmaker, get_db, url_assincrona
+)
+from app.main import app
+from app.models import busca  # noqa: F401 - cria o índice de busca junto com a tabela
+from app.models.veiculo import Base, Veiculo
+from app.src.estatisticas import reconstruir_estatisticas
+from app.src.marcas import colunas_marca
+
+MODELOS = {
+    "Chevrolet": ["Onix", "Onix Plus", "Tracker", "S10", "Spin", "Cruze"],
+    "Ford": ["Ka", "Ranger", "Territory", "Bronco", "Maverick"],
+    "Volkswagen": ["Gol", "Polo", "Virtus", "T-Cross", "Nivus", "Amarok"],
+    "Fiat": ["Uno", "Mobi", "Argo", "Cronos", "Strada", "Toro", "Pulse"],
+    "Toyota": ["Corolla", "Corolla Cross", "Hilux", "Yaris", "SW4"],
+    "Honda": ["Civic", "City", "HR-V", "WR-V", "Fit"],
+    "Hyundai": ["HB20", "HB20S", "Creta", "Tucson"],
+}
+MARCAS = list(MODELOS)
+CORES = ["Prata", "Preto", "Branco", "Cinza", "Vermelho", "Azul", "Marrom", "Verde", "Amarelo", "Bege"]
+VERSOES = ["1.0", "1.0 Turbo", "1.6", "2.0 Flex", "Diesel", "Híbrido", "Automático", "Manual", "Completo", "Básico"]
+
+
+def dados_veiculo(i: int) -> dict:
+    """Veículo sintético determinístico; varia marca, modelo, ano, cor e versão com o índice."""
+    marca = MARCAS[i % len(MARCAS)]
+    modelos = MODELOS[marca]
+    return {
+        "veiculo": modelos[(i // len(MARCAS)) % len(modelos)],
+        **colunas_marca(marca),
+        "ano": 1980 + (i * 7) % 45,
+        "descricao": f"{CORES[(i // 3) % len(CORES)]} {VERSOES[(i // 11) % len(VERSOES)]} #{i}",
+        "vendido": i % 3 == 0,
+    }
+
+
+# Distribuição "realista": participação de mercado aproximada das marcas, frota concentrada
+# nos anos recentes, veículos mais antigos com maior chance de já terem sido vendidos e
+# cadastros espalhados pelos últimos 3 anos (poucos na última semana).
+PARTICIPACAO_MARCAS = {
+    "Fiat": 22, "Volkswagen": 17, "Chevrolet": 16, "Toyota": 9, "Hyundai": 8, "Jeep": 6,
+    "Renault": 6, "Honda": 5, "Ford": 4, "Nissan": 3, "BMW": 1.5, "Mercedes-Benz": 1.5,
+}
+MODELOS_EXTRAS = {
+    "Jeep": ["Renegade", "Compass", "Commander"],
+    "Renault": ["Kwid", "Duster", "Oroch", "Sandero"],
+    "Nissan": ["Kicks", "Versa", "Frontier"],
+    "BMW": ["320i", "X1", "X3"],
+    "Mercedes-Benz": ["C 200", "GLA 200", "Sprinter"],
+}
+MARCAS_REALISTAS = list(PARTICIPACAO_MARCAS)
+PESOS_MARCAS = list(PARTICIPACAO_MARCAS.values())
+ANO_MAIS_RECENTE = 2024
+DIAS_DE_CADASTRO = 3 * 365
+
+
+def dados_veiculo_realista(i: int, rng: random.Random, agora: datetime) -> dict:
+    """Veículo sintético com as distribuições de `PARTICIPACAO_MARCAS`; determinístico para o mesmo `rng`."""
+    marca = rng.choices(MARCAS_REALISTAS, PESOS_MARCAS)[0]
+    modelos = MODELOS.get(marca) or MODELOS_EXTRAS[marca]
+    idade = min(int(rng.expovariate(1 / 6)), ANO_MAIS_RECENTE - 1970)
+    cadastro = agora - timedelta(minutes=rng.uniform(0, DIAS_DE_CADASTRO * 24 * 60))
+    return {
+        "veiculo": modelos[rng.randrange(len(modelos))],
+        **colunas_marca(marca),
+        "ano": ANO_MAIS_RECENTE - idade,
+        "descricao": f"{CORES[rng.randrange(len(CORES))]} {VERSOES[rng.randrange(len(VERSOES))]} #{i}",
+        "vendido": rng.random() < min(0.9, 0.35 + 0.03 * idade),
+        "created": cadastro,
+        "updated": cadastro,
+    }
+
+
+def popular(engine, total: int, lote: int = 50_000, realista: bool = False, semente: int = 42) -> None:
+    """
+    Insere `total` veículos sintéticos em lotes (executemany), sem passar pelo ORM. Com
+    `realista`, usa `dados_veiculo_realista` (mesma `semente`, mesmos dados).
+    """
+    rng = random.Random(semente)
+    agora = datetime.now(UTC).replace(tzinfo=None)
+    with engine.begin() as conn:
+        for inicio in range(0, total, lote):
+            faixa = range(inicio, min(inicio + lote, total))
+            if realista:
+                linhas = [dados_veiculo_realista(i, rng, agora) for i in faixa]
+            else:
+                linhas = [dados_veiculo(i) for i in faixa]
+            conn.execute(insert(Veiculo), linhas)
+
+
+def total_veiculos(engine) -> int:
+    """Quantidade de veículos no banco, ou -1 se as tabelas não existirem ou forem de um esquema anterior."""
+    inspetor = inspect(engine)
+    for tabela in Base.metadata.sorted_tables:
+        if not inspetor.has_table(tabela.name):
+            return -1
+        if {coluna["name"] for coluna in inspetor.get_columns(tabela.name)} != set(tabela.columns.keys()):
+            return -1
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(Veiculo))
+
+
+def preparar_banco(
+    total: int, path: str = None, pool_size: int = 5, url: str = None,
+    realista: bool = False, reutilizar: bool = False
+):
+    """
+    Cria e popula um banco SQLite (ou o banco de `url`, ex.: um MySQL local, cujas tabelas
+    são recriadas) e aponta as dependências de sessão da aplicação para ele. Com
+    `reutilizar`, um banco que já tem `total` veículos é usado como está, sem repopular.
+    Retorna a tupla (engine síncrono, engine assíncrono).
+    """
+    if url is None:
+        path = path or os.path.join(tempfile.mkdtemp(), "bench.db")
+        url = f"sqlite:///{path}"
+    engine = create_engine(url, pool_size=pool_size, max_overflow=0, connect_args=argumentos_conexao(url))
+    async_engine = create_async_engine(
+        url_assincrona(url), poolclass=AsyncAdaptedQueuePool, pool_size=pool_size, max_overflow=0,
+        connect_args=argumentos_conexao(url),
+    )
+    configurar_sqlite(engine)
+    configurar_sqlite(async_engine.sync_engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+    if not (reutilizar and total_veiculos(engine) == total):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        popular(engine, total, realista=realista)
+        with SessionLocal() as db:
+            reconstruir_estatisticas(db)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_sessionmaker] = lambda: AsyncSessionLocal
+    return engine, async_engine
@@ -0,0 +1,77 @@
+"""
+Importa veículos de um arquivo CSV (com cabeçalho) ou NDJSON, em lotes transacionais.
+
+O arquivo é lido de forma incremental; cada lote grava os veículos válidos e avança
+o checkpoint da importação (tabela veiculos_importacoes) na mesma transação. As
+rejeições são gravadas em um CSV (linha, erro) ao lado do arquivo de entrada.
+
+Uso:
+    python -m scripts.importar_veiculos estoque.csv
+    python -m scripts.importar_veiculos estoque.ndjson --chunk-size 5000
+    python -m scripts.importar_veiculos estoque.csv --retomar 12   # continua a importação 12
+"""
+import argparse
+import csv
+import sys
+import time
+
+from app.database import SessionLocal
+from app.services.importacao import (
+    criar_importacao,
+    detectar_formato,
+    importar_veiculos,
+    ler_registros,
+    obter_importacao,
+)
+from app.services.veiculo import TAMANHO_BLOCO_PADRAO
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("arquivo", help="Arquivo .csv ou .ndjson")
+    parser.add_argument("--formato", choices=["csv", "ndjson"], help="Por padrão, deduzido da extensão")
+    parser.add_argument("--chunk-size", type=int, default=TAMANHO_BLOCO_PADRAO, help="Registros por lote (transação)")
+    parser.add_argument("--retomar", type=int, metavar="ID", help="ID de uma importação interrompida")
+    parser.add_argument("--rejeitados", help="CSV com as rejeições (padrão: <arquivo>.rejeitados.csv)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.retomar is not None:
+            importacao = obter_importacao(db, args.retomar)
+        else:
+            importacao = criar_importacao(db, args.arquivo, detectar_formato(args.arquivo, args.formato))
+        print(
+            f"Importação {importacao.id}: {args.arquivo} ({importacao.formato}), "
+            f"a partir do registro {importacao.registros_processados + 1}",
+            file=sys.stderr
+        )
+
+        inicio = time.perf_counter()
+        ja_processados = importacao.registros_processados
+
+        def relatar_progresso(importacao):
+            registros = importacao.registros_processados - ja_processados
+            taxa = registros / max(time.perf_counter() - inicio, 1e-9)
+            print(
+                f"\r{importacao.registros_processados} registros | {importacao.inseridos} inseridos | "
+                f"{importacao.rejeitados} rejeitados | {taxa:.0f} registros/s",
+                end="", file=sys.stderr, flush=True
+            )
+
+        # Em modo de acréscimo: ao retomar, as rejeições anteriores são mantidas
+        with open(args.rejeitados or f"{args.arquivo}.rejeitados.csv", "a", newline="", encoding="utf-8") as saida:
+            rejeicoes = csv.writer(saida)
+            if saida.tell() == 0:
+                rejeicoes.writerow(["linha", "erro"])
+            with open(args.arquivo, "rb") as entrada:
+                importar_veiculos(
+                    db, importacao, ler_registros(entrada, importacao.formato), args.chunk_size,
+                    ao_rejeitar=lambda rejeicao: rejeicoes.writerow([rejeicao.linha, rejeicao.erro]),
+                    ao_gravar_lote=relatar_progresso
+                )
+        print(file=sys.stderr)
+        print(f"Importação {importacao.id} concluída: {importacao.inseridos} inseridos, {importacao.rejeitados} rejeitados.")
+
+
+if __name__ == "__main__":
+    main()
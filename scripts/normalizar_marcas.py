@@ -0,0 +1,30 @@
+"""
+Preenche o `marca_id` dos veículos gravados sem ele (dados antigos ou cargas feitas
+diretamente no banco) cuja marca está no catálogo de app/src/marcas.py, e lista as
+marcas fora do catálogo que restarem. O filtro por marca das listagens usa só o
+`marca_id`: esses veículos precisam ter a marca corrigida para uma do catálogo ou ser
+removidos (a migração b6e2f0c4d913 não avança enquanto existirem).
+
+Uso:
+    python -m scripts.normalizar_marcas
+"""
+import sys
+
+from app.database import SessionLocal
+from app.src.veiculo import normalizar_marcas
+
+
+def main():
+    with SessionLocal() as db:
+        restantes = normalizar_marcas(db)
+    if not restantes:
+        print("Todos os veículos com marca têm marca_id.")
+        return
+    print("Veículos com marca fora do catálogo (corrija a marca ou remova-os):")
+    for marca, quantidade in restantes:
+        print(f"  {marca!r}: {quantidade}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
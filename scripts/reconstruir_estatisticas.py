@@ -0,0 +1,20 @@
+"""
+Recalcula os contadores de estatísticas (tabela veiculos_estatisticas) a partir da
+tabela de veículos. Use para corrigir divergências, por exemplo após cargas feitas
+diretamente no banco sem passar pela aplicação.
+
+Uso:
+    python -m scripts.reconstruir_estatisticas
+"""
+from app.database import SessionLocal
+from app.src.estatisticas import reconstruir_estatisticas
+
+
+def main():
+    with SessionLocal() as db:
+        total = reconstruir_estatisticas(db)
+    print(f"Estatísticas reconstruídas: {total} contadores gravados.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import os
+import re
+from datetime import datetime, timedelta, UTC
+from typing import List, NamedTuple, Optional
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.sql import text
+
+from app.database import argumentos_conexao
+from app.models import busca  # noqa: F401 - cria o índice de busca junto com a tabela
+from app.models.veiculo import Base, Veiculo
+from app.src.marcas import colunas_marca
+from app.src.veiculo import (
+    query_contadores_por_ids,
+    query_count_veiculos_nao_vendidos,
+    query_distribuicao_por_decada,
+    query_distribuicao_por_fabricante,
+    query_exportacao,
+    query_veiculo,
+    query_veiculos,
+    query_veiculos_ultimos_7_dias,
+)
+
+# Regressão dos planos de execução das consultas de app/src/veiculo.py: cada consulta é
+# explicada (EXPLAIN no MySQL, EXPLAIN QUERY PLAN no SQLite) sobre uma massa de dados com
+# distribuição parecida com a de produção, e o teste falha se o plano passar a ler a
+# tabela inteira ou a ordenar em memória o que deveria vir na ordem do índice.
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or (
+    f"mysql+mysqlconnector://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@"
+    f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=argumentos_conexao(SQLALCHEMY_DATABASE_URL))
+
+TOTAL_VEICULOS = 5000
+MARCAS = ["Chevrolet", "Ford", "Volkswagen", "Fiat", "Toyota", "Honda", "Hyundai", "Renault"]
+
+class Passo(NamedTuple):
+    tabela: str
+    acesso: str  # "tabela" (leitura completa), "indice" (varredura do índice), "busca", "ordenacao"
+    indice: Optional[str] = None
+
+def _passo_sqlite(detalhe: str) -> Passo:
+    if detalhe.startswith("USE TEMP B-TREE"):
+        return Passo("", "ordenacao")
+    m = re.match(r"(SCAN|SEARCH) (\w+)(?: USING (?:COVERING )?INDEX (\w+)| USING INTEGER PRIMARY KEY)?", detalhe)
+    if not m:
+        return Passo("", detalhe)
+    operacao, tabela, indice = m.groups()
+    if "PRIMARY KEY" in detalhe:
+        indice = "PRIMARY"
+    if operacao == "SEARCH" or "VIRTUAL TABLE" in detalhe:
+        return Passo(tabela, "busca", indice)
+    return Passo(tabela, "indice" if indice else "tabela", indice)
+
+def _passos_mysql(linha) -> List[Passo]:
+    acesso = {"ALL": "tabela", "index": "indice"}.get(linha["type"], "busca")
+    passos = [Passo(linha["table"], acesso, linha["key"])]
+    if "Using filesort" in (linha["Extra"] or ""):
+        passos.append(Passo("", "ordenacao"))
+    return passos
+
+def explicar(conn, query) -> List[Passo]:
+    compilada = query.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    if compilada.positional:
+        params = tuple(compilada.params[nome] for nome in compilada.positiontup)
+    else:
+        params = compilada.params
+    if conn.dialect.name == "sqlite":
+        linhas = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compilada}", params).all()
+        return [_passo_sqlite(linha.detail) for linha in linhas]
+    linhas = conn.exec_driver_sql(f"EXPLAIN {compilada}", params).mappings().all()
+    return [passo for linha in linhas for passo in _passos_mysql(linha)]
+
+@pytest.fixture(scope="module")
+def conn():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    agora = datetime.now(UTC).replace(tzinfo=None)
+    # Cadastros espalhados por ~5 anos (poucos na última semana), anos de 1980 a 2024
+    # e um terço de não vendidos
+    with engine.begin() as c:
+        c.execute(insert(Veiculo), [
+            {
+                "veiculo": f"Modelo {i % 40}", **colunas_marca(MARCAS[i % len(MARCAS)]), "ano": 1980 + (i * 7) % 45,
+                "descricao": f"Descrição {i}", "vendido": i % 3 != 0,
+                "created": agora - timedelta(hours=9 * i), "updated": agora - timedelta(hours=9 * i),
+            }
+            for i in range(TOTAL_VEICULOS)
+        ])
+        c.execute(text("ANALYZE" if engine.dialect.name == "sqlite" else "ANALYZE TABLE veiculos"))
+    with engine.connect() as c:
+        yield c
+
+# (consulta, índices aceitos para a tabela veiculos; None = qualquer índice)
+CONSULTAS_INDEXADAS = {
+    "veiculo_por_id": (lambda: query_veiculo(42), {"PRIMARY"}),
+    "contadores_por_ids": (lambda: query_contadores_por_ids([1, 2, 3]), {"PRIMARY"}),
+    "count_nao_vendidos": (query_count_veiculos_nao_vendidos, {"ix_veiculos_vendido_id"}),
+    "ultimos_7_dias": (query_veiculos_ultimos_7_dias, {"ix_veiculos_created"}),
+    "distribuicao_por_fabricante": (
+        query_distribuicao_por_fabricante, {"ix_veiculos_marca_id", "ix_veiculos_marca_id_ano"}
+    ),
+    "distribuicao_por_decada": (
+        lambda: query_distribuicao_por_decada(engine.dialect.name), {"ix_veiculos_ano"}
+    ),
+    "lista_por_ano": (lambda: query_veiculos(ano=2020), {"ix_veiculos_ano"}),
+    "lista_por_marca": (lambda: query_veiculos(marca="Ford"), {"ix_veiculos_marca_id"}),
+    "lista_por_marca_e_ano": (lambda: query_veiculos(marca="Ford", ano=2020), {"ix_veiculos_marca_id_ano"}),
+    "lista_nao_vendidos_cursor": (lambda: query_veiculos(vendido=False, after_id=100), None),
+}
+
+# Listagens sem filtro seletivo: leem na ordem da chave primária e param no LIMIT (ou
+# percorrem tudo, na exportação); não podem ordenar o resultado em memória.
+CONSULTAS_EM_ORDEM_DE_ID = {
+    "lista": lambda: query_veiculos(),
+    "lista_cursor": lambda: query_veiculos(after_id=100),
+    "lista_por_marca": lambda: query_veiculos(marca="Ford"),
+    "lista_por_marca_e_ano": lambda: query_veiculos(marca="Ford", ano=2020),
+    "exportacao": lambda: query_exportacao(vendido=True),
+}
+
+@pytest.mark.parametrize("nome", CONSULTAS_INDEXADAS)
+def test_consulta_usa_indice(conn, nome):
+    construir, indices_aceitos = CONSULTAS_INDEXADAS[nome]
+    passos = [passo for passo in explicar(conn, construir()) if passo.tabela == "veiculos"]
+    assert passos, f"{nome}: plano sem acesso à tabela veiculos"
+    for passo in passos:
+        assert passo.acesso != "tabela", f"{nome}: leitura completa da tabela ({passos})"
+        if indices_aceitos is not None:
+            assert passo.indice in indices_aceitos, f"{nome}: usa {passo.indice}, esperado {indices_aceitos}"
+
+@pytest.mark.parametrize("nome", CONSULTAS_EM_ORDEM_DE_ID)
+def test_listagem_sem_ordenacao_em_memoria(conn, nome):
+    passos = explicar(conn, CONSULTAS_EM_ORDEM_DE_ID[nome]())
+    assert not [passo for passo in passos if passo.acesso == "ordenacao"], f"{nome}: {passos}"
+
+def test_busca_textual_nao_le_a_tabela(conn):
+    passos = explicar(conn, query_veiculos(q="modelo", dialect_name=engine.dialect.name))
+    assert all(passo.acesso != "tabela" for passo in passos if passo.tabela == "veiculos"), passos
@@ -1,33 +1,71 @@
+import asyncio
+import csv
+import io
+from contextlib import contextmanager
+import json
+import logging
 import os
+import time
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime, timedelta
 from sqlalchemy.sql import text
+from sqlalchemy.pool import NullPool
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
 
 from unittest.mock import Mock, patch
 
+from app import instrumentacao_sql
+from app.instrumentacao_sql import contar_consultas, impressao_digital
 from app.main import app
-from app.database import Base, get_db
-from app.models.veiculo import Veiculo as VeiculoModel
+from app.metricas import registro_metricas
+from app.pool import POOL_SIZE, estado_pool, instrumentar_pool, opcoes_pool
+from app.replicas import RoteadorReplicas, SessaoRoteada
+from app.database import (
+    argumentos_conexao, configurar_sqlite, get_async_db, get_async_sessionmaker, get_db, url_assincrona
+)
+from app.models.veiculo import Base, Veiculo as VeiculoModel
 from app.schemas.veiculo import VeiculoCreate, VeiculoUpdate
 from app.services.veiculo import VeiculoService
+from app.services.veiculo_async import AsyncVeiculoService
+from app.services.cache import LRUCache, cache_fragmentos, cache_veiculos, chave_veiculo, contadores_badges
+from app.services.eventos import RECARREGAR, EventoVeiculo, HubEventos, evento_json, hub_eventos, transmitir_eventos
+from app.routes.web import evento_html
 from app.src.veiculo import (
     get_veiculo as crud_get_veiculo,
     update_veiculo as crud_update_veiculo,
     create_veiculo as crud_create_veiculo,
+    get_distribuicao_por_decada as crud_get_distribuicao_por_decada,
+    get_distribuicao_por_fabricante as crud_get_distribuicao_por_fabricante,
     validar_marca as crud_validar_marca
 )
+from app.src.veiculo import normalizar_marcas, query_contadores_por_ids, query_veiculo_para_alterar
+from app.src.marcas import colunas_marca
+from app.src.estatisticas import aplicar_deltas, get_versao, reconstruir_estatisticas, statement_deltas, verificar_dialeto
 
 API_PREFIX = "/api/v1"
 
-SQLALCHEMY_DATABASE_URL = (
+# DATABASE_URL (ex.: sqlite:////tmp/tinnova_testes.db) roda os testes em outro banco
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"mysql+mysqlconnector://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@"
     f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 )
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+SQLALCHEMY_ASYNC_DATABASE_URL = url_assincrona(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=argumentos_conexao(SQLALCHEMY_DATABASE_URL))
+configurar_sqlite(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: o TestClient cria um event loop por instância, e conexões assíncronas
+# não podem ser reaproveitadas entre loops diferentes.
+async_engine = create_async_engine(
+    SQLALCHEMY_ASYNC_DATABASE_URL, poolclass=NullPool, connect_args=argumentos_conexao(SQLALCHEMY_ASYNC_DATABASE_URL)
+)
+configurar_sqlite(async_engine.sync_engine)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 def override_get_db():
     db = TestingSessionLocal()
@@ -37,16 +75,36 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+        await db.rollback()
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_async_sessionmaker] = lambda: TestingAsyncSessionLocal
 
 @pytest.fixture(scope="function")
 def setup_test_db():
-    with engine.connect() as connection:
-        connection.execute(text("SET SESSION sql_mode=(SELECT REPLACE(@@sql_mode,'ONLY_FULL_GROUP_BY',''))"))
+    if engine.dialect.name == "mysql":
+        with engine.connect() as connection:
+            connection.execute(text("SET SESSION sql_mode=(SELECT REPLACE(@@sql_mode,'ONLY_FULL_GROUP_BY',''))"))
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Os IDs são reaproveitados após recriar as tabelas
+    asyncio.run(cache_veiculos.limpar())
+    asyncio.run(cache_fragmentos.limpar())
+    contadores_badges.limpar()
     yield
 
+def limpar_tabela(db: Session, tabela: str) -> None:
+    """Esvazia a tabela: TRUNCATE no MySQL (que já confirma a transação), DELETE nos demais bancos."""
+    if db.get_bind().dialect.name == "mysql":
+        db.execute(text(f"TRUNCATE TABLE {tabela}"))
+    else:
+        db.execute(text(f"DELETE FROM {tabela}"))
+        db.commit()
+
 @pytest.fixture(scope="function")
 def db():
     db = TestingSessionLocal()
@@ -89,6 +147,53 @@ def test_criar_veiculo(setup_test_db, client, veiculo_data):
     assert "created" in data
     assert "updated" in data
 
+def test_marcas_sem_diferenciar_caixa_acento_e_separador(setup_test_db, client):
+    # Antes, a validação por capitalize() recusava "BMW" e "Mercedes-Benz"
+    for marca, canonica in (("BMW", "BMW"), ("mercedes benz", "Mercedes-Benz"), ("CITROEN", "Citroën"), ("ford", "Ford")):
+        response = client.post(f"{API_PREFIX}/veiculos/", json={
+            "veiculo": "Teste", "marca": marca, "ano": 2020, "descricao": "", "vendido": False
+        })
+        assert response.status_code == 201, response.text
+        assert response.json()["marca"] == canonica
+
+    response = client.post(f"{API_PREFIX}/veiculos/bulk", json=[
+        {"veiculo": "Lote", "marca": "Mercedes-Benz", "ano": 2021},
+        {"veiculo": "Lote", "marca": "Mercedez", "ano": 2021},
+    ])
+    assert response.json()["processados"] == 1
+
+    # Filtro "contém" pelo catálogo, também sem acento/caixa
+    marcas = [v["marca"] for v in client.get(f"{API_PREFIX}/veiculos/?marca=mercedes").json()]
+    assert marcas == ["Mercedes-Benz", "Mercedes-Benz"]
+    assert [v["marca"] for v in client.get(f"{API_PREFIX}/veiculos/?marca=citroen").json()] == ["Citroën"]
+    assert client.get(f"{API_PREFIX}/veiculos/?marca=Lada").json() == []
+
+    fabricantes = client.get(f"{API_PREFIX}/veiculos/estatisticas/geral").json()["distribuicao_por_fabricante"]
+    assert {item["fabricante"]: item["quantidade"] for item in fabricantes} == {
+        "BMW": 1, "Citroën": 1, "Ford": 1, "Mercedes-Benz": 2
+    }
+
+def test_marcas_legadas_sem_marca_id(setup_test_db, client, db):
+    # Linhas antigas (gravadas direto no banco) ficam sem marca_id e fora do filtro por marca
+    with engine.begin() as conn:
+        conn.execute(VeiculoModel.__table__.insert(), [
+            {"veiculo": "Ka", "marca": "FORD", "ano": 2010, "vendido": False},
+            {"veiculo": "Niva", "marca": "Lada", "ano": 1995, "vendido": False},
+        ])
+    assert client.get(f"{API_PREFIX}/veiculos/?marca=ford").json() == []
+
+    assert normalizar_marcas(db) == [("Lada", 1)]
+    ford = client.get(f"{API_PREFIX}/veiculos/?marca=ford").json()
+    assert [(v["veiculo"], v["marca"]) for v in ford] == [("Ka", "Ford")]
+    fabricantes = client.get(f"{API_PREFIX}/veiculos/estatisticas/geral").json()["distribuicao_por_fabricante"]
+    assert {item["fabricante"]: item["quantidade"] for item in fabricantes} == {"Ford": 1}
+
+    # Novas gravações fora do catálogo são recusadas mesmo sem passar pelo serviço
+    with pytest.raises(ValueError):
+        VeiculoModel(veiculo="Niva", marca="Lada", ano=1995)
+    with pytest.raises(ValueError):
+        colunas_marca("Lada")
+
 def test_obter_veiculo(setup_test_db, client, veiculo_criado):
     response = client.get(f"{API_PREFIX}/veiculos/{veiculo_criado['id']}")
     assert response.status_code == 200
@@ -114,15 +219,82 @@ def test_atualizar_veiculo(setup_test_db, client, veiculo_criado):
     assert data["vendido"] == update_data["vendido"]
     assert data["id"] == veiculo_criado["id"]
 
+def test_obter_veiculo_usa_cache_e_invalida_na_escrita(setup_test_db, client, db, veiculo_criado):
+    url = f"{API_PREFIX}/veiculos/{veiculo_criado['id']}"
+    metricas = client.get(f"{API_PREFIX}/internal/cache").json()
+    client.get(url)
+
+    # Alteração direta no banco: a leitura seguinte vem do cache, sem consultar o banco
+    db.execute(text("UPDATE veiculos SET veiculo = 'Alterado fora da API'"))
+    db.commit()
+    assert client.get(url).json()["veiculo"] == veiculo_criado["veiculo"]
+    depois = client.get(f"{API_PREFIX}/internal/cache").json()
+    assert depois["acertos"] == metricas["acertos"] + 1
+    assert depois["falhas"] == metricas["falhas"] + 1
+
+    client.put(url, json={"vendido": True})
+    data = client.get(url).json()
+    assert data["vendido"] is True
+    assert data["veiculo"] == "Alterado fora da API"
+
+    client.delete(url)
+    assert client.get(url).status_code == 404
+
+def test_get_condicional_etag_e_last_modified(setup_test_db, client, db, veiculo_criado):
+    url = f"{API_PREFIX}/veiculos/{veiculo_criado['id']}"
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    response = client.get(url, headers={"If-Modified-Since": response.headers["Last-Modified"]})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.put(url, json={"vendido": True})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["vendido"] is True
+
+    lista = client.get(f"{API_PREFIX}/veiculos/?limit=10")
+    etag_lista = lista.headers["ETag"]
+    assert etag_lista.startswith("W/")
+    assert "Last-Modified" not in lista.headers
+    assert client.get(f"{API_PREFIX}/veiculos/?limit=10", headers={"If-None-Match": etag_lista}).status_code == 304
+    # Outros parâmetros geram outra ETag
+    assert client.get(f"{API_PREFIX}/veiculos/?limit=5", headers={"If-None-Match": etag_lista}).status_code == 200
+    client.delete(url)
+    assert client.get(f"{API_PREFIX}/veiculos/?limit=10", headers={"If-None-Match": etag_lista}).status_code == 200
+
+    estatisticas = client.get(f"{API_PREFIX}/veiculos/estatisticas/geral")
+    etag_estatisticas = estatisticas.headers["ETag"]
+    # Só a versão dos dados é lida para responder 304
+    with no_maximo_consultas(1):
+        response = client.get(f"{API_PREFIX}/veiculos/estatisticas/geral", headers={"If-None-Match": etag_estatisticas})
+    assert response.status_code == 304
+    client.post(f"{API_PREFIX}/veiculos/", json={"veiculo": "Gol", "marca": "Volkswagen", "ano": 2020})
+    response = client.get(f"{API_PREFIX}/veiculos/estatisticas/geral", headers={"If-None-Match": etag_estatisticas})
+    assert response.status_code == 200
+
 def test_remover_veiculo(setup_test_db, client, veiculo_criado):
     response = client.delete(f"{API_PREFIX}/veiculos/{veiculo_criado['id']}")
     assert response.status_code == 200
     response = client.get(f"{API_PREFIX}/veiculos/{veiculo_criado['id']}")
     assert response.status_code == 404
 
+def test_respostas_serializadas_mantem_schema_openapi(setup_test_db, client, veiculo_criado):
+    response = client.get(f"{API_PREFIX}/veiculos/?limit=1")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [client.get(f"{API_PREFIX}/veiculos/{veiculo_criado['id']}").json()]
+    assert response.json()[0] == veiculo_criado
+
+    caminhos = client.get("/openapi.json").json()["paths"]
+    schema_lista = caminhos[f"{API_PREFIX}/veiculos/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert schema_lista["items"]["$ref"] == "#/components/schemas/Veiculo"
+    schema_detalhe = caminhos[f"{API_PREFIX}/veiculos/{{veiculo_id}}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert schema_detalhe["$ref"] == "#/components/schemas/Veiculo"
+
 # Testes de Filtros
 def test_listar_veiculos_com_filtros(setup_test_db, client, db):
-    db.execute(text("TRUNCATE TABLE veiculos"))
+    limpar_tabela(db, "veiculos")
     veiculos_payload = [
         {"veiculo": "Gol", "marca": "Volkswagen", "ano": 2020, "descricao": "Gol 1.0", "vendido": False},
         {"veiculo": "Onix", "marca": "Chevrolet", "ano": 2021, "descricao": "Onix 1.0", "vendido": True},
@@ -151,8 +323,136 @@ def test_listar_veiculos_com_filtros(setup_test_db, client, db):
     assert len(data_cor) >= 1
     assert "Gol" in data_cor[0]["veiculo"]
 
+def test_facetas_veiculos(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    veiculos_payload = [
+        {"veiculo": "Gol", "marca": "Volkswagen", "ano": 2020, "descricao": "Prata", "vendido": False},
+        {"veiculo": "Polo", "marca": "Volkswagen", "ano": 2021, "descricao": "Preto", "vendido": True},
+        {"veiculo": "Onix", "marca": "Chevrolet", "ano": 2021, "descricao": "Prata", "vendido": False},
+        {"veiculo": "Uno", "marca": "Fiat", "ano": 1998, "descricao": "Branco", "vendido": False},
+    ]
+    for veiculo in veiculos_payload:
+        client.post(f"{API_PREFIX}/veiculos/", json=veiculo)
+
+    # Uma única consulta agrupada para todas as facetas
+    with no_maximo_consultas(1):
+        response = client.get(f"{API_PREFIX}/veiculos/facets")
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 4,
+        "marcas": [
+            {"marca": "Volkswagen", "quantidade": 2},
+            {"marca": "Chevrolet", "quantidade": 1},
+            {"marca": "Fiat", "quantidade": 1},
+        ],
+        "anos": [{"ano": 2021, "quantidade": 2}, {"ano": 2020, "quantidade": 1}, {"ano": 1998, "quantidade": 1}],
+        "decadas": [{"decada": "2020s", "quantidade": 3}, {"decada": "1990s", "quantidade": 1}],
+        "vendido": [{"vendido": False, "quantidade": 3}, {"vendido": True, "quantidade": 1}],
+    }
+
+    # Mesmos filtros da listagem, inclusive a busca textual
+    data = client.get(f"{API_PREFIX}/veiculos/facets?marca=volks&vendido=false").json()
+    assert data["total"] == 1
+    assert data["marcas"] == [{"marca": "Volkswagen", "quantidade": 1}]
+    data = client.get(f"{API_PREFIX}/veiculos/facets?q=prata").json()
+    assert data["total"] == 2
+    assert [item["marca"] for item in data["marcas"]] == ["Chevrolet", "Volkswagen"]
+
+    # Em cache até a próxima escrita
+    with no_maximo_consultas(0):
+        client.get(f"{API_PREFIX}/veiculos/facets")
+    client.put(f"{API_PREFIX}/veiculos/{client.get(f'{API_PREFIX}/veiculos/?marca=Fiat').json()[0]['id']}", json={"vendido": True})
+    data = client.get(f"{API_PREFIX}/veiculos/facets").json()
+    assert data["vendido"] == [{"vendido": False, "quantidade": 2}, {"vendido": True, "quantidade": 2}]
+
+    # Painel de filtros da interface web
+    response = client.get("/ui/fragment/veiculos-lista?vendido=true")
+    assert "Polo" in response.text and "Gol" not in response.text
+    assert "Vendidos (2)" in response.text
+    assert 'value="Volkswagen">Volkswagen (1)' in response.text
+
+def test_listar_veiculos_paginacao_por_cursor(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    for i in range(5):
+        client.post(f"{API_PREFIX}/veiculos/", json={
+            "veiculo": f"Gol {i}", "marca": "Volkswagen", "ano": 2020, "descricao": "...", "vendido": False
+        })
+    client.post(f"{API_PREFIX}/veiculos/", json={
+        "veiculo": "Onix", "marca": "Chevrolet", "ano": 2021, "descricao": "...", "vendido": False
+    })
+
+    response = client.get(f"{API_PREFIX}/veiculos/?marca=Volkswagen&limit=2")
+    assert response.status_code == 200
+    primeira_pagina = response.json()
+    assert [v["veiculo"] for v in primeira_pagina] == ["Gol 0", "Gol 1"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    ids_vistos = [v["id"] for v in primeira_pagina]
+    while cursor:
+        response = client.get(f"{API_PREFIX}/veiculos/?marca=Volkswagen&limit=2&cursor={cursor}")
+        assert response.status_code == 200
+        ids_vistos += [v["id"] for v in response.json()]
+        assert all(v["marca"] == "Volkswagen" for v in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+
+    assert len(ids_vistos) == 5
+    assert ids_vistos == sorted(ids_vistos)
+
+def test_listar_veiculos_cursor_invalido(client):
+    response = client.get(f"{API_PREFIX}/veiculos/?cursor=nao-e-um-cursor")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor de paginação inválido"
+
+def test_listar_veiculos_busca_textual(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    client.post(f"{API_PREFIX}/veiculos/", json={
+        "veiculo": "Corolla", "marca": "Toyota", "ano": 2022, "descricao": "Sedan prata automático", "vendido": False
+    })
+    client.post(f"{API_PREFIX}/veiculos/", json={
+        "veiculo": "Hilux", "marca": "Toyota", "ano": 2020, "descricao": "Picape diesel", "vendido": False
+    })
+    client.post(f"{API_PREFIX}/veiculos/", json={
+        "veiculo": "Civic", "marca": "Honda", "ano": 2021, "descricao": "Sedan preto", "vendido": False
+    })
+
+    # Termos em campos diferentes (modelo, marca e descrição) e prefixo
+    response = client.get(f"{API_PREFIX}/veiculos/?q=toyota sedan")
+    assert response.status_code == 200
+    assert [v["veiculo"] for v in response.json()] == ["Corolla"]
+
+    response = client.get(f"{API_PREFIX}/veiculos/?q=Seda")
+    assert sorted(v["veiculo"] for v in response.json()) == ["Civic", "Corolla"]
+
+    response = client.get(f"{API_PREFIX}/veiculos/?q=Hilux&cursor=eyJpZCI6IDF9")
+    assert response.status_code == 400
+
+def test_listar_veiculos_com_projecao_de_campos(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    for i in range(3):
+        client.post(f"{API_PREFIX}/veiculos/", json={
+            "veiculo": f"Gol {i}", "marca": "Volkswagen", "ano": 2020, "descricao": "Prata", "vendido": i == 0
+        })
+
+    response = client.get(f"{API_PREFIX}/veiculos/?fields=veiculo,ano&limit=2")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": response.json()[0]["id"], "veiculo": "Gol 0", "ano": 2020},
+        {"id": response.json()[1]["id"], "veiculo": "Gol 1", "ano": 2020},
+    ]
+    response = client.get(f"{API_PREFIX}/veiculos/?fields=veiculo,ano&limit=2&cursor={response.headers['X-Next-Cursor']}")
+    assert [v["veiculo"] for v in response.json()] == ["Gol 2"]
+
+    response = client.get(f"{API_PREFIX}/veiculos/?fields=veiculo,created&q=gol prata")
+    assert sorted(response.json()[0]) == ["created", "id", "veiculo"]
+    assert [v["veiculo"] for v in client.get(f"{API_PREFIX}/veiculos/nao-vendidos/?fields=veiculo").json()] == ["Gol 1", "Gol 2"]
+    assert list(client.get(f"{API_PREFIX}/veiculos/recentes/?fields=marca").json()[0]) == ["id", "marca"]
+
+    response = client.get(f"{API_PREFIX}/veiculos/?fields=veiculo,senha")
+    assert response.status_code == 400
+    assert "senha" in response.json()["detail"]
+
 def test_listar_veiculos_nao_vendidos_lista_vazia(setup_test_db, client, db):
-    db.execute(text("TRUNCATE TABLE veiculos"))
+    limpar_tabela(db, "veiculos")
     client.post(f"{API_PREFIX}/veiculos/", json={
         "veiculo": "Carro Vendido 1", "marca": "Ford", "ano": 2020,
         "descricao": "...", "vendido": True
@@ -169,7 +469,7 @@ def test_listar_veiculos_nao_vendidos_lista_vazia(setup_test_db, client, db):
 
 # Testes de Estatísticas
 def test_estatisticas_veiculos(setup_test_db, client, db):
-    db.execute(text("TRUNCATE TABLE veiculos"))
+    limpar_tabela(db, "veiculos")
     veiculos_payload = [
         {"veiculo": "Gol Estatistica", "marca": "Volkswagen", "ano": 2020, "descricao": "Gol para estatistica", "vendido": False},
         {"veiculo": "Onix Estatistica", "marca": "Chevrolet", "ano": 2021, "descricao": "Onix para estatistica", "vendido": True},
@@ -188,6 +488,175 @@ def test_estatisticas_veiculos(setup_test_db, client, db):
     assert any(d["decada"] == "2020s" and d["quantidade"] >= 1 for d in data["distribuicao_por_decada"])
     assert any(f["fabricante"] == "Volkswagen" and f["quantidade"] == 1 for f in data["distribuicao_por_fabricante"])
 
+def test_estatisticas_incrementais_batem_com_reconstrucao(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    limpar_tabela(db, "veiculos_estatisticas")
+    criados = [
+        client.post(f"{API_PREFIX}/veiculos/", json=v).json() for v in [
+            {"veiculo": "Gol", "marca": "Volkswagen", "ano": 1998, "descricao": "...", "vendido": False},
+            {"veiculo": "Onix", "marca": "Chevrolet", "ano": 2021, "descricao": "...", "vendido": False},
+            {"veiculo": "Uno", "marca": "Fiat", "ano": 2005, "descricao": "...", "vendido": True},
+        ]
+    ]
+    client.put(f"{API_PREFIX}/veiculos/{criados[0]['id']}", json={"marca": "Ford", "ano": 2001, "vendido": True})
+    client.delete(f"{API_PREFIX}/veiculos/{criados[2]['id']}")
+
+    incrementais = client.get(f"{API_PREFIX}/veiculos/estatisticas/geral").json()
+    assert incrementais["total_nao_vendidos"] == 1
+    assert incrementais["veiculos_ultimos_7_dias"] == 2
+    assert incrementais["distribuicao_por_decada"] == [
+        {"decada": "2000s", "quantidade": 1},
+        {"decada": "2020s", "quantidade": 1},
+    ]
+    assert incrementais["distribuicao_por_fabricante"] == [
+        {"fabricante": "Chevrolet", "quantidade": 1},
+        {"fabricante": "Ford", "quantidade": 1},
+    ]
+
+    reconstruir_estatisticas(db)
+    assert client.get(f"{API_PREFIX}/veiculos/estatisticas/geral").json() == incrementais
+
+def test_escritas_bloqueiam_linhas_e_contadores_em_ordem():
+    from sqlalchemy.dialects import mysql
+
+    # A linha do veículo é lida com FOR UPDATE antes de calcular os contadores "antes"
+    assert "FOR UPDATE" in str(query_veiculo_para_alterar(1).compile(dialect=mysql.dialect()))
+    assert query_veiculo_para_alterar(1).get_execution_options()["populate_existing"]
+    assert str(query_contadores_por_ids([3, 1]).compile(dialect=mysql.dialect())).endswith(
+        "ORDER BY veiculos.id FOR UPDATE"
+    )
+
+    # Os contadores entram no UPSERT em ordem de chave, independente da ordem dos deltas
+    stmt = statement_deltas("mysql", {("marca", "9"): 1, ("ano", "2020"): 1, ("dia", "2024-01-01"): 1})
+    parametros = stmt.compile(dialect=mysql.dialect()).params
+    chaves = [parametros[f"chave_m{i}"] for i in range(3)]
+    assert chaves == ["2020", "2024-01-01", "9"]
+
+    verificar_dialeto("sqlite")
+    # Sem UPSERT nem índice textual no PostgreSQL: recusado na inicialização
+    for dialeto in ("postgresql", "oracle"):
+        with pytest.raises(RuntimeError):
+            verificar_dialeto(dialeto)
+
+def test_operacoes_em_lote(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    limpar_tabela(db, "veiculos_estatisticas")
+
+    response = client.post(f"{API_PREFIX}/veiculos/bulk?chunk_size=2", json=[
+        {"veiculo": "Gol", "marca": "Volkswagen", "ano": 2015},
+        {"veiculo": "Ka", "marca": "MarcaInvalida", "ano": 2015},
+        {"veiculo": "Uno", "marca": "Fiat", "ano": 1990, "vendido": True},
+        {"veiculo": "Civic", "marca": "Honda", "ano": 2021},
+        {"marca": "Fiat"},
+    ])
+    assert response.status_code == 200
+    resultado = response.json()
+    assert resultado["total"] == 5
+    assert resultado["processados"] == 3
+    assert [e["indice"] for e in resultado["erros"]] == [1, 4]
+    assert "Marca inválida" in resultado["erros"][0]["erro"]
+
+    response = client.post(
+        f"{API_PREFIX}/veiculos/bulk",
+        content='{"veiculo": "Hilux", "marca": "Toyota", "ano": 2020}\n{"veiculo": "Corolla", "marca": "Toyota", "ano": 2022}\n',
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.json()["processados"] == 2
+
+    ids = {v["veiculo"]: v["id"] for v in client.get(f"{API_PREFIX}/veiculos/").json()}
+    response = client.put(f"{API_PREFIX}/veiculos/bulk", json=[
+        {"id": ids["Gol"], "vendido": True, "ano": 2001},
+        {"id": ids["Gol"], "vendido": False},
+        {"id": 99999, "vendido": True},
+    ])
+    assert response.json()["processados"] == 1
+    assert [(e["indice"], e["erro"]) for e in response.json()["erros"]] == [
+        (1, "ID repetido no lote"), (2, "Veículo não encontrado")
+    ]
+    assert client.get(f"{API_PREFIX}/veiculos/{ids['Gol']}").json()["ano"] == 2001
+
+    response = client.request("DELETE", f"{API_PREFIX}/veiculos/bulk", json=[ids["Uno"], ids["Civic"], 99999])
+    assert response.json()["processados"] == 2
+    assert response.json()["erros"][0]["id"] == 99999
+    assert client.get(f"{API_PREFIX}/veiculos/{ids['Uno']}").status_code == 404
+
+    incrementais = client.get(f"{API_PREFIX}/veiculos/estatisticas/geral").json()
+    assert incrementais["total_nao_vendidos"] == 2
+    reconstruir_estatisticas(db)
+    assert client.get(f"{API_PREFIX}/veiculos/estatisticas/geral").json() == incrementais
+
+def test_exportar_veiculos(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    client.post(f"{API_PREFIX}/veiculos/bulk", json=[
+        {"veiculo": "Gol", "marca": "Volkswagen", "ano": 2015, "descricao": "Prata, 1.0"},
+        {"veiculo": "Uno", "marca": "Fiat", "ano": 1990, "vendido": True},
+        {"veiculo": "Polo", "marca": "Volkswagen", "ano": 2020},
+    ])
+
+    response = client.get(f"{API_PREFIX}/veiculos/export?marca=Volkswagen")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(linha) for linha in response.text.splitlines()]
+    assert [v["veiculo"] for v in linhas] == ["Gol", "Polo"]
+    assert linhas[0] == client.get(f"{API_PREFIX}/veiculos/{linhas[0]['id']}").json()
+
+    response = client.get(f"{API_PREFIX}/veiculos/export?format=csv&vendido=false")
+    assert response.status_code == 200
+    linhas = list(csv.DictReader(io.StringIO(response.text)))
+    assert [v["veiculo"] for v in linhas] == ["Gol", "Polo"]
+    assert linhas[0]["descricao"] == "Prata, 1.0"
+    assert linhas[0]["vendido"] == "false"
+
+    assert client.get(f"{API_PREFIX}/veiculos/export?format=xml").status_code == 422
+
+def test_importar_veiculos_csv(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    conteudo = (
+        "veiculo,marca,ano,descricao,vendido\n"
+        "Gol,Volkswagen,2015,\"Prata, 1.0\",false\n"
+        "Ka,MarcaInvalida,2015,,\n"
+        "Uno,Fiat,abc,,\n"
+        "Civic,Honda,2021,,true\n"
+    )
+    response = client.post(
+        f"{API_PREFIX}/veiculos/import?chunk_size=2",
+        files={"arquivo": ("estoque.csv", conteudo.encode())}
+    )
+    assert response.status_code == 200
+    resultado = response.json()
+    assert (resultado["registros_processados"], resultado["inseridos"], resultado["rejeitados"]) == (4, 2, 2)
+    assert resultado["concluida"] is True
+    assert [r["linha"] for r in resultado["rejeicoes"]] == [3, 4]
+    assert "Marca inválida" in resultado["rejeicoes"][0]["erro"]
+
+    veiculos = client.get(f"{API_PREFIX}/veiculos/").json()
+    assert [(v["veiculo"], v["descricao"], v["vendido"]) for v in veiculos] == [
+        ("Gol", "Prata, 1.0", False), ("Civic", None, True)
+    ]
+    progresso = client.get(f"{API_PREFIX}/veiculos/importacoes/{resultado['id']}").json()
+    assert progresso["inseridos"] == 2
+
+def test_importar_veiculos_retoma_do_checkpoint(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    linhas = [json.dumps({"veiculo": f"Gol {i}", "marca": "Volkswagen", "ano": 2020}) for i in range(5)]
+    response = client.post(
+        f"{API_PREFIX}/veiculos/import?chunk_size=2",
+        files={"arquivo": ("estoque.ndjson", "\n".join(linhas[:3]).encode())}
+    )
+    importacao_id = response.json()["id"]
+
+    # Reenvia o arquivo completo: os 3 registros já gravados são pulados
+    response = client.post(
+        f"{API_PREFIX}/veiculos/import?importacao_id={importacao_id}",
+        files={"arquivo": ("estoque.ndjson", "\n".join(linhas).encode())}
+    )
+    assert response.json()["registros_processados"] == 5
+    assert [v["veiculo"] for v in client.get(f"{API_PREFIX}/veiculos/").json()] == [f"Gol {i}" for i in range(5)]
+
+def test_operacoes_em_lote_corpo_invalido(client):
+    response = client.post(f"{API_PREFIX}/veiculos/bulk", json={"veiculo": "Gol"})
+    assert response.status_code == 400
+
 # Testes de Validação
 def test_validacao_ano_invalido(setup_test_db, client):
     veiculo_data = {
@@ -330,7 +799,7 @@ def test_veiculos_recentes(setup_test_db, client):
 
 # Testes de Veículos Não Vendidos
 def test_veiculos_nao_vendidos(setup_test_db, client, db):
-    db.execute(text("TRUNCATE TABLE veiculos"))
+    limpar_tabela(db, "veiculos")
     veiculos_payload = [
         {"veiculo": "Gol", "marca": "Volkswagen", "ano": 2020, "descricao": "Gol não vendido", "vendido": False},
         {"veiculo": "Onix", "marca": "Chevrolet", "ano": 2021, "descricao": "Onix vendido", "vendido": True}
@@ -345,6 +814,29 @@ def test_veiculos_nao_vendidos(setup_test_db, client, db):
     assert data[0]["vendido"] == False
     assert data[0]["veiculo"] == "Gol"
 
+def test_veiculos_nao_vendidos_paginacao_e_filtros(setup_test_db, client, db):
+    limpar_tabela(db, "veiculos")
+    for i in range(4):
+        client.post(f"{API_PREFIX}/veiculos/", json={
+            "veiculo": f"Ka {i}", "marca": "Ford", "ano": 2015, "descricao": "...", "vendido": i == 0
+        })
+    client.post(f"{API_PREFIX}/veiculos/", json={
+        "veiculo": "Uno", "marca": "Fiat", "ano": 2015, "descricao": "...", "vendido": False
+    })
+
+    response = client.get(f"{API_PREFIX}/veiculos/nao-vendidos/?marca=Ford&limit=2")
+    assert response.status_code == 200
+    assert [v["veiculo"] for v in response.json()] == ["Ka 1", "Ka 2"]
+
+    response = client.get(
+        f"{API_PREFIX}/veiculos/nao-vendidos/?marca=Ford&limit=2&cursor={response.headers['X-Next-Cursor']}"
+    )
+    assert [v["veiculo"] for v in response.json()] == ["Ka 3"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get(f"{API_PREFIX}/veiculos/?vendido=true")
+    assert [v["veiculo"] for v in response.json()] == ["Ka 0"]
+
 # Testes para endpoints básicos em main.py
 def test_read_root(client):
     response = client.get("/")
@@ -356,6 +848,87 @@ def test_read_root(client):
         "frontend_ui": "/ui" # Este é o prefixo do frontend, não da API
     }
 
+def test_metricas_prometheus_por_template_de_rota(setup_test_db, client, veiculo_criado):
+    registro_metricas.limpar()
+    client.get(f"{API_PREFIX}/veiculos/{veiculo_criado['id']}")
+    client.get(f"{API_PREFIX}/veiculos/99999")
+    client.get("/caminho/inexistente")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    linhas = response.text.splitlines()
+    rota = 'method="GET",route="/api/v1/veiculos/{veiculo_id}"'
+    assert f'tinnova_http_requests_total{{{rota},status="200"}} 1' in linhas
+    assert f'tinnova_http_requests_total{{{rota},status="404"}} 1' in linhas
+    assert 'tinnova_http_requests_total{method="GET",route="<sem rota>",status="404"} 1' in linhas
+    assert f'tinnova_http_request_duration_seconds_bucket{{{rota},le="+Inf"}} 2' in linhas
+    assert f'tinnova_http_request_duration_seconds_count{{{rota}}} 2' in linhas
+    assert f'tinnova_http_response_size_bytes_count{{{rota}}} 2' in linhas
+    # A própria requisição de /metrics está em andamento
+    assert "tinnova_http_requests_in_progress 1" in linhas
+    # IDs não viram séries próprias
+    assert f"/veiculos/{veiculo_criado['id']}\"" not in response.text
+    assert "/veiculos/99999" not in response.text
+
+@contextmanager
+def no_maximo_consultas(maximo: int):
+    """Falha se o bloco executar mais de `maximo` comandos SQL (lista os comandos na mensagem)."""
+    with contar_consultas() as consultas:
+        yield consultas
+    assert consultas.total <= maximo, consultas.resumo()
+
+def test_numero_de_consultas_por_endpoint(setup_test_db, client, veiculo_data, veiculo_criado):
+    veiculo_id = veiculo_criado["id"]
+    with no_maximo_consultas(1):
+        client.get(f"{API_PREFIX}/veiculos/{veiculo_id}")
+    # Detalhe em cache: nenhum comando SQL, nem para a ETag
+    with no_maximo_consultas(0):
+        response = client.get(f"{API_PREFIX}/veiculos/{veiculo_id}")
+    assert response.status_code == 200 and "ETag" in response.headers
+    with no_maximo_consultas(2):
+        client.get(f"{API_PREFIX}/veiculos/?marca=Volkswagen&fields=id,veiculo")
+    with no_maximo_consultas(2):
+        client.get(f"{API_PREFIX}/veiculos/nao-vendidos/")
+    # Versão dos dados (chave do cache), página e contagens do painel de filtros
+    with no_maximo_consultas(3):
+        client.get("/ui/fragment/veiculos-lista")
+    # SELECT do veículo, UPDATE, deltas das estatísticas e refresh após o commit
+    with no_maximo_consultas(4):
+        assert client.put(f"{API_PREFIX}/veiculos/{veiculo_id}", json={"vendido": True}).status_code == 200
+    with no_maximo_consultas(3):
+        assert client.post(f"{API_PREFIX}/veiculos/", json=veiculo_data).status_code == 201
+    with no_maximo_consultas(3):
+        assert client.delete(f"{API_PREFIX}/veiculos/{veiculo_id}").status_code == 200
+
+def test_cabecalhos_de_consultas_sql(setup_test_db, client, veiculo_criado, monkeypatch):
+    assert "X-Query-Count" not in client.get(f"{API_PREFIX}/veiculos/").headers
+    monkeypatch.setattr(instrumentacao_sql, "CABECALHOS_SQL", True)
+    response = client.get(f"{API_PREFIX}/veiculos/")
+    assert response.headers["X-Query-Count"] == "2"  # versão dos dados (ETag) + página
+    assert float(response.headers["X-DB-Time"]) > 0
+
+def test_log_de_consulta_lenta_e_possivel_n_mais_1(setup_test_db, client, veiculo_criado, monkeypatch, caplog):
+    veiculo_id = veiculo_criado["id"]
+    monkeypatch.setattr(instrumentacao_sql, "LIMITE_CONSULTA_LENTA", 0)
+    monkeypatch.setattr(instrumentacao_sql, "LIMITE_REPETICOES_N1", 1)
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        client.get(f"{API_PREFIX}/veiculos/{veiculo_id}")
+        assert not any("Possível N+1" in registro.getMessage() for registro in caplog.records)
+        # O PUT lê o veículo duas vezes (validação e refresh após o commit)
+        client.put(f"{API_PREFIX}/veiculos/{veiculo_id}", json={"vendido": True})
+    mensagens = [registro.getMessage() for registro in caplog.records]
+    assert any(m.startswith("Consulta lenta") and f"GET /api/v1/veiculos/{veiculo_id}" in m for m in mensagens)
+    assert any(m.startswith(f"Possível N+1 em PUT /api/v1/veiculos/{veiculo_id}: 2x SELECT") for m in mensagens)
+
+def test_impressao_digital_sql():
+    assert impressao_digital(
+        "SELECT veiculos.id FROM veiculos\nWHERE veiculos.id IN (?, ?, ?) AND marca = 'Ford' LIMIT ? OFFSET 10"
+    ) == "SELECT veiculos.id FROM veiculos WHERE veiculos.id IN (?...) AND marca = ? LIMIT ? OFFSET ?"
+    assert impressao_digital("UPDATE veiculos SET vendido=%(vendido)s WHERE veiculos.id = %(id_1)s") == (
+        "UPDATE veiculos SET vendido=? WHERE veiculos.id = ?"
+    )
+
 def test_atualizar_veiculo_nao_encontrado(setup_test_db, client, veiculo_data):
     # Tenta atualizar um veículo com ID inexistente
     update_data = {
@@ -383,20 +956,38 @@ def test_crud_update_veiculo_nao_encontrado(setup_test_db, db):
 def test_crud_validar_marca_existente(setup_test_db, db):
     veiculo_a_criar = VeiculoCreate(
         veiculo="Carro Teste Marca",
-        marca="SuperMarcaExistente",
+        marca="Mercedes-Benz",
         ano=2022,
         descricao="Teste de validação de marca",
         vendido=False
     )
     crud_create_veiculo(db, veiculo_a_criar)
 
-    assert crud_validar_marca(db, "SuperMarcaExistente") is True
-    assert crud_validar_marca(db, "supermarca") is True
-    assert crud_validar_marca(db, "Existente") is True
+    assert crud_validar_marca(db, "Mercedes-Benz") is True
+    assert crud_validar_marca(db, "mercedes") is True
+    assert crud_validar_marca(db, "Benz") is True
 
 def test_crud_validar_marca_inexistente(setup_test_db, db):
     assert crud_validar_marca(db, "MarcaTotalmenteInexistenteNoBanco") is False
 
+def test_consultas_dependentes_do_banco(setup_test_db, db):
+    # Décadas com divisão inteira e marcas agrupadas sem diferenciar caixa em qualquer banco
+    for marca, ano in (("Ford", 1997), ("ford", 1990), ("Fiat", 2005), ("Fiat", 2009)):
+        db.add(VeiculoModel(veiculo="Teste", marca=marca, ano=ano, descricao="", vendido=False))
+    db.commit()
+
+    assert crud_get_distribuicao_por_decada(db) == [
+        {"decada": "1990s", "quantidade": 2}, {"decada": "2000s", "quantidade": 2}
+    ]
+    fabricantes = {item["fabricante"].lower(): item["quantidade"] for item in crud_get_distribuicao_por_fabricante(db)}
+    assert fabricantes == {"ford": 2, "fiat": 2}
+    assert crud_validar_marca(db, "FOR") is True
+
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
 
 
 def test_original_get_db_behavior():
@@ -419,4 +1010,328 @@ def test_original_get_db_behavior():
         assert db_yielded_from_generator is not None # Confirma se executou
 
         mock_session_instance.close.assert_called_once()
-        assert mock_session_instance.is_active is False # Verifica se a sessão foi "fechada"
\ No newline at end of file
+        assert mock_session_instance.is_active is False # Verifica se a sessão foi "fechada"
+
+def test_metricas_pool_checkout_overflow_e_timeout():
+    engine_pool = create_engine(SQLALCHEMY_DATABASE_URL, **opcoes_pool(pool_size=1, max_overflow=1, pool_timeout=0.05))
+    metricas = instrumentar_pool(engine_pool, validacao="nenhuma")
+    try:
+        with engine_pool.connect(), engine_pool.connect():
+            # Pool (1) e overflow (1) ocupados: o terceiro checkout espera o timeout e falha
+            with pytest.raises(SQLAlchemyTimeoutError):
+                engine_pool.connect()
+            estado = estado_pool(engine_pool)
+            assert estado["estado"] == {"em_uso": 2, "ociosas": 0, "overflow": 1}
+        resultado = estado_pool(engine_pool)["metricas"]
+        assert resultado["checkouts"] == 2
+        assert resultado["checkins"] == 2
+        assert resultado["checkouts_em_overflow"] == 1
+        assert resultado["pico_em_uso"] == 2
+        assert resultado["timeouts"] == 1
+        assert resultado["espera_maxima_ms"] >= 50
+        assert resultado["aguardando"] == 0
+        assert metricas.configuracao["pool_size"] == 1
+    finally:
+        engine_pool.dispose()
+
+def test_pool_validacao_periodica_descarta_conexao_morta(monkeypatch):
+    engine_pool = create_engine(SQLALCHEMY_DATABASE_URL, **opcoes_pool(pool_size=1, pool_pre_ping=False))
+    metricas = instrumentar_pool(engine_pool, validacao="periodica", intervalo_validacao=0)
+    try:
+        with engine_pool.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        # Conexão ociosa "derrubada" pelo servidor: o ping falha e o checkout abre outra
+        pings = []
+        def ping_falha_uma_vez(dbapi_connection):
+            pings.append(dbapi_connection)
+            if len(pings) == 1:
+                raise Exception("conexão perdida")
+            return True
+        monkeypatch.setattr(engine_pool.dialect, "do_ping", ping_falha_uma_vez)
+        time.sleep(0.01)
+        with engine_pool.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert metricas.validacoes_falhas == 1
+        assert metricas.invalidacoes == 1
+        assert metricas.conexoes_abertas == 2
+    finally:
+        engine_pool.dispose()
+
+def test_endpoint_metricas_pool(client):
+    response = client.get(f"{API_PREFIX}/internal/pool")
+    assert response.status_code == 200
+    pools = response.json()
+    assert set(pools) == {"assincrono", "sincrono"}
+    for pool in pools.values():
+        assert pool["configuracao"]["pool_size"] == POOL_SIZE
+        assert {"em_uso", "ociosas", "overflow"} <= set(pool["estado"])
+        assert {"checkouts", "timeouts", "espera_media_ms", "checkouts_em_overflow"} <= set(pool["metricas"])
+
+def test_endpoint_estado_replicas(client):
+    response = client.get(f"{API_PREFIX}/internal/replicas")
+    assert response.status_code == 200
+    assert set(response.json()) == {"assincrono", "sincrono"}
+
+# Roteamento de leituras: bancos SQLite locais fazem o papel do primário e das réplicas,
+# cada um com um veículo de marca diferente para identificar de onde veio a leitura.
+# Sem replicação, o que é gravado no primário não aparece nas réplicas.
+
+def bancos_locais(tmp_path, nomes, assincrono=False):
+    engines = []
+    for nome in nomes:
+        url = f"sqlite:///{tmp_path / nome}.db"
+        sincrono = create_engine(url)
+        Base.metadata.create_all(bind=sincrono)
+        with sincrono.begin() as conn:
+            conn.execute(VeiculoModel.__table__.insert(), {
+                "veiculo": "Origem", "marca": nome, "ano": 2020, "descricao": "", "vendido": False
+            })
+        sincrono.dispose()
+        engines.append(create_async_engine(url_assincrona(url)) if assincrono else create_engine(url))
+    return engines
+
+def marcas_lidas(db: Session):
+    return {veiculo.marca for veiculo in VeiculoService(db).listar_veiculos()}
+
+def test_roteamento_leituras_em_rodizio_e_escritas_no_primario(tmp_path):
+    primario, replica_a, replica_b = bancos_locais(tmp_path, ["Primario", "ReplicaA", "ReplicaB"])
+    roteador = RoteadorReplicas(primario, [replica_a, replica_b], atraso_maximo=0)
+    Sessao = sessionmaker(bind=primario, class_=SessaoRoteada, roteador=roteador)
+
+    # Uma réplica por sessão, alternando entre as réplicas
+    lidas = []
+    for _ in range(4):
+        with Sessao() as db:
+            lidas.append(marcas_lidas(db))
+            assert marcas_lidas(db) == lidas[-1]
+    assert lidas == [{"ReplicaA"}, {"ReplicaB"}, {"ReplicaA"}, {"ReplicaB"}]
+
+    # A escrita e as leituras seguintes da mesma sessão (refresh, listagem) vão ao primário
+    with Sessao() as db:
+        criado = VeiculoService(db).criar_veiculo(VeiculoCreate(
+            veiculo="Novo", marca="Ford", ano=2021, descricao="Gravado no primário", vendido=False
+        ))
+        assert criado.id == 2
+        assert marcas_lidas(db) == {"Primario", "Ford"}
+        veiculo_id = criado.id
+    # O fluxo de atualização lê e grava no primário, mesmo com a sessão nova
+    with Sessao() as db:
+        atualizado = VeiculoService(db).atualizar_veiculo(veiculo_id, VeiculoUpdate(vendido=True))
+        assert atualizado.vendido is True
+
+    # Logo depois de uma escrita, as sessões novas leem do primário (réplicas atrasadas)
+    roteador.atraso_maximo = 60
+    with Sessao() as db:
+        assert marcas_lidas(db) == {"Primario", "Ford"}
+    assert roteador.estado()["leituras_primario"] == 1
+
+def test_roteamento_ignora_replica_fora_do_ar(tmp_path):
+    primario, replica = bancos_locais(tmp_path, ["Primario", "Replica"])
+    fora_do_ar = create_engine(f"sqlite:///{tmp_path / 'nao_existe' / 'replica.db'}")
+    roteador = RoteadorReplicas(primario, [fora_do_ar, replica], quarentena=30, atraso_maximo=0)
+    Sessao = sessionmaker(bind=primario, class_=SessaoRoteada, roteador=roteador)
+
+    # A primeira leitura na réplica fora do ar falha e a tira do rodízio
+    with Sessao() as db:
+        with pytest.raises(Exception):
+            marcas_lidas(db)
+    for _ in range(3):
+        with Sessao() as db:
+            assert marcas_lidas(db) == {"Replica"}
+    estado = roteador.estado()["replicas"]
+    assert [(r["saudavel"], r["falhas"], r["leituras"]) for r in estado] == [(False, 1, 1), (True, 0, 3)]
+
+    # Sem réplicas saudáveis, as leituras vão para o primário
+    roteador.marcar_falha(replica)
+    with Sessao() as db:
+        assert marcas_lidas(db) == {"Primario"}
+
+def test_roteamento_sessao_assincrona(tmp_path):
+    primario, replica = bancos_locais(tmp_path, ["Primario", "Replica"], assincrono=True)
+    roteador = RoteadorReplicas(primario.sync_engine, [replica.sync_engine], atraso_maximo=0)
+    Sessao = async_sessionmaker(
+        bind=primario, expire_on_commit=False, sync_session_class=SessaoRoteada, roteador=roteador
+    )
+
+    async def executar():
+        async with Sessao() as db:
+            service = AsyncVeiculoService(db)
+            assert {v.marca for v in await service.listar_veiculos()} == {"Replica"}
+        # A leitura que preenche o cache de veículos vai ao primário
+        async with Sessao() as db:
+            assert (await AsyncVeiculoService(db).obter_veiculo(1)).marca == "Replica"
+        async with Sessao() as db:
+            cache = LRUCache()
+            assert (await AsyncVeiculoService(db, cache).obter_veiculo(1)).marca == "Primario"
+            assert (await cache.obter(chave_veiculo(1))).marca == "Primario"
+        async with Sessao() as db:
+            service = AsyncVeiculoService(db)
+            await service.criar_veiculo(VeiculoCreate(
+                veiculo="Novo", marca="Fiat", ano=2021, descricao="Gravado no primário", vendido=False
+            ))
+            assert {v.marca for v in await service.listar_veiculos()} == {"Primario", "Fiat"}
+        await primario.dispose()
+        await replica.dispose()
+
+    asyncio.run(executar())
+
+# Testes da interface web (modo em processo)
+def test_fragment_lista_modo_local(setup_test_db, client, veiculo_criado):
+    response = client.get("/ui/fragment/veiculos-lista")
+    assert response.status_code == 200
+    assert veiculo_criado["veiculo"] in response.text
+
+def test_fragment_lista_limites_de_paginacao(setup_test_db, client):
+    # Mesmos limites de GET /api/v1/veiculos/ (o modo local não passa pela rota da API)
+    assert client.get("/ui/fragment/veiculos-lista?limit=1000").status_code == 422
+    assert client.get("/ui/fragment/veiculos-lista?limit=0").status_code == 422
+    assert client.get("/ui/fragment/veiculos-lista?skip=-1").status_code == 422
+    assert client.get("/ui/fragment/veiculos-lista?limit=100").status_code == 200
+
+def test_fragment_detalhes_nao_encontrado_modo_local(setup_test_db, client):
+    response = client.get("/ui/fragment/veiculo-detalhes/99999")
+    assert response.status_code == 404
+    assert "Veículo não encontrado" in response.text
+
+def test_action_criar_marca_invalida_modo_local(setup_test_db, client):
+    response = client.post("/ui/action/veiculo-criar", data={
+        "veiculo": "Carro", "marca": "MarcaInvalida", "ano": 2020, "descricao": "..."
+    })
+    assert response.status_code == 400
+    assert "Marca inválida" in response.text
+    assert response.headers["HX-Reswap"] == "innerHTML"
+
+def badges_fora_de_banda(html: str) -> str:
+    """Trecho dos badges trocados fora de banda na resposta de uma ação."""
+    return html.split('<span id="estatisticas-badges" hx-swap-oob="true"', 1)[1]
+
+def test_actions_respondem_com_linha_e_badges_fora_de_banda(setup_test_db, client, db, veiculo_data):
+    limpar_tabela(db, "veiculos")
+    limpar_tabela(db, "veiculos_estatisticas")
+    # Badges lidos pela página: a partir daqui, mantidos em memória com os deltas das escritas
+    assert '<span class="badge bg-primary rounded-pill">0</span>' in client.get("/ui/fragment/estatisticas-badges").text
+
+    # Criação: formulário vazio no painel e badges com os deltas da escrita, sem reler os
+    # contadores (INSERT, deltas e refresh); a tabela não recebe a linha (a posição dela
+    # depende dos filtros e da página exibidos)
+    with no_maximo_consultas(3):
+        response = client.post("/ui/action/veiculo-criar", data=veiculo_data)
+    assert response.status_code == 200
+    assert "HX-Trigger" not in response.headers
+    assert "Veículo criado com sucesso!" in response.text and 'hx-post="/ui/action/veiculo-criar"' in response.text
+    assert "<tr" not in response.text
+    badges = badges_fora_de_banda(response.text)
+    assert "hx-get" not in badges
+    assert '<span class="badge bg-primary rounded-pill">1</span>' in badges
+    criado = client.get(f"{API_PREFIX}/veiculos/?marca=Volkswagen").json()[0]
+
+    # Edição: detalhes a partir da resposta da escrita e a linha substituída pelo ID
+    dados = {**veiculo_data, "veiculo": "Gol Bola", "vendido": "true"}
+    with no_maximo_consultas(4):
+        response = client.put(f"/ui/action/veiculo-editar/{criado['id']}", data=dados)
+    assert response.status_code == 200
+    linha = response.text.split(f'<tr id="veiculo-{criado["id"]}"', 1)[1]
+    assert 'hx-swap-oob="true"' in linha.split(">", 1)[0]
+    assert "Gol Bola" in linha and "<td>Sim</td>" in linha
+    assert '<span class="badge bg-primary rounded-pill">0</span>' in badges_fora_de_banda(response.text)
+
+    # Erro de validação: o formulário é repopulado sem consultar o banco (a marca é
+    # validada antes da escrita)
+    with no_maximo_consultas(0):
+        response = client.put(f"/ui/action/veiculo-editar/{criado['id']}", data={**dados, "marca": "Xpto"})
+    assert response.status_code == 400
+    assert 'value="Gol Bola"' in response.text
+
+    # Remoção: a linha sai pelo swap do botão; só os badges vão fora de banda
+    response = client.delete(f"/ui/action/veiculo-remover/{criado['id']}")
+    assert response.status_code == 200
+    assert "<tr" not in response.text
+    assert '<span class="badge bg-info rounded-pill">0</span>' in badges_fora_de_banda(response.text)
+
+    # Sem valores recentes em memória, vai o marcador que busca os badges atuais
+    contadores_badges.limpar()
+    criado = client.post(f"{API_PREFIX}/veiculos/", json=veiculo_data).json()
+    response = client.delete(f"/ui/action/veiculo-remover/{criado['id']}")
+    assert 'hx-get="/ui/fragment/estatisticas-badges"' in badges_fora_de_banda(response.text)
+
+    badges = client.get("/ui/fragment/estatisticas-badges").text
+    assert 'id="estatisticas-badges"' in badges and "hx-swap-oob" not in badges
+
+def test_fragmentos_em_cache_ate_a_proxima_escrita(setup_test_db, client, db, veiculo_criado):
+    url = "/ui/fragment/veiculos-lista?marca=Volkswagen"
+    metricas = client.get(f"{API_PREFIX}/internal/cache/fragmentos").json()
+    assert veiculo_criado["veiculo"] in client.get(url).text
+    client.get("/ui/fragment/veiculos-estatisticas")
+
+    # Alteração direta no banco não passa pelo serviço: os fragmentos continuam em cache
+    db.execute(text("UPDATE veiculos SET veiculo = 'Alterado fora da API'"))
+    db.commit()
+    assert veiculo_criado["veiculo"] in client.get(url + "&cor=").text
+    client.get("/ui/fragment/veiculos-estatisticas")
+    depois = client.get(f"{API_PREFIX}/internal/cache/fragmentos").json()
+    assert depois["acertos"] == metricas["acertos"] + 2
+    assert depois["falhas"] == metricas["falhas"] + 2
+
+    client.put(f"{API_PREFIX}/veiculos/{veiculo_criado['id']}", json={"vendido": True})
+    assert "Alterado fora da API" in client.get(url).text
+    assert client.get(f"{API_PREFIX}/internal/cache/fragmentos").json()["versao_dados"] > metricas["versao_dados"]
+
+    # Escrita atendida por outro worker: só a versão no banco muda, e os fragmentos expiram
+    db.execute(text("UPDATE veiculos SET veiculo = 'Alterado por outro worker'"))
+    aplicar_deltas(db, {})
+    db.commit()
+    assert "Alterado por outro worker" in client.get(url).text
+    # O endpoint de métricas mostra a versão usada nas chaves, não só a do processo
+    depois = client.get(f"{API_PREFIX}/internal/cache/fragmentos").json()
+    assert depois["versao_dados"] == get_versao(db)
+    # Só o PUT passou por este processo
+    assert depois["versao_local"] == metricas["versao_local"] + 1
+
+
+# Eventos de alteração (SSE)
+def test_hub_eventos_entrega_entre_threads_e_descarta_fila_cheia():
+    async def executar():
+        hub = HubEventos(max_eventos=2)
+        assinatura = hub.assinar()
+        # Publicação fora do event loop (rotas síncronas no threadpool)
+        await asyncio.to_thread(hub.publicar, EventoVeiculo("removido", 1))
+        assert (await asyncio.wait_for(assinatura.fila.get(), 1)).id == 1
+
+        for veiculo_id in range(3):
+            hub.publicar(EventoVeiculo("removido", veiculo_id))
+        assert assinatura.fila.get_nowait().tipo == RECARREGAR
+        assert assinatura.fila.empty()
+        assert hub.metricas() == {"conexoes": 1, "eventos_publicados": 4, "eventos_descartados": 2}
+        hub.cancelar(assinatura)
+        assert hub.metricas()["conexoes"] == 0
+    asyncio.run(executar())
+
+def test_stream_de_alteracoes_das_escritas(setup_test_db, client, veiculo_data):
+    async def executar():
+        api = transmitir_eventos(hub_eventos, evento_json, keepalive=0.05)
+        ui = transmitir_eventos(hub_eventos, evento_html, keepalive=60)
+        assert await anext(api) == ": conectado\n\n"
+        assert await anext(ui) == ": conectado\n\n"
+        # Sem escritas, só o keep-alive
+        assert await anext(api) == ": keep-alive\n\n"
+
+        criado = (await asyncio.to_thread(client.post, f"{API_PREFIX}/veiculos/", json=veiculo_data)).json()
+        mensagem = await asyncio.wait_for(anext(api), 5)
+        assert mensagem.startswith("event: criado\ndata: ")
+        assert json.loads(mensagem.split("data: ", 1)[1]) == {"tipo": "criado", "id": criado["id"], "veiculo": criado}
+        assert (await asyncio.wait_for(anext(ui), 5)).startswith("event: lista-desatualizada\n")
+
+        await asyncio.to_thread(client.put, f"{API_PREFIX}/veiculos/{criado['id']}", json={"veiculo": "Gol Quadrado"})
+        assert (await asyncio.wait_for(anext(api), 5)).startswith("event: atualizado\n")
+        mensagem = await asyncio.wait_for(anext(ui), 5)
+        assert mensagem.startswith(f"event: veiculo-{criado['id']}\ndata: <tr id=\"veiculo-{criado['id']}\"")
+        assert "Gol Quadrado" in mensagem and mensagem.endswith("</tr>\n\n")
+
+        await asyncio.to_thread(client.delete, f"{API_PREFIX}/veiculos/{criado['id']}")
+        assert json.loads((await asyncio.wait_for(anext(api), 5)).split("data: ", 1)[1]) == {"tipo": "removido", "id": criado["id"]}
+        assert "Veículo removido." in await asyncio.wait_for(anext(ui), 5)
+
+        await api.aclose()
+        await ui.aclose()
+        assert hub_eventos.metricas()["conexoes"] == 0
+    asyncio.run(executar())